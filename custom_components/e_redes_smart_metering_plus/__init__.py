@@ -2,20 +2,44 @@
 
 from __future__ import annotations
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from collections.abc import Mapping
+import logging
+from typing import Any
 
-from .const import DOMAIN, WEBHOOK_ID
-from .webhook import async_setup_webhook, async_unload_webhook
+from homeassistant.const import Platform
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import (
+    config_validation as cv,
+    device_registry as dr,
+    entity_registry as er,
+)
+from homeassistant.helpers.typing import ConfigType
+
+from .const import CALCULATED_SENSORS, DOMAIN, WEBHOOK_ID
+from .derivation import build_derivations, get_calculated_sensors
+from .formula import FormulaError
+from .reading import ReadingFilter
+from .restore import async_build_restore_index
+from .runtime import CpeRuntime, EntryRuntime, EredesSmartMeteringPlusConfigEntry
+from .services import async_setup_services
+from .snapshot import SnapshotStore
+from .throttle import WriteStats
+from .timing import IngestTimings
+from .webhook import async_setup_ingest, async_setup_webhook, async_unload_webhook
+
+_LOGGER = logging.getLogger(__name__)
 
 # List the platforms that you want to support.
 # For your initial PR, limit it to 1 platform.
 _PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.NUMBER, Platform.BINARY_SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 
-# Create ConfigEntry type alias for webhook integration
-type EredesSmartMeteringPlusConfigEntry = ConfigEntry[dict[str, str]]
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the E-Redes Smart Metering Plus actions."""
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(
@@ -23,33 +47,131 @@ async def async_setup_entry(
 ) -> bool:
     """Set up E-Redes Smart Metering Plus from a config entry."""
 
-    # Initialize domain data if not exists
-    if DOMAIN not in hass.data:
-        hass.data[DOMAIN] = {}
-
-    # Initialize entry-specific data structure required by sensor platform
-    hass.data[DOMAIN][entry.entry_id] = {
-        "webhook_id": WEBHOOK_ID,
-        "name": entry.data.get("name", "E-Redes Smart Meter"),
-        "entities": {},  # Will store sensor entities
-        "add_entities": None,  # Will be set by sensor platform
-    }
+    # Compile the calculated sensor formulas once, in evaluation order
+    try:
+        calculated_sensors = get_calculated_sensors(entry.options)
+    except FormulaError as err:
+        _LOGGER.error("Ignoring invalid user-defined calculated sensors: %s", err)
+        calculated_sensors = dict(CALCULATED_SENSORS)
+    derivations = build_derivations(calculated_sensors)
+    _async_remove_stale_custom_sensors(hass, entry, calculated_sensors)
+
+    # Runtime state shared by the webhook and the platforms
+    runtime = entry.runtime_data = EntryRuntime(
+        name=entry.data.get("name", "E-Redes Smart Meter"),
+        webhook_id=WEBHOOK_ID,
+        derivations=derivations,
+        calculated_sensors={
+            derivation.key: calculated_sensors[derivation.key]
+            for derivation in derivations
+        },
+        restore_index=async_build_restore_index(hass, entry, calculated_sensors),
+        write_stats=WriteStats.from_options(entry.options),
+        snapshot=SnapshotStore(hass, entry.entry_id),
+        reading_filter=ReadingFilter(),
+        timings=IngestTimings(),
+    )
+    # Meters already in the device registry skip it on their first reading
+    for cpe, device_id in _async_known_devices(hass, entry).items():
+        runtime.cpes[cpe] = CpeRuntime(cpe, device_id)
+
+    # Entities start from the latest values persisted before the restart
+    await runtime.snapshot.async_load(runtime)
+
+    # Capture and queue exist before the platforms that expose their counters
+    async_setup_ingest(hass, entry)
+    runtime.timings.async_start(hass, entry)
 
-    # Store configuration data for platforms to access
-    # For webhook integrations, we typically store webhook configuration
-    entry.runtime_data = {
-        "webhook_id": WEBHOOK_ID,
-        "name": entry.data.get("name", "E-Redes Smart Meter"),
-    }
+    await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
 
-    # Set up the webhook
+    # Accept readings only once every platform can add entities
     await async_setup_webhook(hass, entry)
 
-    await hass.config_entries.async_forward_entry_setups(entry, _PLATFORMS)
+    # Reload when options change so the ingest mode is applied
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    # Forget the devices of meters removed from the device registry
+    @callback
+    def _async_device_removed(
+        event: Event[dr.EventDeviceRegistryUpdatedData],
+    ) -> None:
+        if event.data["action"] == "remove":
+            _async_forget_device(hass, entry, event.data["device_id"])
+
+    entry.async_on_unload(
+        hass.bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, _async_device_removed)
+    )
 
     return True
 
 
+@callback
+def _async_known_devices(
+    hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry
+) -> dict[str, str]:
+    """Index the meter devices of this entry by CPE.
+
+    The entry's service device, identified by the entry id, is not a meter.
+    """
+    device_registry = dr.async_get(hass)
+    return {
+        identifier: device.id
+        for device in dr.async_entries_for_config_entry(device_registry, entry.entry_id)
+        if device.entry_type is not dr.DeviceEntryType.SERVICE
+        for domain, identifier in device.identifiers
+        if domain == DOMAIN
+    }
+
+
+@callback
+def _async_remove_stale_custom_sensors(
+    hass: HomeAssistant,
+    entry: EredesSmartMeteringPlusConfigEntry,
+    calculated_sensors: Mapping[str, Any],
+) -> None:
+    """Remove the entities of user-defined sensors no longer in the options.
+
+    Unique ids have the form ``<domain>_<cpe>_custom_<slug>``.
+    """
+    entity_registry = er.async_get(hass)
+    prefix = f"{DOMAIN}_"
+    for entity_entry in er.async_entries_for_config_entry(
+        entity_registry, entry.entry_id
+    ):
+        if entity_entry.domain != Platform.SENSOR:
+            continue
+        _, separator, slug = entity_entry.unique_id.removeprefix(prefix).partition(
+            "_custom_"
+        )
+        if separator and f"custom_{slug}" not in calculated_sensors:
+            entity_registry.async_remove(entity_entry.entity_id)
+            _LOGGER.info("Removed calculated sensor %s", entity_entry.entity_id)
+
+
+@callback
+def _async_forget_device(
+    hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry, device_id: str
+) -> None:
+    """Drop a removed device from the meters' runtime state.
+
+    The entity references of its CPE are dropped too, so the next reading for
+    that CPE recreates the device and its entities from scratch.
+    """
+    for cpe_runtime in entry.runtime_data.cpes.values():
+        if cpe_runtime.device_id == device_id:
+            cpe_runtime.device_id = None
+            cpe_runtime.async_forget_entities()
+            _LOGGER.info("Device for CPE %s was removed", cpe_runtime.cpe)
+            return
+
+
+async def async_reload_entry(
+    hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry
+) -> None:
+    """Reload the config entry after its options were updated."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(
     hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry
 ) -> bool:
@@ -57,8 +179,18 @@ async def async_unload_entry(
     # Unload the webhook - use fixed webhook ID
     await async_unload_webhook(hass, WEBHOOK_ID)
 
-    # Clean up domain data
-    if DOMAIN in hass.data and entry.entry_id in hass.data[DOMAIN]:
-        del hass.data[DOMAIN][entry.entry_id]
+    # Write out the payloads captured since the last flush
+    if (capture := entry.runtime_data.capture) is not None:
+        await capture.async_stop()
+
+    # Persist the latest readings for the next start
+    await entry.runtime_data.snapshot.async_save()
 
     return await hass.config_entries.async_unload_platforms(entry, _PLATFORMS)
+
+
+async def async_remove_entry(
+    hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry
+) -> None:
+    """Remove the persisted snapshot of a removed config entry."""
+    await SnapshotStore(hass, entry.entry_id).async_remove()
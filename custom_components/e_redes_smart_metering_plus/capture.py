@@ -0,0 +1,160 @@
+"""Raw webhook payload capture for E-Redes Smart Metering Plus."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    CAPTURE_BACKUP_COUNT,
+    CAPTURE_BUFFER_SIZE,
+    CAPTURE_FILE_NAME,
+    CAPTURE_FLUSH_INTERVAL,
+    CAPTURE_MAX_FILE_BYTES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PayloadCapture:
+    """Append raw webhook bodies to size-rotated gzip NDJSON files.
+
+    Each line of a capture file is ``{"received": <epoch seconds>, "body":
+    <raw body>}``. Capturing only appends to an in-memory buffer; the buffer
+    is written by an executor job every flush interval, or as soon as it is
+    half full. Bodies arriving while the buffer is full are dropped and
+    counted, so capture never holds up the webhook.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory: str,
+        max_bytes: int = CAPTURE_MAX_FILE_BYTES,
+        backup_count: int = CAPTURE_BACKUP_COUNT,
+    ) -> None:
+        """Initialize the capture."""
+        self._hass = hass
+        self.directory = directory
+        self.path = os.path.join(directory, CAPTURE_FILE_NAME)
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._buffer: list[tuple[float, bytes]] = []
+        self._pending_write: asyncio.Future[None] | None = None
+        self.captured = 0
+        self.dropped = 0
+
+    @callback
+    def async_start(self, entry: ConfigEntry) -> None:
+        """Flush the buffer periodically until the entry unloads."""
+        entry.async_on_unload(
+            async_track_time_interval(
+                self._hass,
+                self._async_flush,
+                timedelta(seconds=CAPTURE_FLUSH_INTERVAL),
+                cancel_on_shutdown=True,
+            )
+        )
+
+    @callback
+    def async_capture(self, body: bytes) -> None:
+        """Buffer a raw body with its arrival time."""
+        if len(self._buffer) >= CAPTURE_BUFFER_SIZE:
+            self.dropped += 1
+            return
+        self._buffer.append((time.time(), body))
+        self.captured += 1
+        if len(self._buffer) >= CAPTURE_BUFFER_SIZE // 2:
+            self._async_flush()
+
+    async def async_stop(self) -> None:
+        """Write out everything still buffered."""
+        if self._pending_write is not None:
+            await self._pending_write
+        if self._buffer:
+            buffer, self._buffer = self._buffer, []
+            await self._hass.async_add_executor_job(self.write, buffer)
+
+    @callback
+    def _async_flush(self, _now: object = None) -> None:
+        """Hand the buffer to an executor job unless one is running.
+
+        Only one job writes at a time, so writes never interleave.
+        """
+        if self._pending_write is not None or not self._buffer:
+            return
+        buffer, self._buffer = self._buffer, []
+        self._pending_write = self._hass.async_add_executor_job(self.write, buffer)
+        self._pending_write.add_done_callback(self._async_write_done)
+
+    @callback
+    def _async_write_done(self, _future: asyncio.Future[None]) -> None:
+        """Allow the next flush."""
+        self._pending_write = None
+
+    def write(self, buffer: list[tuple[float, bytes]]) -> None:
+        """Append buffered bodies to the capture file, rotating it when full.
+
+        Runs in the executor. Each call appends one gzip member, which gzip
+        readers decompress as one continuous stream.
+        """
+        lines = b"".join(
+            json.dumps(
+                {"received": received, "body": body.decode("utf-8", "replace")},
+                separators=(",", ":"),
+            ).encode()
+            + b"\n"
+            for received, body in buffer
+        )
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if (
+                os.path.exists(self.path)
+                and os.path.getsize(self.path) >= self._max_bytes
+            ):
+                self._rotate()
+            with gzip.open(self.path, "ab") as file:
+                file.write(lines)
+        except OSError as err:
+            _LOGGER.error("Failed to write payload capture %s: %s", self.path, err)
+
+    def _rotate(self) -> None:
+        """Shift the capture files by one, dropping the oldest."""
+        for index in range(self._backup_count - 1, 0, -1):
+            source = self.rotated_path(index)
+            if os.path.exists(source):
+                os.replace(source, self.rotated_path(index + 1))
+        if self._backup_count:
+            os.replace(self.path, self.rotated_path(1))
+        else:
+            os.remove(self.path)
+
+    def rotated_path(self, index: int) -> str:
+        """Return the path of a rotated capture file, 1 being the newest."""
+        stem = CAPTURE_FILE_NAME.removesuffix(".ndjson.gz")
+        return os.path.join(self.directory, f"{stem}.{index}.ndjson.gz")
+
+
+def capture_files(directory: str, pattern: str) -> list[str]:
+    """Return the capture files matching a pattern, oldest first.
+
+    Does blocking I/O, so run it in the executor.
+    """
+    return sorted(
+        (
+            path
+            for path in glob.glob(os.path.join(glob.escape(directory), pattern))
+            if os.path.isfile(path)
+        ),
+        key=os.path.getmtime,
+    )
@@ -15,8 +15,21 @@ from homeassistant.config_entries import (
     OptionsFlow,
 )
 from homeassistant.core import callback
-
-from .const import DOMAIN, WEBHOOK_ID
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
+
+from .const import (
+    CONF_CALCULATED_SENSORS,
+    CONF_CAPTURE_PAYLOADS,
+    CONF_FAST_ACK,
+    CONF_QUEUE_SIZE,
+    DEFAULT_QUEUE_SIZE,
+    DOMAIN,
+    MAX_WRITE_INTERVAL,
+    WEBHOOK_ID,
+    WRITE_CLASS_OPTIONS,
+)
+from .derivation import build_derivations, get_calculated_sensors
+from .formula import FormulaError
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -68,12 +81,55 @@ class EredesSmartMeteringPlusOptionsFlow(OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Manage the options for the integration."""
+        errors: dict[str, str] = {}
+        placeholders: dict[str, str] = {}
+
+        if user_input is not None:
+            # Reject formulas that would not compile at setup
+            try:
+                build_derivations(get_calculated_sensors(user_input))
+            except FormulaError as err:
+                errors[CONF_CALCULATED_SENSORS] = "invalid_formula"
+                placeholders["formula_error"] = str(err)
+            else:
+                return self.async_create_entry(data=user_input)
+
         # Get the webhook URL using fixed webhook ID
         webhook_url = webhook.async_generate_url(self.hass, WEBHOOK_ID)
 
-        # Show the webhook URL as a menu with no options (only close button)
-        return self.async_show_menu(
+        options = user_input or self.config_entry.options
+        data_schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_FAST_ACK, default=options.get(CONF_FAST_ACK, False)
+                ): bool,
+                vol.Required(
+                    CONF_QUEUE_SIZE,
+                    default=options.get(CONF_QUEUE_SIZE, DEFAULT_QUEUE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100000)),
+                vol.Required(
+                    CONF_CAPTURE_PAYLOADS,
+                    default=options.get(CONF_CAPTURE_PAYLOADS, False),
+                ): bool,
+                **{
+                    vol.Required(option, default=options.get(option, 0)): vol.All(
+                        vol.Coerce(int), vol.Range(min=0, max=MAX_WRITE_INTERVAL)
+                    )
+                    for option in WRITE_CLASS_OPTIONS.values()
+                },
+                vol.Optional(
+                    CONF_CALCULATED_SENSORS,
+                    description={
+                        "suggested_value": options.get(CONF_CALCULATED_SENSORS)
+                    },
+                ): TextSelector(TextSelectorConfig(multiline=True)),
+            }
+        )
+
+        # Show the webhook URL alongside the ingest options
+        return self.async_show_form(
             step_id="init",
-            menu_options=[],  # Empty list = only close button
-            description_placeholders={"webhook_url": webhook_url},
+            data_schema=data_schema,
+            errors=errors,
+            description_placeholders={"webhook_url": webhook_url, **placeholders},
         )
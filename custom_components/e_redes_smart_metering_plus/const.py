@@ -10,6 +10,88 @@ WEBHOOK_ID = DOMAIN
 # Webhook constants
 WEBHOOK_PATH = f"/api/webhook/{WEBHOOK_ID}"
 
+# Maximum number of readings accepted in a single batched webhook request
+MAX_BATCH_SIZE = 1000
+
+# Newline-delimited JSON streaming (one reading per line)
+NDJSON_CONTENT_TYPES = frozenset(
+    {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+)
+NDJSON_MAX_LINE_BYTES = 16 * 1024  # A single reading is well under 1 KiB
+NDJSON_MAX_LINES = 10000
+
+# Options
+CONF_FAST_ACK = "fast_ack"
+CONF_QUEUE_SIZE = "queue_size"
+CONF_CALCULATED_SENSORS = "calculated_sensors"
+CONF_WRITE_INTERVAL_MEASUREMENT = "write_interval_measurement"
+CONF_WRITE_INTERVAL_COUNTER = "write_interval_counter"
+CONF_WRITE_INTERVAL_CALCULATED = "write_interval_calculated"
+CONF_CAPTURE_PAYLOADS = "capture_payloads"
+
+# Fast-ack mode: readings are queued and applied by a background worker
+DEFAULT_QUEUE_SIZE = 1000
+QUEUE_RETRY_AFTER = 5  # Seconds a sender should wait when the queue is full
+
+# State write throttling: minimum seconds between state writes per class
+WRITE_CLASS_MEASUREMENT = "measurement"  # Power and voltage readings
+WRITE_CLASS_COUNTER = "counter"  # total_increasing energy counters
+WRITE_CLASS_CALCULATED = "calculated"
+WRITE_CLASS_OPTIONS = {
+    WRITE_CLASS_MEASUREMENT: CONF_WRITE_INTERVAL_MEASUREMENT,
+    WRITE_CLASS_COUNTER: CONF_WRITE_INTERVAL_COUNTER,
+    WRITE_CLASS_CALCULATED: CONF_WRITE_INTERVAL_CALCULATED,
+}
+MAX_WRITE_INTERVAL = 3600
+
+# Deadbands: a new value within max(absolute, relative * |last|) of the last
+# written one is not written. Sensors may set their own "deadband"; others use
+# the default of their device class, or only skip unchanged values.
+DEADBAND_DEFAULTS: dict[str | None, dict[str, float]] = {
+    "power": {"absolute": 5.0, "relative": 0.005},  # W
+    "voltage": {"absolute": 0.5},  # V
+    "current": {"absolute": 0.05},  # A
+}
+DEFAULT_MAX_SILENCE = 300  # Seconds after which an unchanged value is rewritten
+
+# Recently applied (cpe, clock) pairs remembered to drop sender retries
+RECENT_READINGS_SIZE = 1024
+
+# Ingest stage latency histograms, timed with perf_counter_ns
+STAGE_DECODE = "decode"  # Reading and parsing the request body
+STAGE_ENSURE_DEVICE = "ensure_device"
+STAGE_ENSURE_ENTITIES = "ensure_entities"
+STAGE_DISPATCH = "dispatch"  # Fan-out to entities, including state writes
+STAGE_STATE_WRITE = "state_write"
+STAGE_READING = "reading"  # Applying one reading end to end
+LATENCY_BUCKETS_US = (
+    (50, 100, 250, 500)
+    + (1_000, 2_500, 5_000, 10_000, 25_000, 50_000)
+    + (100_000, 250_000, 500_000, 1_000_000)
+)
+THROUGHPUT_INTERVAL = 60  # Seconds between throughput samples
+LOG_SUMMARY_INTERVAL = 300  # Seconds between ingest summary log lines
+
+# Persisted snapshot of the latest readings, loaded at startup
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # Seconds; at most one save per delay while busy
+
+# Opt-in raw payload capture to size-rotated gzip NDJSON files
+CAPTURE_DIRECTORY = "e_redes_smart_metering_plus_capture"  # In the config dir
+CAPTURE_FILE_NAME = "payloads.ndjson.gz"
+CAPTURE_MAX_FILE_BYTES = 10 * 1024 * 1024  # Compressed size before rotating
+CAPTURE_BACKUP_COUNT = 5
+CAPTURE_BUFFER_SIZE = 2000  # Bodies held in memory between flushes
+CAPTURE_FLUSH_INTERVAL = 10  # Seconds between buffer flushes
+
+# Replay of captured payloads through the ingest path
+SERVICE_REPLAY = "replay"
+ATTR_FILES = "files"
+ATTR_SPEED = "speed"
+ATTR_REAPPLY = "reapply"
+DEFAULT_REPLAY_FILES = "*.ndjson.gz"
+REPLAY_CHUNK_LINES = 1000  # Capture lines read from disk at a time
+
 # Device info
 MANUFACTURER = "E-Redes"
 MODEL = "Smart Metering Plus"
@@ -74,7 +156,11 @@ SENSOR_MAPPING = {
     },
 }
 
-# Calculated sensors (not directly from webhook data)
+# Number entity keys that calculated sensor formulas may use
+NUMBER_ENTITY_KEYS = frozenset({"breaker_limit"})
+
+# Calculated sensors (not directly from webhook data), computed from a formula
+# over sensor keys and number entity keys
 CALCULATED_SENSORS = {
     "instantaneous_active_current_import": {
         "name": "Instantaneous Active Current Import",
@@ -84,6 +170,7 @@ CALCULATED_SENSORS = {
         "state_class": "measurement",
         "icon": "mdi:current-ac",
         "calculation": "power_voltage",  # Indicates calculation type
+        "formula": "round(instantaneous_active_power_import / voltage_l1, 2)",
         "source_sensors": ["instantaneous_active_power_import", "voltage_l1"],
     },
     "breaker_load": {
@@ -94,6 +181,10 @@ CALCULATED_SENSORS = {
         "state_class": "measurement",
         "icon": "mdi:gauge",
         "calculation": "current_breaker_limit",  # Indicates calculation type
+        "formula": (
+            "round(instantaneous_active_power_import / voltage_l1"
+            " / breaker_limit * 100)"
+        ),
         "source_sensors": ["instantaneous_active_power_import", "voltage_l1"],
         # Requires breaker limit number entity
         "requires_number_entity": "breaker_limit",
@@ -121,3 +212,115 @@ DIAGNOSTIC_SENSORS = {
         "enabled_by_default": False,
     },
 }
+
+# Ingest diagnostic sensors (one set per config entry), each reading an
+# attribute of a per-entry object; queue sensors only exist in fast-ack mode
+INGEST_SENSORS = {
+    "queue_depth": {
+        "name": "Ingest Queue Depth",
+        "key": "queue_depth",
+        "source": "queue",
+        "attribute": "depth",
+        "state_class": "measurement",
+        "icon": "mdi:tray-full",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+    "queue_dropped": {
+        "name": "Ingest Queue Dropped",
+        "key": "queue_dropped",
+        "source": "queue",
+        "attribute": "dropped",
+        "state_class": "total_increasing",
+        "icon": "mdi:tray-remove",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+    "suppressed_writes": {
+        "name": "Suppressed State Writes",
+        "key": "suppressed_writes",
+        "source": "write_stats",
+        "attribute": "suppressed",
+        "state_class": "total_increasing",
+        "icon": "mdi:content-save-off",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+    "filtered_writes": {
+        "name": "Filtered State Writes",
+        "key": "filtered_writes",
+        "source": "write_stats",
+        "attribute": "filtered",
+        "state_class": "total_increasing",
+        "icon": "mdi:filter-variant-remove",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+    "duplicate_readings": {
+        "name": "Duplicate Readings",
+        "key": "duplicate_readings",
+        "source": "reading_filter",
+        "attribute": "duplicates",
+        "state_class": "total_increasing",
+        "icon": "mdi:content-duplicate",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+    "stale_readings": {
+        "name": "Out-of-Order Readings",
+        "key": "stale_readings",
+        "source": "reading_filter",
+        "attribute": "stale",
+        "state_class": "total_increasing",
+        "icon": "mdi:clock-alert-outline",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+    "ingest_latency_p50": {
+        "name": "Ingest Latency P50",
+        "key": "ingest_latency_p50",
+        "source": "timings",
+        "percentile": 50,
+        "unit": "ms",
+        "device_class": "duration",
+        "state_class": "measurement",
+        "icon": "mdi:timer-outline",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+    "ingest_latency_p95": {
+        "name": "Ingest Latency P95",
+        "key": "ingest_latency_p95",
+        "source": "timings",
+        "percentile": 95,
+        "unit": "ms",
+        "device_class": "duration",
+        "state_class": "measurement",
+        "icon": "mdi:timer-outline",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+    "ingest_latency_p99": {
+        "name": "Ingest Latency P99",
+        "key": "ingest_latency_p99",
+        "source": "timings",
+        "percentile": 99,
+        "unit": "ms",
+        "device_class": "duration",
+        "state_class": "measurement",
+        "icon": "mdi:timer-outline",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+    "ingest_throughput": {
+        "name": "Ingest Throughput",
+        "key": "ingest_throughput",
+        "source": "timings",
+        "attribute": "throughput",
+        "unit": "readings/s",
+        "state_class": "measurement",
+        "icon": "mdi:speedometer",
+        "entity_category": EntityCategory.DIAGNOSTIC,
+        "enabled_by_default": False,
+    },
+}
@@ -0,0 +1,194 @@
+"""Per-CPE derivation engine for calculated E-Redes sensors."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from graphlib import CycleError, TopologicalSorter
+import logging
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import (
+    CALCULATED_SENSORS,
+    CONF_CALCULATED_SENSORS,
+    NUMBER_ENTITY_KEYS,
+    SENSOR_MAPPING,
+)
+from .formula import Formula, FormulaError, compile_formula, parse_custom_sensors
+from .reading import Reading, async_subscribe_reading
+from .runtime import async_get_runtime
+
+_LOGGER = logging.getLogger(__name__)
+
+# Sensor keys whose snapshot value must never decrease, like the sensors
+MONOTONIC_KEYS = frozenset(
+    sensor_config["key"]
+    for sensor_config in SENSOR_MAPPING.values()
+    if sensor_config["state_class"] == "total_increasing"
+)
+
+type DerivationTarget = Callable[[float | None, Reading | None], None]
+
+
+@dataclass(frozen=True, slots=True)
+class Derivation:
+    """A calculated sensor key, its inputs and its compiled formula."""
+
+    key: str
+    inputs: frozenset[str]
+    calculate: Formula
+
+
+def build_derivations(
+    calculated_sensors: Mapping[str, Mapping[str, Any]],
+) -> tuple[Derivation, ...]:
+    """Compile calculated sensor formulas in topological order of their inputs.
+
+    Raises FormulaError for an invalid formula or a dependency cycle.
+    """
+    derivations: dict[str, Derivation] = {}
+    for sensor_key, sensor_config in calculated_sensors.items():
+        formula = compile_formula(sensor_config["formula"])
+        derivations[sensor_key] = Derivation(sensor_key, formula.inputs, formula)
+
+    sorter = TopologicalSorter(
+        {
+            key: derivation.inputs & derivations.keys()
+            for key, derivation in derivations.items()
+        }
+    )
+    try:
+        return tuple(derivations[key] for key in sorter.static_order())
+    except CycleError as err:
+        raise FormulaError(f"Calculated sensors depend on each other: {err}") from err
+
+
+DERIVATIONS = build_derivations(CALCULATED_SENSORS)
+
+# Names a formula may use besides other calculated sensors
+FORMULA_SENSOR_KEYS = frozenset(
+    [*(config["key"] for config in SENSOR_MAPPING.values()), *CALCULATED_SENSORS]
+)
+
+
+def get_calculated_sensors(options: Mapping[str, Any]) -> dict[str, dict[str, Any]]:
+    """Return the built-in and user-defined calculated sensors of an entry.
+
+    Raises FormulaError if the user-defined sensors are not valid.
+    """
+    custom_sensors = parse_custom_sensors(
+        options.get(CONF_CALCULATED_SENSORS, ""),
+        FORMULA_SENSOR_KEYS,
+        NUMBER_ENTITY_KEYS,
+    )
+    return {**CALCULATED_SENSORS, **custom_sensors}
+
+
+class DerivationEngine:
+    """Evaluate the calculated sensors of one CPE once per reading.
+
+    The engine keeps a snapshot of the latest raw values of the CPE and the
+    inputs set by other entities (the breaker limit), runs every derivation
+    affected by a change in topological order, and then notifies each
+    subscribed entity once with its new value.
+    """
+
+    def __init__(
+        self,
+        cpe: str,
+        derivations: tuple[Derivation, ...],
+        snapshot: dict[str, float] | None = None,
+    ) -> None:
+        """Initialize the engine."""
+        self._cpe = cpe
+        self._derivations = derivations
+        self.snapshot: dict[str, float] = {} if snapshot is None else snapshot
+        self.values: dict[str, float | None] = {}
+        self._targets: dict[str, list[DerivationTarget]] = {}
+
+    @callback
+    def async_subscribe(self, key: str, target: DerivationTarget) -> CALLBACK_TYPE:
+        """Subscribe a target to the value of a derived key."""
+        self._targets.setdefault(key, []).append(target)
+
+        @callback
+        def _async_unsubscribe() -> None:
+            self._targets[key].remove(target)
+            if not self._targets[key]:
+                del self._targets[key]
+
+        return _async_unsubscribe
+
+    @callback
+    def async_handle_reading(self, reading: Reading) -> None:
+        """Apply a reading to the snapshot and re-derive what it affects."""
+        changed: set[str] = set()
+        snapshot = self.snapshot
+        for key, value in reading.values.items():
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                continue
+            if key in MONOTONIC_KEYS and number < snapshot.get(key, number):
+                continue
+            snapshot[key] = number
+            changed.add(key)
+
+        if changed:
+            self._async_evaluate(changed, reading)
+
+    @callback
+    def async_set_input(self, key: str, value: float | None) -> None:
+        """Set an input owned by another entity and re-derive its dependents."""
+        if value is None:
+            self.snapshot.pop(key, None)
+        else:
+            self.snapshot[key] = float(value)
+        self._async_evaluate({key}, None)
+
+    @callback
+    def _async_evaluate(self, changed: set[str], reading: Reading | None) -> None:
+        """Run the derivations affected by the changed keys, then notify."""
+        updated: list[str] = []
+        for derivation in self._derivations:
+            if derivation.inputs.isdisjoint(changed):
+                continue
+            value = derivation.calculate(self.snapshot)
+            self.values[derivation.key] = value
+            if value is None:
+                self.snapshot.pop(derivation.key, None)
+            else:
+                self.snapshot[derivation.key] = value
+            changed.add(derivation.key)
+            updated.append(derivation.key)
+
+        for key in updated:
+            for target in self._targets.get(key, ()):
+                target(self.values[key], reading)
+
+        if updated and _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Derived %s for CPE %s", ", ".join(updated), self._cpe)
+
+
+@callback
+def async_get_engine(
+    hass: HomeAssistant, config_entry_id: str, cpe: str
+) -> DerivationEngine:
+    """Return the derivation engine of a CPE, creating it on first use.
+
+    A new engine is fed every reading of its CPE until the entry unloads.
+    """
+    runtime = async_get_runtime(hass, config_entry_id)
+    cpe_runtime = runtime.async_get_cpe(cpe)
+    if (engine := cpe_runtime.engine) is None:
+        engine = cpe_runtime.engine = DerivationEngine(
+            cpe, runtime.derivations, cpe_runtime.values
+        )
+        unsub = async_subscribe_reading(
+            hass, config_entry_id, cpe, engine.async_handle_reading
+        )
+        if entry := hass.config_entries.async_get_entry(config_entry_id):
+            entry.async_on_unload(unsub)
+    return engine
@@ -0,0 +1,141 @@
+"""Diagnostics support for E-Redes Smart Metering Plus."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from .const import DOMAIN
+from .runtime import CpeRuntime, EntryRuntime, EredesSmartMeteringPlusConfigEntry
+
+TO_REDACT = {CONF_WEBHOOK_ID, "webhook_url"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    runtime = entry.runtime_data
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "ingest": _ingest_diagnostics(runtime),
+        "cpes": {
+            redact_cpe(cpe): _cpe_diagnostics(hass, cpe_runtime)
+            for cpe, cpe_runtime in runtime.cpes.items()
+        },
+    }
+
+
+async def async_get_device_diagnostics(
+    hass: HomeAssistant,
+    entry: EredesSmartMeteringPlusConfigEntry,
+    device: dr.DeviceEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a meter device, or for the service device."""
+    runtime = entry.runtime_data
+    if device.entry_type is dr.DeviceEntryType.SERVICE:
+        return {"ingest": _ingest_diagnostics(runtime)}
+    cpe = next(
+        (identifier for domain, identifier in device.identifiers if domain == DOMAIN),
+        None,
+    )
+    if cpe is None or (cpe_runtime := runtime.cpes.get(cpe)) is None:
+        return {"cpe": None if cpe is None else redact_cpe(cpe)}
+    return {
+        "cpe": redact_cpe(cpe),
+        **_cpe_diagnostics(hass, cpe_runtime),
+    }
+
+
+def redact_cpe(cpe: str) -> str:
+    """Mask a CPE, keeping its first and last four characters."""
+    if len(cpe) <= 8:
+        return "**REDACTED**"
+    return f"{cpe[:4]}{'*' * (len(cpe) - 8)}{cpe[-4:]}"
+
+
+def _ingest_diagnostics(runtime: EntryRuntime) -> dict[str, Any]:
+    """Return the entry-wide ingest counters and stage latencies."""
+    queue = runtime.queue
+    capture = runtime.capture
+    write_stats = runtime.write_stats
+    return {
+        "readings": runtime.timings.readings,
+        "throughput": runtime.timings.throughput,
+        "rejected": runtime.timings.rejected,
+        "duplicates": runtime.reading_filter.duplicates,
+        "stale": runtime.reading_filter.stale,
+        "queue": (
+            None
+            if queue is None
+            else {
+                "depth": queue.depth,
+                "maxsize": queue.maxsize,
+                "enqueued": queue.enqueued,
+                "coalesced": queue.coalesced,
+                "dropped": queue.dropped,
+                "processed": queue.processed,
+                "failed": queue.failed,
+            }
+        ),
+        "capture": (
+            None
+            if capture is None
+            else {"captured": capture.captured, "dropped": capture.dropped}
+        ),
+        "writes": {
+            "min_intervals": write_stats.min_intervals,
+            "written": write_stats.written,
+            "suppressed": write_stats.suppressed_by_class,
+            "filtered": write_stats.filtered_by_class,
+        },
+        "stages": {
+            stage: histogram.as_dict()
+            for stage, histogram in runtime.timings.stages.items()
+        },
+    }
+
+
+def _cpe_diagnostics(hass: HomeAssistant, cpe_runtime: CpeRuntime) -> dict[str, Any]:
+    """Return the counters, clock and entities of one meter."""
+    return {
+        "readings": cpe_runtime.readings,
+        "duplicates": cpe_runtime.duplicates,
+        "stale": cpe_runtime.stale,
+        "rejected": cpe_runtime.rejected,
+        "failed": cpe_runtime.failed,
+        "last_clock": (
+            None if cpe_runtime.clock is None else cpe_runtime.clock.isoformat()
+        ),
+        "last_arrival": (
+            None
+            if cpe_runtime.arrival is None
+            else datetime.fromtimestamp(cpe_runtime.arrival, UTC).isoformat()
+        ),
+        "clock_skew_s": (
+            None if cpe_runtime.skew is None else round(cpe_runtime.skew, 3)
+        ),
+        "entities": {
+            "sensors": len(cpe_runtime.sensors),
+            "breaker_limit": cpe_runtime.breaker_limit is not None,
+            "breaker_overload": cpe_runtime.breaker_overload is not None,
+            "registered": (
+                0
+                if cpe_runtime.device_id is None
+                else len(
+                    er.async_entries_for_device(
+                        er.async_get(hass), cpe_runtime.device_id
+                    )
+                )
+            ),
+        },
+        "values": len(cpe_runtime.values),
+    }
@@ -0,0 +1,181 @@
+"""Safe arithmetic formulas for E-Redes calculated sensors.
+
+Formulas are small arithmetic expressions over sensor keys and number entity
+keys, for example ``instantaneous_active_power_import / voltage_l1``. They are
+parsed once, checked against a whitelist of syntax, and compiled into nested
+closures, so evaluating one per reading costs no parsing or interpretation.
+"""
+
+from __future__ import annotations
+
+import ast
+from collections.abc import Callable, Collection, Mapping
+import operator
+import re
+from typing import Any
+
+from homeassistant.util import slugify
+
+type _Node = Callable[[Mapping[str, float]], float]
+
+_BINARY_OPERATORS: dict[type[ast.operator], Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+}
+
+_UNARY_OPERATORS: dict[type[ast.unaryop], Callable[[Any], Any]] = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_FUNCTIONS: dict[str, Callable[..., Any]] = {
+    "abs": abs,
+    "max": max,
+    "min": min,
+    "round": round,
+}
+
+MAX_FORMULA_LENGTH = 500
+
+# "Name (unit) = formula", the unit being optional
+_CUSTOM_SENSOR_LINE = re.compile(
+    r"^\s*(?P<name>[^=()]+?)\s*(?:\((?P<unit>[^()]*)\))?\s*=\s*(?P<formula>.+?)\s*$"
+)
+
+
+class FormulaError(ValueError):
+    """Raised when a formula is not valid."""
+
+
+class Formula:
+    """A compiled formula, callable with a mapping of input values.
+
+    Returns None when an input is missing or the result is undefined, such as
+    a division by zero.
+    """
+
+    __slots__ = ("_evaluate", "expression", "inputs")
+
+    def __init__(self, expression: str, inputs: frozenset[str], evaluate: _Node):
+        """Initialize the formula."""
+        self.expression = expression
+        self.inputs = inputs
+        self._evaluate = evaluate
+
+    def __call__(self, values: Mapping[str, float]) -> float | None:
+        """Evaluate the formula."""
+        try:
+            return self._evaluate(values)
+        except (KeyError, ArithmeticError, TypeError, ValueError):
+            return None
+
+    def __repr__(self) -> str:
+        """Return the formula's expression."""
+        return f"Formula({self.expression!r})"
+
+
+def compile_formula(expression: str, names: Collection[str] | None = None) -> Formula:
+    """Parse and compile a formula, optionally restricting its input names."""
+    if len(expression) > MAX_FORMULA_LENGTH:
+        raise FormulaError(f"Formula longer than {MAX_FORMULA_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as err:
+        raise FormulaError(f"Invalid formula {expression!r}: {err.msg}") from err
+
+    inputs: set[str] = set()
+    evaluate = _compile_node(tree.body, inputs)
+
+    if names is not None and (unknown := inputs.difference(names)):
+        raise FormulaError(f"Unknown names in formula: {', '.join(sorted(unknown))}")
+    return Formula(expression, frozenset(inputs), evaluate)
+
+
+def _compile_node(node: ast.expr, inputs: set[str]) -> _Node:
+    """Compile one whitelisted syntax node into a closure."""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            raise FormulaError(f"Unsupported constant: {value!r}")
+        return lambda values: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        inputs.add(name)
+        return lambda values: values[name]
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        binary = _BINARY_OPERATORS[type(node.op)]
+        left = _compile_node(node.left, inputs)
+        right = _compile_node(node.right, inputs)
+        return lambda values: binary(left(values), right(values))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        unary = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, inputs)
+        return lambda values: unary(operand(values))
+
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS
+        and not node.keywords
+        and node.args
+    ):
+        function = _FUNCTIONS[node.func.id]
+        args = tuple(_compile_node(arg, inputs) for arg in node.args)
+        return lambda values: function(*(arg(values) for arg in args))
+
+    raise FormulaError(f"Unsupported syntax in formula: {ast.unparse(node)}")
+
+
+def parse_custom_sensors(
+    text: str, sensor_keys: Collection[str], number_keys: Collection[str]
+) -> dict[str, dict[str, Any]]:
+    """Parse user-defined calculated sensors, one ``Name (unit) = formula`` per line.
+
+    Formulas may use sensor keys, number entity keys and the keys of the
+    sensors defined on earlier lines. Returns calculated sensor configs keyed
+    by sensor key.
+    """
+    sensors: dict[str, dict[str, Any]] = {}
+    known = {*sensor_keys, *number_keys}
+
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if (match := _CUSTOM_SENSOR_LINE.match(line)) is None:
+            raise FormulaError(f"Line {line_number}: expected 'Name (unit) = formula'")
+
+        name = match["name"].strip()
+        key = f"custom_{slugify(name)}"
+        if key in sensors:
+            raise FormulaError(f"Line {line_number}: duplicate sensor {name!r}")
+        try:
+            formula = compile_formula(match["formula"], known)
+        except FormulaError as err:
+            raise FormulaError(f"Line {line_number}: {err}") from err
+        # Only readings trigger a derivation, so a constant would never update
+        if not formula.inputs:
+            raise FormulaError(
+                f"Line {line_number}: formula of {name!r} uses no sensor or number"
+            )
+
+        sensors[key] = {
+            "name": name,
+            "key": key,
+            "unit": (match["unit"] or "").strip() or None,
+            "state_class": "measurement",
+            "icon": "mdi:function-variant",
+            "formula": match["formula"],
+            "source_sensors": sorted(formula.inputs.difference(number_keys)),
+        }
+        if number_inputs := formula.inputs.intersection(number_keys):
+            sensors[key]["requires_number_entity"] = min(number_inputs)
+        known.add(key)
+
+    return sensors
@@ -0,0 +1,135 @@
+"""Background ingest queue for E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+
+from .const import SENSOR_MAPPING
+from .reading import parse_clock, resolve_clock
+
+_LOGGER = logging.getLogger(__name__)
+
+# Counters that must never lose a value when readings are coalesced
+MONOTONIC_FIELDS = tuple(
+    field_name
+    for field_name, sensor_config in SENSOR_MAPPING.items()
+    if sensor_config["state_class"] == "total_increasing"
+)
+
+
+def merge_readings(pending: dict[str, Any], data: dict[str, Any]) -> dict[str, Any]:
+    """Coalesce two readings for the same CPE into one.
+
+    The newest reading by ``clock`` wins for every field it carries, fields it
+    lacks are kept from the older one, and ``total_increasing`` counters keep
+    the highest value seen so no energy is lost. When either clock is missing
+    or invalid the later arrival wins, as the reading filter would apply it.
+    """
+    pending_clock = resolve_clock(parse_clock(pending.get("clock")), None)
+    clock = resolve_clock(parse_clock(data.get("clock")), pending_clock)
+    if pending_clock is not None and clock is not None and clock < pending_clock:
+        older, newer = data, pending
+    else:
+        older, newer = pending, data
+
+    merged = {**older, **newer}
+    for field_name in MONOTONIC_FIELDS:
+        values = [
+            reading[field_name]
+            for reading in (older, newer)
+            if isinstance(reading.get(field_name), int | float)
+        ]
+        if values:
+            merged[field_name] = max(values)
+    return merged
+
+
+class ReadingQueue:
+    """Bounded per-entry queue of readings drained by a background worker.
+
+    Used in fast-ack mode: the webhook only validates and enqueues a reading,
+    and the worker applies it to devices and entities afterwards.
+
+    The queue holds CPEs rather than readings, so its size bounds the meters
+    waiting to be applied. While a CPE is waiting, newer
+    readings for it are coalesced into its pending reading, so the work per
+    CPE stays bounded however bursty the input is.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        maxsize: int,
+        process: Callable[[dict[str, Any]], Awaitable[None]],
+    ) -> None:
+        """Initialize the queue."""
+        self._hass = hass
+        self._entry = entry
+        self._process = process
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self._pending: dict[str, dict[str, Any]] = {}
+        self.maxsize = maxsize
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.processed = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        """Return the number of CPEs with a reading waiting to be processed."""
+        return self._queue.qsize()
+
+    @callback
+    def async_start(self) -> None:
+        """Start the worker draining the queue."""
+        self._entry.async_create_background_task(
+            self._hass, self._async_worker(), f"{self._entry.domain} ingest worker"
+        )
+
+    @callback
+    def async_put(self, data: dict[str, Any]) -> bool:
+        """Enqueue a reading, returning False if the queue is full."""
+        cpe = data["cpe"]
+
+        # Coalesce into the reading already waiting for this CPE
+        if (pending := self._pending.get(cpe)) is not None:
+            self._pending[cpe] = merge_readings(pending, data)
+            self.coalesced += 1
+            return True
+
+        try:
+            self._queue.put_nowait(cpe)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+        self._pending[cpe] = data
+        self.enqueued += 1
+        return True
+
+    async def async_join(self) -> None:
+        """Wait until every queued reading has been processed."""
+        await self._queue.join()
+
+    async def _async_worker(self) -> None:
+        """Process queued readings until the config entry is unloaded."""
+        while True:
+            cpe = await self._queue.get()
+            data = self._pending.pop(cpe)
+            try:
+                await self._process(data)
+            except Exception:
+                self.failed += 1
+                _LOGGER.exception("Error processing queued reading for CPE: %s", cpe)
+            else:
+                self.processed += 1
+            finally:
+                self._queue.task_done()
@@ -6,16 +6,15 @@ import logging
 from typing import Any
 
 from homeassistant.components.number import NumberEntity, NumberMode
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import EntityCategory
+from homeassistant.const import EntityCategory, Platform
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 from homeassistant.helpers.restore_state import RestoreEntity
 
-from .const import DOMAIN, MANUFACTURER, MODEL
+from .const import DOMAIN
+from .derivation import async_get_engine
+from .runtime import EredesSmartMeteringPlusConfigEntry, async_get_runtime
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,16 +23,12 @@ DEFAULT_BREAKER_LIMIT = 20  # Default breaker limit in amps
 
 async def async_setup_entry(
     hass: HomeAssistant,
-    config_entry: ConfigEntry,
+    config_entry: EredesSmartMeteringPlusConfigEntry,
     async_add_entities: AddConfigEntryEntitiesCallback,
 ) -> None:
     """Set up E-Redes Smart Metering Plus number entities from config entry."""
     # Store the add_entities callback for later use when devices are discovered
-    if "number_add_entities" not in hass.data[DOMAIN][config_entry.entry_id]:
-        hass.data[DOMAIN][config_entry.entry_id][
-            "number_add_entities"
-        ] = async_add_entities
-        hass.data[DOMAIN][config_entry.entry_id]["number_entities"] = {}
+    config_entry.runtime_data.add_entities[Platform.NUMBER] = async_add_entities
 
     # Restore existing entities from entity registry
     await async_restore_existing_number_entities(hass, config_entry, async_add_entities)
@@ -41,47 +36,25 @@ async def async_setup_entry(
 
 async def async_restore_existing_number_entities(
     hass: HomeAssistant,
-    config_entry: ConfigEntry,
+    config_entry: EredesSmartMeteringPlusConfigEntry,
     async_add_entities: AddConfigEntryEntitiesCallback,
 ) -> None:
-    """Restore existing number entities from entity registry."""
-    entity_registry = er.async_get(hass)
+    """Restore existing number entities from the entry's restore index."""
+    runtime = config_entry.runtime_data
     entities_to_restore = []
 
-    # Find all number entities for this integration
-    for entity_entry in entity_registry.entities.values():
-        if not (
-            entity_entry.config_entry_id == config_entry.entry_id
-            and entity_entry.domain == "number"
-            and entity_entry.platform == DOMAIN
-        ):
-            continue
-
-        # Parse the unique_id to extract CPE
-        unique_id = entity_entry.unique_id
-        if not unique_id.startswith(f"{DOMAIN}_"):
-            continue
-
-        # Format: e_redes_smart_metering_plus_CPE_breaker_limit
-        # Remove the domain prefix and _breaker_limit suffix
-        remainder = unique_id[len(f"{DOMAIN}_") :]
-        if not remainder.endswith("_breaker_limit"):
-            continue
-
-        cpe = remainder[: -len("_breaker_limit")]
-
-        _LOGGER.debug(
-            "Restoring breaker limit number entity: %s for CPE: %s",
-            entity_entry.entity_id,
-            cpe,
-        )
+    for cpe, _key, _config in runtime.restore_index.pop(Platform.NUMBER, ()):
+        _LOGGER.debug("Restoring breaker limit number entity for CPE: %s", cpe)
 
         # Create number entity
-        entity = ERedisBreakerLimitNumber(cpe, config_entry.entry_id)
+        cpe_runtime = runtime.async_get_cpe(cpe)
+        entity = ERedisBreakerLimitNumber(
+            cpe, config_entry.entry_id, cpe_runtime.device_info
+        )
         entities_to_restore.append(entity)
 
         # Store reference
-        hass.data[DOMAIN][config_entry.entry_id]["number_entities"][cpe] = entity
+        cpe_runtime.breaker_limit = entity
 
     if entities_to_restore:
         async_add_entities(entities_to_restore)
@@ -100,11 +73,13 @@ def async_create_breaker_limit_entity(
 ) -> None:
     """Create a breaker limit number entity for a CPE device."""
     # Check if entity already exists
-    if cpe in hass.data[DOMAIN][config_entry_id].get("number_entities", {}):
+    runtime = async_get_runtime(hass, config_entry_id)
+    cpe_runtime = runtime.async_get_cpe(cpe)
+    if cpe_runtime.breaker_limit is not None:
         return
 
     # Get the add_entities callback
-    add_entities = hass.data[DOMAIN][config_entry_id].get("number_add_entities")
+    add_entities = runtime.add_entities.get(Platform.NUMBER)
     if not add_entities:
         _LOGGER.warning(
             "Cannot create breaker limit entity for %s: add_entities not available", cpe
@@ -112,13 +87,13 @@ def async_create_breaker_limit_entity(
         return
 
     # Create the entity
-    entity = ERedisBreakerLimitNumber(cpe, config_entry_id)
+    entity = ERedisBreakerLimitNumber(cpe, config_entry_id, cpe_runtime.device_info)
 
     # Add it to Home Assistant
     add_entities([entity])
 
     # Store reference
-    hass.data[DOMAIN][config_entry_id]["number_entities"][cpe] = entity
+    cpe_runtime.breaker_limit = entity
 
     _LOGGER.info("Created breaker limit number entity for CPE: %s", cpe)
 
@@ -140,27 +115,17 @@ class ERedisBreakerLimitNumber(NumberEntity, RestoreEntity):
         self,
         cpe: str,
         config_entry_id: str,
+        device_info: DeviceInfo,
     ) -> None:
         """Initialize the breaker limit number entity."""
         self._cpe = cpe
         self._config_entry_id = config_entry_id
         self._attr_unique_id = f"{DOMAIN}_{cpe}_breaker_limit"
+        self._attr_device_info = device_info
         self._attr_name = "Breaker limit"
         self._attr_should_poll = False
         self._native_value: float = DEFAULT_BREAKER_LIMIT
 
-    @property  # type: ignore[misc]
-    def device_info(self) -> DeviceInfo:
-        """Return device information."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._cpe)},
-            name=f"E-Redes Smart Meter ({self._cpe})",
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-            serial_number=self._cpe,
-            suggested_area="Energy",
-        )
-
     @property  # type: ignore[override]
     def native_value(self) -> float:
         """Return the current value."""
@@ -202,17 +167,20 @@ class ERedisBreakerLimitNumber(NumberEntity, RestoreEntity):
         # Write the state immediately to ensure it's persisted
         self.async_write_ha_state()
 
+        # Feed the breaker limit to the CPE's derivation engine
+        async_get_engine(self.hass, self._config_entry_id, self._cpe).async_set_input(
+            "breaker_limit", self._native_value
+        )
+
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
         self._native_value = value
         self.async_write_ha_state()
         _LOGGER.info("Breaker limit for %s set to: %s A", self._cpe, value)
 
-        # Notify calculated sensors that depend on breaker limit
-        async_dispatcher_send(
-            self.hass,
-            f"{DOMAIN}_{self._cpe}_breaker_limit_update",
-            value,
+        # Re-derive the sensors that depend on the breaker limit
+        async_get_engine(self.hass, self._config_entry_id, self._cpe).async_set_input(
+            "breaker_limit", value
         )
 
     @property
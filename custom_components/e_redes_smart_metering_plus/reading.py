@@ -0,0 +1,238 @@
+"""Parsed readings and per-CPE reading routing for E-Redes Smart Metering Plus."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
+from functools import lru_cache
+import logging
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, RECENT_READINGS_SIZE, SENSOR_MAPPING
+from .runtime import CpeRuntime, async_get_runtime
+
+_LOGGER = logging.getLogger(__name__)
+
+# Dispatched once per applied reading, formatted with the CPE
+SIGNAL_READING = f"{DOMAIN}_{{}}_reading"
+
+# Webhook field name -> sensor key, resolved once instead of per field
+FIELD_TO_SENSOR_KEY = {
+    field_name: sensor_config["key"]
+    for field_name, sensor_config in SENSOR_MAPPING.items()
+}
+
+# Distinct clock strings kept parsed; a batch or a burst shares a handful
+CLOCK_CACHE_SIZE = 128
+
+type ReadingTarget = Callable[[Reading], None]
+
+
+def parse_clock(clock: Any) -> datetime | None:
+    """Parse a reading clock into an aware datetime.
+
+    E-Redes sends the meter's local time without an offset, so naive clocks
+    are placed in the Home Assistant time zone. Returns None when the clock
+    is missing or invalid.
+    """
+    if not isinstance(clock, str):
+        return None
+    return _parse_clock(clock, dt_util.get_default_time_zone())
+
+
+def resolve_clock(
+    clock: datetime | None, last_clock: datetime | None
+) -> datetime | None:
+    """Return a parsed reading clock in UTC, relative to the meter's last clock.
+
+    Naive clocks in the hour repeated when daylight saving time ends are
+    ambiguous, and parse as their first occurrence. When that would not be
+    newer than the last clock but the second occurrence is, the reading is
+    from the repeated hour. Comparing UTC clocks keeps the offset in the
+    comparison, which datetimes sharing a time zone ignore.
+    """
+    if clock is None:
+        return None
+    utc_clock = dt_util.as_utc(clock)
+    if last_clock is not None and not clock.fold and utc_clock <= last_clock:
+        repeated = dt_util.as_utc(clock.replace(fold=1))
+        if repeated >= last_clock:
+            return repeated
+    return utc_clock
+
+
+@lru_cache(maxsize=CLOCK_CACHE_SIZE)
+def _parse_clock(clock: str, time_zone: tzinfo) -> datetime | None:
+    """Parse a clock string, cached per string and time zone."""
+    try:
+        parsed = datetime.fromisoformat(clock)
+    except ValueError:
+        _LOGGER.debug("Ignoring invalid reading clock: %s", clock)
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=time_zone)
+    return parsed
+
+
+@dataclass(slots=True)
+class Reading:
+    """A webhook reading for one CPE with values keyed by sensor key."""
+
+    cpe: str
+    values: dict[str, Any]
+    clock: datetime | None = None
+
+    @classmethod
+    def from_data(
+        cls, cpe: str, data: dict[str, Any], clock: datetime | None = None
+    ) -> Reading:
+        """Build a reading from a raw webhook payload and its parsed clock."""
+        values: dict[str, Any] = {}
+        for field_name, field_value in data.items():
+            if (sensor_key := FIELD_TO_SENSOR_KEY.get(field_name)) is not None:
+                values[sensor_key] = field_value
+        return cls(cpe, values, clock)
+
+
+class ReadingFilter:
+    """Drop duplicate and out-of-order readings by their meter clock.
+
+    A reading is a duplicate when its ``(cpe, clock)`` was applied recently or
+    its clock equals the meter's last applied clock, and stale when its clock
+    is older. Readings without a clock are always applied. Clocks are
+    compared in UTC, as returned by ``resolve_clock``.
+
+    Checking and recording are separate steps, so a reading that fails to
+    apply is not recorded and the sender's retry is applied instead.
+    """
+
+    def __init__(self, maxsize: int = RECENT_READINGS_SIZE) -> None:
+        """Initialize the filter."""
+        self._recent: OrderedDict[tuple[str, datetime], None] = OrderedDict()
+        self._maxsize = maxsize
+        self.duplicates = 0
+        self.stale = 0
+
+    @callback
+    def async_check(self, cpe_runtime: CpeRuntime, clock: datetime | None) -> bool:
+        """Return True if a reading should be applied, counting it otherwise."""
+        if clock is None:
+            return True
+
+        last_clock = cpe_runtime.clock
+        if (cpe_runtime.cpe, clock) in self._recent or clock == last_clock:
+            self.duplicates += 1
+            cpe_runtime.duplicates += 1
+            return False
+        if last_clock is not None and clock < last_clock:
+            self.stale += 1
+            cpe_runtime.stale += 1
+            return False
+        return True
+
+    @callback
+    def async_record(self, cpe_runtime: CpeRuntime, clock: datetime | None) -> None:
+        """Record the clock of a reading that was applied."""
+        if clock is None:
+            return
+
+        if cpe_runtime.clock is None or clock > cpe_runtime.clock:
+            cpe_runtime.clock = clock
+        self._recent[(cpe_runtime.cpe, clock)] = None
+        if len(self._recent) > self._maxsize:
+            self._recent.popitem(last=False)
+
+
+class ReadingRouter:
+    """Per-CPE subscriber table fed by a single reading dispatcher signal.
+
+    Field targets are called for the sensor keys a reading carries. Derived
+    targets (calculated and diagnostic sensors) run afterwards, at most once
+    per reading, so they always see the freshly updated source values.
+    """
+
+    def __init__(self, hass: HomeAssistant, cpe: str) -> None:
+        """Initialize the router."""
+        self._hass = hass
+        self._cpe = cpe
+        self._field_targets: dict[str, list[ReadingTarget]] = {}
+        self._derived_targets: list[tuple[frozenset[str] | None, ReadingTarget]] = []
+        self._unsub_dispatcher: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_subscribe(
+        self,
+        target: ReadingTarget,
+        keys: Iterable[str] | None = None,
+        derived: bool = False,
+    ) -> CALLBACK_TYPE:
+        """Subscribe a target to readings carrying any of the given keys.
+
+        ``keys=None`` subscribes a derived target to every reading.
+        """
+        keys = None if keys is None else tuple(keys)
+        if derived or keys is None:
+            subscription = (None if keys is None else frozenset(keys), target)
+            self._derived_targets.append(subscription)
+        else:
+            for key in keys:
+                self._field_targets.setdefault(key, []).append(target)
+
+        if self._unsub_dispatcher is None:
+            self._unsub_dispatcher = async_dispatcher_connect(
+                self._hass, SIGNAL_READING.format(self._cpe), self._async_route
+            )
+
+        @callback
+        def _async_unsubscribe() -> None:
+            if derived or keys is None:
+                self._derived_targets.remove(subscription)
+            else:
+                for key in keys:
+                    self._field_targets[key].remove(target)
+                    if not self._field_targets[key]:
+                        del self._field_targets[key]
+
+            if (
+                not self._field_targets
+                and not self._derived_targets
+                and self._unsub_dispatcher is not None
+            ):
+                self._unsub_dispatcher()
+                self._unsub_dispatcher = None
+
+        return _async_unsubscribe
+
+    @callback
+    def _async_route(self, reading: Reading) -> None:
+        """Route a reading to the targets that need its fields."""
+        values = reading.values
+        for key in values:
+            for target in self._field_targets.get(key, ()):
+                target(reading)
+
+        for keys, target in self._derived_targets:
+            if keys is None or not keys.isdisjoint(values):
+                target(reading)
+
+
+@callback
+def async_subscribe_reading(
+    hass: HomeAssistant,
+    config_entry_id: str,
+    cpe: str,
+    target: ReadingTarget,
+    keys: Iterable[str] | None = None,
+    derived: bool = False,
+) -> CALLBACK_TYPE:
+    """Subscribe an entity callback to the readings of a CPE."""
+    cpe_runtime = async_get_runtime(hass, config_entry_id).async_get_cpe(cpe)
+    if (router := cpe_runtime.router) is None:
+        router = cpe_runtime.router = ReadingRouter(hass, cpe)
+    return router.async_subscribe(target, keys, derived)
@@ -0,0 +1,150 @@
+"""Replay of captured webhook payloads for E-Redes Smart Metering Plus."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+import gzip
+from itertools import islice
+import json
+import logging
+import time
+from typing import IO, Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import REPLAY_CHUNK_LINES, STAGE_DECODE
+from .runtime import EredesSmartMeteringPlusConfigEntry
+from .webhook import async_handle_payload
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_replay(
+    hass: HomeAssistant,
+    entry: EredesSmartMeteringPlusConfigEntry,
+    paths: list[str],
+    speed: float = 0.0,
+    reapply: bool = False,
+) -> dict[str, Any]:
+    """Feed captured bodies through the webhook's ingest path.
+
+    ``speed`` scales the captured arrival times: 1 replays at the original
+    pace, 10 ten times faster, and 0 as fast as possible. Readings the
+    instance has already seen are dropped by the reading filter, unless
+    ``reapply`` is set; live readings arriving meanwhile are filtered as
+    usual. Returns the throughput, the filtered readings and the
+    latency of every stage during the replay.
+    """
+    runtime = entry.runtime_data
+    timings = runtime.timings
+    reading_filter = runtime.reading_filter
+    before = {stage: histogram.copy() for stage, histogram in timings.stages.items()}
+    duplicates, stale = reading_filter.duplicates, reading_filter.stale
+    requests = rejected = 0
+    first_received: float | None = None
+    started = time.monotonic()
+
+    for path in paths:
+        async for received, body in _async_read_capture(hass, path):
+            if speed > 0:
+                if first_received is None:
+                    first_received = received
+                delay = (received - first_received) / speed - (
+                    time.monotonic() - started
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            requests += 1
+            if not await _async_replay_body(hass, entry, body, reapply):
+                rejected += 1
+
+    # In fast-ack mode the readings are only queued so far
+    if runtime.queue is not None:
+        await runtime.queue.async_join()
+
+    duration = time.monotonic() - started
+    result = {
+        "files": len(paths),
+        "requests": requests,
+        "rejected": rejected,
+        "duplicates": reading_filter.duplicates - duplicates,
+        "stale": reading_filter.stale - stale,
+        "duration_s": round(duration, 3),
+        "requests_per_s": round(requests / duration, 1) if duration else None,
+        "stages": {
+            stage: histogram.since(before[stage]).as_dict()
+            for stage, histogram in timings.stages.items()
+        },
+    }
+    _LOGGER.info(
+        "Replayed %d payloads from %d files in %.1f s (%d rejected)",
+        requests,
+        len(paths),
+        duration,
+        rejected,
+    )
+    return result
+
+
+async def _async_replay_body(
+    hass: HomeAssistant,
+    entry: EredesSmartMeteringPlusConfigEntry,
+    body: str,
+    reapply: bool,
+) -> bool:
+    """Decode and apply one captured body, returning False if it was rejected."""
+    start = time.perf_counter_ns()
+    try:
+        data = json.loads(body)
+    except ValueError:
+        _LOGGER.debug("Skipping captured body that is not JSON: %s", body)
+        return False
+    entry.runtime_data.timings.stages[STAGE_DECODE].record(
+        time.perf_counter_ns() - start
+    )
+
+    try:
+        response = await async_handle_payload(hass, entry, data, reapply)
+    except Exception:
+        _LOGGER.exception("Error replaying captured body")
+        return False
+    return response.status == 200
+
+
+async def _async_read_capture(
+    hass: HomeAssistant, path: str
+) -> AsyncIterator[tuple[float, str]]:
+    """Yield the ``(received, body)`` records of a capture file.
+
+    The file is read in the executor, a chunk of lines at a time.
+    """
+    file: IO[bytes] = await hass.async_add_executor_job(gzip.open, path, "rb")
+    try:
+        while True:
+            try:
+                lines = await hass.async_add_executor_job(
+                    _read_lines, file, REPLAY_CHUNK_LINES
+                )
+            except (OSError, EOFError) as err:
+                # A file still being written may end in a partial gzip member
+                _LOGGER.warning("Stopped reading capture %s: %s", path, err)
+                return
+            if not lines:
+                return
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                    received, body = float(record["received"]), record["body"]
+                except (ValueError, KeyError, TypeError):
+                    _LOGGER.warning("Skipping malformed capture record in %s", path)
+                    continue
+                yield received, body
+    finally:
+        await hass.async_add_executor_job(file.close)
+
+
+def _read_lines(file: IO[bytes], count: int) -> list[bytes]:
+    """Read up to count lines of a file."""
+    return list(islice(file, count))
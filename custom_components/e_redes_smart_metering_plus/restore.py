@@ -0,0 +1,92 @@
+"""Startup restore index for E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+
+from .const import CALCULATED_SENSORS, DOMAIN, SENSOR_MAPPING
+
+# Unique id suffix -> (platform, entity config) of every restorable entity
+RESTORABLE_SUFFIXES: dict[str, tuple[Platform, dict[str, Any]]] = {
+    **{
+        sensor_config["key"]: (Platform.SENSOR, sensor_config)
+        for sensor_config in SENSOR_MAPPING.values()
+    },
+    **{
+        sensor_key: (Platform.SENSOR, sensor_config)
+        for sensor_key, sensor_config in CALCULATED_SENSORS.items()
+    },
+    "breaker_limit": (Platform.NUMBER, {}),
+    "breaker_overload": (Platform.BINARY_SENSOR, {}),
+}
+
+_UNIQUE_ID_PREFIX = f"{DOMAIN}_"
+
+type RestoreIndex = dict[Platform, list[tuple[str, str, dict[str, Any]]]]
+
+
+@callback
+def async_build_restore_index(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    calculated_sensors: Mapping[str, dict[str, Any]] | None = None,
+) -> RestoreIndex:
+    """Index this entry's registered entities by platform in a single pass.
+
+    Each platform gets ``(cpe, key, config)`` tuples for the entities it owns,
+    parsed from unique ids of the form ``<domain>_<cpe>_<key>``. The entry's
+    calculated sensors, including user-defined ones, are restorable too.
+    """
+    suffixes = RESTORABLE_SUFFIXES
+    if calculated_sensors:
+        suffixes = {
+            **suffixes,
+            **{
+                sensor_key: (Platform.SENSOR, sensor_config)
+                for sensor_key, sensor_config in calculated_sensors.items()
+            },
+        }
+    index: RestoreIndex = {}
+    entity_registry = er.async_get(hass)
+
+    for entity_entry in er.async_entries_for_config_entry(
+        entity_registry, entry.entry_id
+    ):
+        if entity_entry.platform != DOMAIN:
+            continue
+
+        unique_id = entity_entry.unique_id
+        if not unique_id.startswith(_UNIQUE_ID_PREFIX):
+            continue
+
+        if (parsed := _parse_unique_id(unique_id, suffixes)) is None:
+            continue
+
+        cpe, key = parsed
+        platform, config = suffixes[key]
+        if entity_entry.domain == platform:
+            index.setdefault(platform, []).append((cpe, key, config))
+
+    return index
+
+
+def _parse_unique_id(
+    unique_id: str, suffixes: Mapping[str, Any]
+) -> tuple[str, str] | None:
+    """Split a unique id into CPE and key, preferring the longest known key."""
+    remainder = unique_id[len(_UNIQUE_ID_PREFIX) :]
+    separator = remainder.find("_")
+    while separator != -1:
+        key = remainder[separator + 1 :]
+        if key in suffixes:
+            if cpe := remainder[:separator]:
+                return cpe, key
+            return None
+        separator = remainder.find("_", separator + 1)
+    return None
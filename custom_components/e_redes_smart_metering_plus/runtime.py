@@ -0,0 +1,141 @@
+"""Runtime state of the E-Redes Smart Metering Plus config entries."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+
+from .const import DOMAIN, MANUFACTURER, MODEL
+
+if TYPE_CHECKING:
+    from homeassistant.components.binary_sensor import BinarySensorEntity
+    from homeassistant.components.number import NumberEntity
+    from homeassistant.components.sensor import SensorEntity
+
+    from .capture import PayloadCapture
+    from .derivation import Derivation, DerivationEngine
+    from .ingest import ReadingQueue
+    from .reading import ReadingFilter, ReadingRouter
+    from .restore import RestoreIndex
+    from .snapshot import SnapshotStore
+    from .throttle import WriteStats
+    from .timing import IngestTimings
+
+
+class CpeRuntime:
+    """Runtime state of one meter, referencing its entities directly."""
+
+    __slots__ = (
+        "arrival",
+        "breaker_limit",
+        "breaker_overload",
+        "clock",
+        "cpe",
+        "device_id",
+        "device_info",
+        "duplicates",
+        "engine",
+        "failed",
+        "readings",
+        "rejected",
+        "router",
+        "sensors",
+        "skew",
+        "stale",
+        "values",
+    )
+
+    def __init__(self, cpe: str, device_id: str | None = None) -> None:
+        """Initialize the meter state."""
+        self.cpe = cpe
+        # Device registry id, None until the device is ensured
+        self.device_id = device_id
+        # One device description shared by the registry and every entity of
+        # the meter; treat it as read-only
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, cpe)},
+            name=f"E-Redes Smart Meter ({cpe})",
+            manufacturer=MANUFACTURER,
+            model=MODEL,
+            serial_number=cpe,
+            suggested_area="Energy",
+        )
+        # Sensor key -> raw, calculated or diagnostic sensor entity
+        self.sensors: dict[str, SensorEntity] = {}
+        self.breaker_limit: NumberEntity | None = None
+        self.breaker_overload: BinarySensorEntity | None = None
+        # Latest raw and derived values, shared with the derivation engine,
+        # and the clock of the reading they come from
+        self.values: dict[str, float] = {}
+        self.clock: datetime | None = None
+        self.router: ReadingRouter | None = None
+        self.engine: DerivationEngine | None = None
+        # Diagnostic counters: applied, duplicate, out-of-order, queue-rejected
+        # and failed readings, and the arrival time (epoch seconds) of the
+        # last applied reading with its lag behind the meter clock
+        self.readings = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.rejected = 0
+        self.failed = 0
+        self.arrival: float | None = None
+        self.skew: float | None = None
+
+    @callback
+    def async_forget_entities(self) -> None:
+        """Drop the entity references, so they are created again."""
+        self.sensors.clear()
+        self.breaker_limit = None
+        self.breaker_overload = None
+
+
+@dataclass(slots=True)
+class EntryRuntime:
+    """Runtime state of a config entry, stored in its ``runtime_data``."""
+
+    name: str
+    webhook_id: str
+    derivations: tuple[Derivation, ...]
+    # Calculated sensor configs in evaluation order
+    calculated_sensors: dict[str, dict[str, Any]]
+    # Registered entities to restore, consumed by each platform at setup
+    restore_index: RestoreIndex
+    write_stats: WriteStats
+    snapshot: SnapshotStore
+    reading_filter: ReadingFilter
+    timings: IngestTimings
+    webhook_url: str | None = None
+    queue: ReadingQueue | None = None
+    capture: PayloadCapture | None = None
+    add_entities: dict[Platform, AddConfigEntryEntitiesCallback] = field(
+        default_factory=dict
+    )
+    cpes: dict[str, CpeRuntime] = field(default_factory=dict)
+
+    @callback
+    def async_get_cpe(self, cpe: str) -> CpeRuntime:
+        """Return the state of a meter, creating it on first use."""
+        if (cpe_runtime := self.cpes.get(cpe)) is None:
+            cpe_runtime = self.cpes[cpe] = CpeRuntime(cpe)
+        return cpe_runtime
+
+
+type EredesSmartMeteringPlusConfigEntry = ConfigEntry[EntryRuntime]
+
+
+@callback
+def async_get_runtime(hass: HomeAssistant, config_entry_id: str) -> EntryRuntime:
+    """Return the runtime state of a loaded config entry."""
+    entry: EredesSmartMeteringPlusConfigEntry | None = (
+        hass.config_entries.async_get_entry(config_entry_id)
+    )
+    if entry is None:
+        raise KeyError(config_entry_id)
+    return entry.runtime_data
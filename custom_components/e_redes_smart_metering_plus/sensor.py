@@ -8,97 +8,69 @@ from typing import Any
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers import entity_registry as er
-from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 from homeassistant.util import dt as dt_util
 
 from .const import (
-    CALCULATED_SENSORS,
     DIAGNOSTIC_SENSORS,
     DOMAIN,
+    INGEST_SENSORS,
     MANUFACTURER,
-    MODEL,
     SENSOR_MAPPING,
+    WRITE_CLASS_CALCULATED,
+    WRITE_CLASS_COUNTER,
+    WRITE_CLASS_MEASUREMENT,
 )
+from .derivation import async_get_engine
+from .reading import Reading, async_subscribe_reading
+from .runtime import CpeRuntime, EredesSmartMeteringPlusConfigEntry, async_get_runtime
+from .throttle import Deadband, async_create_write_throttle
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(
     hass: HomeAssistant,
-    config_entry: ConfigEntry,
+    config_entry: EredesSmartMeteringPlusConfigEntry,
     async_add_entities: AddConfigEntryEntitiesCallback,
 ) -> None:
     """Set up E-Redes Smart Metering Plus sensors from config entry."""
     # Store the add_entities callback for later use
-    hass.data[DOMAIN][config_entry.entry_id]["add_entities"] = async_add_entities
-    hass.data[DOMAIN][config_entry.entry_id]["entities"] = {}
+    runtime = config_entry.runtime_data
+    runtime.add_entities[Platform.SENSOR] = async_add_entities
 
     # Restore existing entities from entity registry
     await async_restore_existing_entities(hass, config_entry, async_add_entities)
 
+    # Ingest diagnostics for the per-entry objects that exist, the queue
+    # only in fast-ack mode
+    async_add_entities(
+        ERedesIngestSensor(sensor_key, sensor_config, config_entry, hass)
+        for sensor_key, sensor_config in INGEST_SENSORS.items()
+        if getattr(runtime, sensor_config["source"]) is not None
+    )
+
 
 async def async_restore_existing_entities(
     hass: HomeAssistant,
-    config_entry: ConfigEntry,
+    config_entry: EredesSmartMeteringPlusConfigEntry,
     async_add_entities: AddConfigEntryEntitiesCallback,
 ) -> None:
-    """Restore existing entities from entity registry."""
-    entity_registry = er.async_get(hass)
+    """Restore existing entities from the entry's restore index."""
+    runtime = config_entry.runtime_data
     entities_to_restore = []
 
-    # Find all entities for this integration
-    for entity_entry in entity_registry.entities.values():
-        if not (
-            entity_entry.config_entry_id == config_entry.entry_id
-            and entity_entry.domain == "sensor"
-            and entity_entry.platform == DOMAIN
-        ):
-            continue
-
-        # Parse the unique_id to extract CPE and sensor_key
-        unique_id = entity_entry.unique_id
-        if not unique_id.startswith(f"{DOMAIN}_"):
-            continue
-
-        # Format: e_redes_smart_metering_plus_CPE_sensor_key
-        # Remove the domain prefix
-        remainder = unique_id[len(f"{DOMAIN}_") :]
-
-        # Find the sensor_key by matching against known sensor keys
-        sensor_key = None
-        cpe = None
-        sensor_config = None
-        is_calculated = False
-
-        # First check regular sensors
-        for config in SENSOR_MAPPING.values():
-            key = config["key"]
-            if remainder.endswith(f"_{key}"):
-                sensor_key = key
-                cpe = remainder[: -len(f"_{key}")]
-                sensor_config = config
-                break
-
-        # If not found, check calculated sensors
-        if not sensor_key:
-            for key, config in CALCULATED_SENSORS.items():
-                if remainder.endswith(f"_{key}"):
-                    sensor_key = key
-                    cpe = remainder[: -len(f"_{key}")]
-                    sensor_config = config
-                    is_calculated = True
-                    break
-
-        if not (sensor_key and cpe and sensor_config):
-            continue
-
+    calculated_sensors = runtime.calculated_sensors
+    for cpe, sensor_key, sensor_config in runtime.restore_index.pop(
+        Platform.SENSOR, ()
+    ):
+        cpe_runtime = runtime.async_get_cpe(cpe)
+        is_calculated = sensor_key in calculated_sensors
         _LOGGER.debug(
-            "Restoring entity: %s for CPE: %s, sensor: %s (calculated: %s)",
-            entity_entry.entity_id,
+            "Restoring entity for CPE: %s, sensor: %s (calculated: %s)",
             cpe,
             sensor_key,
             is_calculated,
@@ -107,15 +79,25 @@ async def async_restore_existing_entities(
         # Create sensor entity
         if is_calculated:
             sensor = ERedesCalculatedSensor(
-                cpe, sensor_key, sensor_config, config_entry.entry_id, hass
+                cpe,
+                sensor_key,
+                sensor_config,
+                config_entry.entry_id,
+                hass,
+                cpe_runtime.device_info,
             )
         else:
-            sensor = ERedisSensor(cpe, sensor_key, sensor_config, config_entry.entry_id)
+            sensor = ERedisSensor(
+                cpe,
+                sensor_key,
+                sensor_config,
+                config_entry.entry_id,
+                cpe_runtime.device_info,
+            )
         entities_to_restore.append(sensor)
 
-        # Store in entities dict
-        entity_key = f"{cpe}_{sensor_key}"
-        hass.data[DOMAIN][config_entry.entry_id]["entities"][entity_key] = sensor
+        # Store reference
+        cpe_runtime.sensors[sensor_key] = sensor
 
     if entities_to_restore:
         _LOGGER.info("Restored %d existing sensor entities", len(entities_to_restore))
@@ -127,12 +109,19 @@ async def async_restore_existing_entities(
 class ERedisSensor(SensorEntity):
     """Representation of an E-Redes Smart Metering Plus sensor."""
 
+    # Volatile and informational attributes stay out of the recorder so every
+    # reading reuses the same recorded attribute row
+    _unrecorded_attributes = frozenset(
+        {"last_update", "integration_webhook_url", "webhook_info", "configuration_note"}
+    )
+
     def __init__(
         self,
         cpe: str,
         sensor_key: str,
         sensor_config: dict[str, Any],
         config_entry_id: str,
+        device_info: DeviceInfo,
     ) -> None:
         """Initialize the sensor."""
         self._cpe = cpe
@@ -145,6 +134,8 @@ class ERedisSensor(SensorEntity):
             # Keep CPE in unique_id for uniqueness
             f"{DOMAIN}_{cpe}_{sensor_key}"
         )
+        # Shared by every entity of the meter
+        self._attr_device_info = device_info
         self._attr_device_class = sensor_config.get("device_class")
         self._attr_state_class = sensor_config.get("state_class")
         self._attr_native_unit_of_measurement = sensor_config.get("unit")
@@ -157,18 +148,6 @@ class ERedisSensor(SensorEntity):
         # Enable state restoration
         self._attr_should_poll = False
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._cpe)},
-            name=f"E-Redes Smart Meter ({self._cpe})",
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-            serial_number=self._cpe,
-            suggested_area="Energy",
-        )
-
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
         """Return extra state attributes."""
@@ -179,16 +158,9 @@ class ERedisSensor(SensorEntity):
 
         # Add webhook URL info to the first sensor of each device for easy access
         if self._sensor_key == "instantaneous_active_power_import":
-            webhook_url = None
-            if (
-                DOMAIN in self.hass.data
-                and self._config_entry_id in self.hass.data[DOMAIN]
-                and "webhook_url" in self.hass.data[DOMAIN][self._config_entry_id]
-            ):
-                webhook_url = self.hass.data[DOMAIN][self._config_entry_id][
-                    "webhook_url"
-                ]
-
+            webhook_url = async_get_runtime(
+                self.hass, self._config_entry_id
+            ).webhook_url
             if webhook_url:
                 attrs["integration_webhook_url"] = webhook_url
                 attrs["webhook_info"] = "This URL receives data for ALL E-Redes meters"
@@ -202,17 +174,45 @@ class ERedisSensor(SensorEntity):
         """Run when entity about to be added to hass."""
         await super().async_added_to_hass()
 
-        # Connect to dispatcher for updates
+        # Start from the latest value persisted before a restart, if any
+        cpe_runtime = async_get_runtime(self.hass, self._config_entry_id).async_get_cpe(
+            self._cpe
+        )
+        if (value := cpe_runtime.values.get(self._sensor_key)) is not None:
+            self._attr_native_value = value
+            self._last_update = cpe_runtime.clock
+
+        self._throttle = async_create_write_throttle(
+            self.hass,
+            self._config_entry_id,
+            (
+                WRITE_CLASS_COUNTER
+                if self._attr_state_class == "total_increasing"
+                else WRITE_CLASS_MEASUREMENT
+            ),
+            self.async_write_ha_state,
+            Deadband.for_sensor(self._config),
+        )
+        self.async_on_remove(self._throttle.async_cancel)
+
+        # Subscribe to readings carrying this sensor's field
         self.async_on_remove(
-            async_dispatcher_connect(
+            async_subscribe_reading(
                 self.hass,
-                f"{DOMAIN}_{self._cpe}_{self._sensor_key}_update",
-                self._handle_update,
+                self._config_entry_id,
+                self._cpe,
+                self._handle_reading,
+                (self._sensor_key,),
             )
         )
 
     @callback
-    def _handle_update(self, value: float, timestamp: str | None = None) -> None:
+    def _handle_reading(self, reading: Reading) -> None:
+        """Handle a reading routed to this sensor."""
+        self._handle_update(reading.values[self._sensor_key], reading.clock)
+
+    @callback
+    def _handle_update(self, value: float, timestamp: datetime | None = None) -> None:
         """Handle sensor update."""
         # For total_increasing sensors, ensure values never decrease
         if self._attr_state_class == "total_increasing":
@@ -236,22 +236,20 @@ class ERedisSensor(SensorEntity):
                     pass
 
         self._attr_native_value = value
+        self._last_update = timestamp or dt_util.now()
 
-        if timestamp:
-            try:
-                self._last_update = datetime.fromisoformat(timestamp.replace(" ", "T"))
-            except (ValueError, TypeError):
-                self._last_update = datetime.now()
-        else:
-            self._last_update = datetime.now()
-
-        self.async_write_ha_state()
-        _LOGGER.debug("Updated sensor %s with value %s", self.entity_id, value)
+        self._throttle.async_write(value)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Updated sensor %s with value %s", self.entity_id, value)
 
 
 class ERedesCalculatedSensor(SensorEntity):
     """Representation of a calculated E-Redes sensor."""
 
+    _unrecorded_attributes = frozenset(
+        {"last_update", "calculation_type", "formula", "source_sensors"}
+    )
+
     def __init__(
         self,
         cpe: str,
@@ -259,6 +257,7 @@ class ERedesCalculatedSensor(SensorEntity):
         sensor_config: dict[str, Any],
         config_entry_id: str,
         hass: HomeAssistant,
+        device_info: DeviceInfo,
     ) -> None:
         """Initialize the calculated sensor."""
         self._cpe = cpe
@@ -269,6 +268,7 @@ class ERedesCalculatedSensor(SensorEntity):
 
         self._attr_name = f"{sensor_config['name']}"
         self._attr_unique_id = f"{DOMAIN}_{cpe}_{sensor_key}"
+        self._attr_device_info = device_info
         self._attr_device_class = sensor_config.get("device_class")
         self._attr_state_class = sensor_config.get("state_class")
         self._attr_native_unit_of_measurement = sensor_config.get("unit")
@@ -284,18 +284,6 @@ class ERedesCalculatedSensor(SensorEntity):
         # Store source sensor keys
         self._source_sensors = sensor_config.get("source_sensors", [])
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._cpe)},
-            name=f"E-Redes Smart Meter ({self._cpe})",
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-            serial_number=self._cpe,
-            suggested_area="Energy",
-        )
-
     @property
     def extra_state_attributes(self) -> dict[str, Any] | None:
         """Return extra state attributes."""
@@ -303,7 +291,11 @@ class ERedesCalculatedSensor(SensorEntity):
         if self._last_update:
             attrs["last_update"] = self._last_update
         attrs["cpe"] = self._cpe
-        attrs["calculation_type"] = self._config.get("calculation", "unknown")
+        # Built-in sensors name their calculation, user-defined ones only
+        # have their formula
+        if (calculation := self._config.get("calculation")) is not None:
+            attrs["calculation_type"] = calculation
+        attrs["formula"] = self._config["formula"]
         attrs["source_sensors"] = self._source_sensors
         return attrs
 
@@ -311,295 +303,161 @@ class ERedesCalculatedSensor(SensorEntity):
         """Run when entity about to be added to hass."""
         await super().async_added_to_hass()
 
-        # Connect to dispatcher for updates from source sensors
-        for source_sensor in self._source_sensors:
-            self.async_on_remove(
-                async_dispatcher_connect(
-                    self.hass,
-                    f"{DOMAIN}_{self._cpe}_{source_sensor}_update",
-                    self._handle_source_update,
-                )
-            )
-
-        # If this sensor requires a number entity (like breaker_limit), listen to it
-        if self._config.get("requires_number_entity"):
-            number_entity_key = self._config["requires_number_entity"]
-            self.async_on_remove(
-                async_dispatcher_connect(
-                    self.hass,
-                    f"{DOMAIN}_{self._cpe}_{number_entity_key}_update",
-                    self._handle_number_entity_update,
-                )
-            )
-
-        # Perform initial calculation
-        self._calculate_value()
-
-        # If this is the breaker load sensor, notify binary sensor after initial calculation
-        if self._sensor_key == "breaker_load":
-            from homeassistant.helpers.dispatcher import async_dispatcher_send
-
-            signal_name = f"{DOMAIN}_{self._cpe}_breaker_load_update"
-            _LOGGER.info("Sending initial dispatcher signal: %s", signal_name)
-            async_dispatcher_send(
-                self.hass,
-                signal_name,
-            )
-
-    @callback
-    def _handle_source_update(self, value: float, timestamp: str | None = None) -> None:
-        """Handle updates from source sensors."""
-        # Recalculate when any source sensor updates
-        self._calculate_value()
-
-        if timestamp:
-            try:
-                self._last_update = datetime.fromisoformat(timestamp.replace(" ", "T"))
-            except (ValueError, TypeError):
-                self._last_update = datetime.now()
-        else:
-            self._last_update = datetime.now()
-
-        self.async_write_ha_state()
+        self._throttle = async_create_write_throttle(
+            self.hass,
+            self._config_entry_id,
+            WRITE_CLASS_CALCULATED,
+            self.async_write_ha_state,
+            Deadband.for_sensor(self._config),
+        )
+        self.async_on_remove(self._throttle.async_cancel)
 
-        # If this is the breaker load sensor, notify binary sensor
-        if self._sensor_key == "breaker_load":
-            from homeassistant.helpers.dispatcher import async_dispatcher_send
+        # The CPE's derivation engine computes this sensor once per reading
+        engine = async_get_engine(self.hass, self._config_entry_id, self._cpe)
+        self.async_on_remove(
+            engine.async_subscribe(self._sensor_key, self._handle_derived_update)
+        )
 
-            async_dispatcher_send(
-                self.hass,
-                f"{DOMAIN}_{self._cpe}_breaker_load_update",
-            )
+        # Start from the value derived so far or persisted before a restart
+        self._attr_native_value = engine.snapshot.get(self._sensor_key)
+        if self._attr_native_value is not None:
+            runtime = async_get_runtime(self.hass, self._config_entry_id)
+            self._last_update = runtime.cpes[self._cpe].clock
 
     @callback
-    def _handle_number_entity_update(self, value: float) -> None:
-        """Handle updates from number entities (like breaker limit)."""
-        # Recalculate when number entity updates
-        self._calculate_value()
-        self.async_write_ha_state()
-
-        # If this is the breaker load sensor, notify binary sensor
-        if self._sensor_key == "breaker_load":
-            from homeassistant.helpers.dispatcher import async_dispatcher_send
-
-            async_dispatcher_send(
-                self.hass,
-                f"{DOMAIN}_{self._cpe}_breaker_load_update",
-            )
-
-    def _calculate_value(self) -> None:
-        """Calculate the sensor value based on source sensors."""
-        calculation_type = self._config.get("calculation")
-
-        if calculation_type == "power_voltage":
-            # Current (A) = Power (W) / Voltage (V)
-            self._calculate_current_from_power_voltage()
-        elif calculation_type == "current_breaker_limit":
-            # Breaker Load (%) = (Current / Breaker Limit) * 100
-            self._calculate_breaker_load()
-        else:
-            _LOGGER.warning("Unknown calculation type: %s", calculation_type)
-            self._attr_native_value = None
-
-    def _calculate_current_from_power_voltage(self) -> None:
-        """Calculate current from power and voltage."""
-        try:
-            # Get the source sensor entities
-            entities = self._hass.data[DOMAIN][self._config_entry_id]["entities"]
-
-            power_key = f"{self._cpe}_instantaneous_active_power_import"
-            voltage_key = f"{self._cpe}_voltage_l1"
-
-            # Get power sensor
-            power_sensor = entities.get(power_key)
-            if not power_sensor or power_sensor.native_value is None:
-                _LOGGER.debug(
-                    "Power sensor not available or has no value for %s", self._cpe
-                )
-                self._attr_native_value = None
-                return
-
-            # Get voltage sensor
-            voltage_sensor = entities.get(voltage_key)
-            if not voltage_sensor or voltage_sensor.native_value is None:
-                _LOGGER.debug(
-                    "Voltage sensor not available or has no value for %s", self._cpe
-                )
-                self._attr_native_value = None
-                return
-
-            # Get values
-            power = float(power_sensor.native_value)
-            voltage = float(voltage_sensor.native_value)
+    def _handle_derived_update(
+        self, value: float | None, reading: Reading | None
+    ) -> None:
+        """Handle a new value from the derivation engine."""
+        self._attr_native_value = value
+        if reading is not None:
+            self._last_update = reading.clock or dt_util.now()
+        self._throttle.async_write(value)
 
-            # Home Assistant auto-converts power sensors with device_class="power" to kW
-            # when displaying, but stores native_value in the configured unit (W).
-            # However, we need to check what unit we're actually getting.
-            power_unit = power_sensor.native_unit_of_measurement
 
-            # If power is in kW, convert to W for calculation
-            if power_unit == "kW":
-                power_in_watts = power * 1000
-            else:
-                power_in_watts = power
-
-            _LOGGER.debug(
-                "Current calculation for %s: power=%.3f %s (%.3f W), voltage=%.2f V",
-                self._cpe,
-                power,
-                power_unit,
-                power_in_watts,
-                voltage,
-            )
+@callback
+def _async_new_sensors_for_data(
+    config_entry_id: str,
+    cpe_runtime: CpeRuntime,
+    data: dict[str, Any],
+) -> list[SensorEntity]:
+    """Create the missing sensor entities for the fields of a reading."""
+    cpe = cpe_runtime.cpe
+    sensors = cpe_runtime.sensors
+    new_sensors: list[SensorEntity] = []
 
-            # Check for zero voltage to avoid division by zero
-            if voltage == 0:
-                _LOGGER.warning(
-                    "Voltage is zero for %s, cannot calculate current", self._cpe
-                )
-                self._attr_native_value = None
-                return
+    for field_name in data:
+        if field_name == "cpe" or field_name not in SENSOR_MAPPING:
+            continue
 
-            # Calculate current: I = P / V (using power in watts)
-            current = power_in_watts / voltage
+        sensor_config = SENSOR_MAPPING[field_name]
+        sensor_key = sensor_config["key"]
+        if sensor_key in sensors:
+            continue  # Entity already exists
 
-            # Round to 2 decimal places
-            self._attr_native_value = round(current, 2)
+        sensor = ERedisSensor(
+            cpe, sensor_key, sensor_config, config_entry_id, cpe_runtime.device_info
+        )
+        new_sensors.append(sensor)
 
-            _LOGGER.debug(
-                "Calculated current for %s: %.2f A (P=%.2f W, V=%.2f V)",
-                self._cpe,
-                current,
-                power_in_watts,
-                voltage,
-            )
+        # Store reference
+        sensors[sensor_key] = sensor
 
-        except (ValueError, TypeError, KeyError) as err:
-            _LOGGER.debug("Error calculating current for %s: %s", self._cpe, err)
-            self._attr_native_value = None
+        _LOGGER.info("Created sensor %s for CPE %s", sensor_key, cpe)
 
-    def _calculate_breaker_load(self) -> None:
-        """Calculate breaker load percentage from current and breaker limit."""
-        try:
-            # Get the source sensor entities
-            entities = self._hass.data[DOMAIN][self._config_entry_id]["entities"]
+    return new_sensors
 
-            power_key = f"{self._cpe}_instantaneous_active_power_import"
-            voltage_key = f"{self._cpe}_voltage_l1"
 
-            # Get power sensor
-            power_sensor = entities.get(power_key)
-            if not power_sensor or power_sensor.native_value is None:
-                _LOGGER.debug(
-                    "Power sensor not available or has no value for %s", self._cpe
-                )
-                self._attr_native_value = None
-                return
+@callback
+def _async_new_calculated_sensors(
+    hass: HomeAssistant,
+    config_entry_id: str,
+    cpe_runtime: CpeRuntime,
+) -> list[SensorEntity]:
+    """Create the missing calculated sensor entities for a CPE."""
+    cpe = cpe_runtime.cpe
+    sensors = cpe_runtime.sensors
+    new_sensors: list[SensorEntity] = []
+
+    # Calculated sensors are kept in evaluation order, so sensors derived
+    # from other calculated sensors come after them
+    calculated_sensors = async_get_runtime(hass, config_entry_id).calculated_sensors
+    for sensor_key, sensor_config in calculated_sensors.items():
+        if sensor_key in sensors:
+            continue
 
-            # Get voltage sensor
-            voltage_sensor = entities.get(voltage_key)
-            if not voltage_sensor or voltage_sensor.native_value is None:
+        # Check if all source sensors exist before creating calculated sensor
+        source_sensors = sensor_config.get("source_sensors", [])
+        if any(source not in sensors for source in source_sensors):
+            if _LOGGER.isEnabledFor(logging.DEBUG):
                 _LOGGER.debug(
-                    "Voltage sensor not available or has no value for %s", self._cpe
-                )
-                self._attr_native_value = None
-                return
-
-            # Get values
-            power = float(power_sensor.native_value)
-            voltage = float(voltage_sensor.native_value)
-
-            # Check for zero voltage to avoid division by zero
-            if voltage == 0:
-                _LOGGER.warning(
-                    "Voltage is zero for %s, cannot calculate breaker load", self._cpe
+                    "Not creating calculated sensor %s - source sensors not available",
+                    sensor_key,
                 )
-                self._attr_native_value = None
-                return
-
-            # Calculate current: I = P / V
-            current = power / voltage
-
-            # Get breaker limit from number entity
-            number_entities = self._hass.data[DOMAIN][self._config_entry_id].get(
-                "number_entities", {}
-            )
-            breaker_limit_entity = number_entities.get(self._cpe)
-
-            if not breaker_limit_entity:
-                _LOGGER.debug("Breaker limit entity not available for %s", self._cpe)
-                self._attr_native_value = None
-                return
-
-            breaker_limit = float(breaker_limit_entity.native_value)
+            continue
 
-            # Check for zero breaker limit to avoid division by zero
-            if breaker_limit == 0:
-                _LOGGER.warning(
-                    "Breaker limit is zero for %s, cannot calculate load", self._cpe
-                )
-                self._attr_native_value = None
-                return
+        # Check if required number entity exists (e.g., breaker_limit)
+        if sensor_config.get("requires_number_entity"):
+            if cpe_runtime.breaker_limit is None:
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug(
+                        "Required number entity %s not available for calculated sensor %s",
+                        sensor_config["requires_number_entity"],
+                        sensor_key,
+                    )
+                continue
 
-            # Calculate load percentage: Load (%) = (Current / Breaker Limit) * 100
-            load_percentage = (current / breaker_limit) * 100
+        # Create calculated sensor entity
+        sensor = ERedesCalculatedSensor(
+            cpe,
+            sensor_key,
+            sensor_config,
+            config_entry_id,
+            hass,
+            cpe_runtime.device_info,
+        )
+        new_sensors.append(sensor)
 
-            # Round to integer (no decimals)
-            self._attr_native_value = int(round(load_percentage))
+        # Store reference
+        sensors[sensor_key] = sensor
 
-            _LOGGER.debug(
-                "Calculated breaker load for %s: %d%% (I=%.2f A, Limit=%.1f A)",
-                self._cpe,
-                int(load_percentage),
-                current,
-                breaker_limit,
-            )
+        _LOGGER.info("Created calculated sensor %s for CPE %s", sensor_key, cpe)
 
-        except (ValueError, TypeError, KeyError) as err:
-            _LOGGER.debug("Error calculating breaker load for %s: %s", self._cpe, err)
-            self._attr_native_value = None
+    return new_sensors
 
 
-async def async_create_sensor_for_cpe(
+@callback
+def _async_new_diagnostic_sensors(
     hass: HomeAssistant,
     config_entry_id: str,
-    cpe: str,
-    field_name: str,
-) -> None:
-    """Create a sensor entity for a specific CPE and field."""
-    _LOGGER.debug("Creating sensor for CPE %s, field %s", cpe, field_name)
-
-    if field_name not in SENSOR_MAPPING:
-        _LOGGER.debug("Field %s not in sensor mapping, skipping", field_name)
-        return
-
-    sensor_config = SENSOR_MAPPING[field_name]
-    sensor_key = sensor_config["key"]
+    cpe_runtime: CpeRuntime,
+) -> list[SensorEntity]:
+    """Create the missing diagnostic sensor entities for a CPE."""
+    cpe = cpe_runtime.cpe
+    sensors = cpe_runtime.sensors
+    new_sensors: list[SensorEntity] = []
 
-    _LOGGER.debug("Sensor config for %s: %s", field_name, sensor_config)
-
-    # Check if entity already exists
-    entities = hass.data[DOMAIN][config_entry_id]["entities"]
-    entity_key = f"{cpe}_{sensor_key}"
-
-    if entity_key in entities:
-        _LOGGER.debug("Entity %s already exists, skipping creation", entity_key)
-        return  # Entity already exists
-
-    _LOGGER.debug("Creating new sensor entity for %s", entity_key)
+    for sensor_key, sensor_config in DIAGNOSTIC_SENSORS.items():
+        if sensor_key in sensors:
+            continue
 
-    # Create new sensor entity
-    sensor = ERedisSensor(cpe, sensor_key, sensor_config, config_entry_id)
+        # Create diagnostic sensor entity
+        sensor = ERedesDiagnosticSensor(
+            cpe,
+            sensor_key,
+            sensor_config,
+            config_entry_id,
+            hass,
+            cpe_runtime.device_info,
+        )
+        new_sensors.append(sensor)
 
-    # Add to Home Assistant
-    add_entities = hass.data[DOMAIN][config_entry_id]["add_entities"]
-    _LOGGER.debug("Adding entities using callback: %s", add_entities)
-    add_entities([sensor])
+        # Store reference
+        sensors[sensor_key] = sensor
 
-    # Store reference
-    entities[entity_key] = sensor
+        _LOGGER.info("Created diagnostic sensor %s for CPE %s", sensor_key, cpe)
 
-    _LOGGER.info("Created sensor %s for CPE %s", sensor_key, cpe)
+    return new_sensors
 
 
 # Function to be called from webhook handler to ensure sensors exist
@@ -609,87 +467,26 @@ async def async_ensure_sensors_for_data(
     cpe: str,
     data: dict[str, Any],
 ) -> None:
-    """Ensure all required sensors exist for the incoming data."""
-    _LOGGER.debug(
-        "Ensuring sensors for CPE %s with data keys: %s", cpe, list(data.keys())
-    )
-
-    for field_name in data:
-        if field_name != "cpe" and field_name in SENSOR_MAPPING:
-            _LOGGER.debug("Creating sensor for field: %s", field_name)
-            await async_create_sensor_for_cpe(hass, config_entry_id, cpe, field_name)
-        else:
-            _LOGGER.debug("Skipping field %s (cpe field or not in mapping)", field_name)
-
-
-async def async_ensure_calculated_sensors(
-    hass: HomeAssistant,
-    config_entry_id: str,
-    cpe: str,
-) -> None:
-    """Ensure all calculated sensors exist for a CPE."""
-    _LOGGER.debug("Ensuring calculated sensors for CPE %s", cpe)
-
-    entities = hass.data[DOMAIN][config_entry_id]["entities"]
-
-    for sensor_key, sensor_config in CALCULATED_SENSORS.items():
-        entity_key = f"{cpe}_{sensor_key}"
-
-        if entity_key in entities:
-            _LOGGER.debug("Calculated sensor %s already exists", entity_key)
-            continue
-
-        # Check if all source sensors exist before creating calculated sensor
-        source_sensors = sensor_config.get("source_sensors", [])
-        all_sources_exist = True
-
-        for source_sensor in source_sensors:
-            source_key = f"{cpe}_{source_sensor}"
-            if source_key not in entities:
-                all_sources_exist = False
-                _LOGGER.debug(
-                    "Source sensor %s not available for calculated sensor %s",
-                    source_sensor,
-                    sensor_key,
-                )
-                break
-
-        if not all_sources_exist:
-            _LOGGER.debug(
-                "Not creating calculated sensor %s - source sensors not available",
-                sensor_key,
-            )
-            continue
-
-        # Check if required number entity exists (e.g., breaker_limit)
-        if sensor_config.get("requires_number_entity"):
-            number_entity_key = sensor_config["requires_number_entity"]
-            number_entities = hass.data[DOMAIN][config_entry_id].get(
-                "number_entities", {}
-            )
-            if cpe not in number_entities:
-                _LOGGER.debug(
-                    "Required number entity %s not available for calculated sensor %s",
-                    number_entity_key,
-                    sensor_key,
-                )
-                continue
-
-        _LOGGER.debug("Creating calculated sensor %s for CPE %s", sensor_key, cpe)
-
-        # Create calculated sensor entity
-        sensor = ERedesCalculatedSensor(
-            cpe, sensor_key, sensor_config, config_entry_id, hass
-        )
-
-        # Add to Home Assistant
-        add_entities = hass.data[DOMAIN][config_entry_id]["add_entities"]
-        add_entities([sensor])
+    """Ensure all required sensors exist for the incoming data.
+
+    Raw, calculated and diagnostic sensors missing for the CPE are added to
+    Home Assistant in a single batch.
+    """
+    runtime = async_get_runtime(hass, config_entry_id)
+    cpe_runtime = runtime.async_get_cpe(cpe)
+    new_sensors = [
+        *_async_new_sensors_for_data(config_entry_id, cpe_runtime, data),
+        *_async_new_calculated_sensors(hass, config_entry_id, cpe_runtime),
+        *_async_new_diagnostic_sensors(hass, config_entry_id, cpe_runtime),
+    ]
+    if not new_sensors:
+        return
 
-        # Store reference
-        entities[entity_key] = sensor
+    # Add to Home Assistant
+    add_entities = runtime.add_entities[Platform.SENSOR]
+    add_entities(new_sensors)
 
-        _LOGGER.info("Created calculated sensor %s for CPE %s", sensor_key, cpe)
+    _LOGGER.debug("Added %d sensors for CPE %s", len(new_sensors), cpe)
 
 
 class ERedesDiagnosticSensor(SensorEntity):
@@ -705,6 +502,7 @@ class ERedesDiagnosticSensor(SensorEntity):
         sensor_config: dict[str, Any],
         config_entry_id: str,
         hass: HomeAssistant,
+        device_info: DeviceInfo,
     ) -> None:
         """Initialize the diagnostic sensor."""
         self._cpe = cpe
@@ -713,6 +511,7 @@ class ERedesDiagnosticSensor(SensorEntity):
         self._config_entry_id = config_entry_id
         self._hass = hass
         self._attr_unique_id = f"{DOMAIN}_{cpe}_{sensor_key}"
+        self._attr_device_info = device_info
         self._attr_name = sensor_config["name"]
         self._attr_icon = sensor_config.get("icon")
         self._attr_native_unit_of_measurement = sensor_config.get("unit")
@@ -725,33 +524,22 @@ class ERedesDiagnosticSensor(SensorEntity):
         self._attr_native_value = None
         self._last_update_time: datetime | None = None
 
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._cpe)},
-            name=f"E-Redes Smart Meter ({self._cpe})",
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-            serial_number=self._cpe,
-            suggested_area="Energy",
-        )
-
     async def async_added_to_hass(self) -> None:
         """Run when entity about to be added to hass."""
         await super().async_added_to_hass()
 
-        # Subscribe to webhook updates for this CPE
+        # Subscribe to every reading for this CPE
         self.async_on_remove(
-            async_dispatcher_connect(
+            async_subscribe_reading(
                 self.hass,
-                f"{DOMAIN}_{self._cpe}_webhook_update",
+                self._config_entry_id,
+                self._cpe,
                 self._handle_webhook_update,
             )
         )
 
     @callback
-    def _handle_webhook_update(self, timestamp: str | None = None) -> None:
+    def _handle_webhook_update(self, reading: Reading) -> None:
         """Handle webhook update for diagnostic tracking."""
         now = dt_util.utcnow()
 
@@ -771,35 +559,59 @@ class ERedesDiagnosticSensor(SensorEntity):
         self.async_write_ha_state()
 
 
-async def async_ensure_diagnostic_sensors(
-    hass: HomeAssistant,
-    config_entry_id: str,
-    cpe: str,
-) -> None:
-    """Ensure all diagnostic sensors exist for a CPE."""
-    _LOGGER.debug("Ensuring diagnostic sensors for CPE %s", cpe)
-
-    entities = hass.data[DOMAIN][config_entry_id]["entities"]
-
-    for sensor_key, sensor_config in DIAGNOSTIC_SENSORS.items():
-        entity_key = f"{cpe}_{sensor_key}"
-
-        if entity_key in entities:
-            _LOGGER.debug("Diagnostic sensor %s already exists", entity_key)
-            continue
+class ERedesIngestSensor(SensorEntity):
+    """Diagnostic sensor exposing a statistic of the ingest pipeline."""
 
-        _LOGGER.debug("Creating diagnostic sensor %s for CPE %s", sensor_key, cpe)
+    _attr_has_entity_name = True
 
-        # Create diagnostic sensor entity
-        sensor = ERedesDiagnosticSensor(
-            cpe, sensor_key, sensor_config, config_entry_id, hass
+    def __init__(
+        self,
+        sensor_key: str,
+        sensor_config: dict[str, Any],
+        config_entry: ConfigEntry,
+        hass: HomeAssistant,
+    ) -> None:
+        """Initialize the ingest sensor."""
+        self._sensor_key = sensor_key
+        self._config = sensor_config
+        self._config_entry_id = config_entry.entry_id
+        self._hass = hass
+        self._attr_unique_id = f"{DOMAIN}_{config_entry.entry_id}_{sensor_key}"
+        self._attr_name = sensor_config["name"]
+        self._attr_icon = sensor_config.get("icon")
+        self._attr_state_class = sensor_config.get("state_class")
+        self._attr_native_unit_of_measurement = sensor_config.get("unit")
+        self._attr_device_class = sensor_config.get("device_class")
+        self._attr_entity_category = sensor_config.get("entity_category")
+        self._attr_entity_registry_enabled_default = sensor_config.get(
+            "enabled_by_default", True
+        )
+        # Polled so busy queues don't cause a state write per request
+        self._attr_should_poll = True
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            name=config_entry.title,
+            manufacturer=MANUFACTURER,
+            entry_type=DeviceEntryType.SERVICE,
         )
 
-        # Add to Home Assistant
-        add_entities = hass.data[DOMAIN][config_entry_id]["add_entities"]
-        add_entities([sensor])
-
-        # Store reference
-        entities[entity_key] = sensor
+    @property
+    def native_value(self) -> float | None:
+        """Return the current statistic."""
+        runtime = async_get_runtime(self._hass, self._config_entry_id)
+        if (source := getattr(runtime, self._config["source"])) is None:
+            return None
+        if (percentile := self._config.get("percentile")) is not None:
+            return source.percentile(percentile)
+        return getattr(source, self._config["attribute"])
 
-        _LOGGER.info("Created diagnostic sensor %s for CPE %s", sensor_key, cpe)
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the percentile of every ingest stage for latency sensors."""
+        if (percentile := self._config.get("percentile")) is None:
+            return None
+        timings = async_get_runtime(self._hass, self._config_entry_id).timings
+        return {
+            f"{stage}_ms": histogram.percentile(percentile)
+            for stage, histogram in timings.stages.items()
+        }
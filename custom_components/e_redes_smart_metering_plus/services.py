@@ -0,0 +1,87 @@
+"""Actions of the E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .capture import capture_files
+from .const import (
+    ATTR_FILES,
+    ATTR_REAPPLY,
+    ATTR_SPEED,
+    CAPTURE_DIRECTORY,
+    DEFAULT_REPLAY_FILES,
+    DOMAIN,
+    SERVICE_REPLAY,
+)
+from .replay import async_replay
+from .runtime import EredesSmartMeteringPlusConfigEntry
+
+REPLAY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_FILES, default=DEFAULT_REPLAY_FILES): cv.string,
+        vol.Optional(ATTR_SPEED, default=0): vol.All(
+            vol.Coerce(float), vol.Range(min=0)
+        ),
+        vol.Optional(ATTR_REAPPLY, default=False): cv.boolean,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's actions."""
+
+    async def async_replay_service(call: ServiceCall) -> ServiceResponse:
+        """Replay captured payloads through the loaded config entry."""
+        entry = _async_get_loaded_entry(hass)
+        pattern = call.data[ATTR_FILES]
+        # Only files inside the capture directory can be replayed
+        if "/" in pattern or "\\" in pattern or ".." in pattern:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="invalid_replay_files",
+                translation_placeholders={"files": pattern},
+            )
+        paths = await hass.async_add_executor_job(
+            capture_files, hass.config.path(CAPTURE_DIRECTORY), pattern
+        )
+        if not paths:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="no_replay_files",
+                translation_placeholders={"files": pattern},
+            )
+        return await async_replay(
+            hass, entry, paths, call.data[ATTR_SPEED], call.data[ATTR_REAPPLY]
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REPLAY,
+        async_replay_service,
+        schema=REPLAY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+@callback
+def _async_get_loaded_entry(hass: HomeAssistant) -> EredesSmartMeteringPlusConfigEntry:
+    """Return the loaded config entry of the integration."""
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        if entry.state is ConfigEntryState.LOADED:
+            return entry
+    raise ServiceValidationError(
+        translation_domain=DOMAIN, translation_key="not_loaded"
+    )
@@ -0,0 +1,92 @@
+"""Persisted per-CPE reading snapshot for E-Redes Smart Metering Plus."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    NUMBER_ENTITY_KEYS,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+)
+from .reading import parse_clock, resolve_clock
+from .runtime import EntryRuntime
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """Persist the latest values and clock of every meter of an entry.
+
+    The stored snapshot holds, per CPE, the latest raw and derived values
+    (counters at their maximum) and the clock of the last applied reading.
+    Saves are debounced: the first change after a save schedules one write,
+    and later changes ride along with it.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry_id: str) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{config_entry_id}.snapshot"
+        )
+        self._runtime: EntryRuntime | None = None
+        self._save_scheduled = False
+
+    async def async_load(self, runtime: EntryRuntime) -> None:
+        """Load the stored snapshot into the meters' runtime state."""
+        self._runtime = runtime
+        if not (data := await self._store.async_load()):
+            return
+
+        for cpe, stored in data.get("cpes", {}).items():
+            cpe_runtime = runtime.async_get_cpe(cpe)
+            cpe_runtime.values.update(stored.get("values", {}))
+            cpe_runtime.clock = resolve_clock(parse_clock(stored.get("clock")), None)
+        _LOGGER.debug("Loaded snapshot of %d meters", len(data.get("cpes", {})))
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Schedule a save of the snapshot unless one is already pending."""
+        if self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Save the snapshot now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the stored snapshot."""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the snapshot of every meter with values."""
+        self._save_scheduled = False
+        if self._runtime is None:
+            return {"cpes": {}}
+        return {
+            "cpes": {
+                cpe: {
+                    "clock": (
+                        None
+                        if cpe_runtime.clock is None
+                        else cpe_runtime.clock.isoformat()
+                    ),
+                    # Number entities restore their own state
+                    "values": {
+                        key: value
+                        for key, value in cpe_runtime.values.items()
+                        if key not in NUMBER_ENTITY_KEYS
+                    },
+                }
+                for cpe, cpe_runtime in self._runtime.cpes.items()
+                if cpe_runtime.values
+            }
+        }
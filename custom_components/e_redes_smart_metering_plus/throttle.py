@@ -0,0 +1,203 @@
+"""State write throttling and deadband filtering for E-Redes entities."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+import time
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DEADBAND_DEFAULTS,
+    DEFAULT_MAX_SILENCE,
+    STAGE_STATE_WRITE,
+    WRITE_CLASS_OPTIONS,
+)
+from .runtime import async_get_runtime
+from .timing import LatencyHistogram
+
+_UNSET: Any = object()
+
+
+@dataclass(frozen=True, slots=True)
+class Deadband:
+    """Changes within ``max(absolute, relative * |last|)`` are not significant."""
+
+    absolute: float = 0.0
+    relative: float = 0.0
+
+    @classmethod
+    def for_sensor(cls, sensor_config: Mapping[str, Any]) -> Deadband:
+        """Return a sensor's own deadband or the default of its device class."""
+        config = sensor_config.get("deadband")
+        if config is None:
+            config = DEADBAND_DEFAULTS.get(sensor_config.get("device_class"), {})
+        return cls(**config)
+
+    def contains(self, last: Any, value: Any) -> bool:
+        """Return True if the change from last to value is inside the band."""
+        if value == last:
+            return True
+        if not isinstance(value, int | float) or not isinstance(last, int | float):
+            return False
+        return abs(value - last) <= max(self.absolute, self.relative * abs(last))
+
+
+class WriteStats:
+    """Per-entry counters of state writes, by write class."""
+
+    def __init__(self, min_intervals: Mapping[str, float]) -> None:
+        """Initialize the counters."""
+        self.min_intervals = dict(min_intervals)
+        self.written: dict[str, int] = dict.fromkeys(self.min_intervals, 0)
+        self.suppressed_by_class: dict[str, int] = dict.fromkeys(self.min_intervals, 0)
+        self.filtered_by_class: dict[str, int] = dict.fromkeys(self.min_intervals, 0)
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> WriteStats:
+        """Read the minimum write interval of each class from entry options."""
+        return cls(
+            {
+                write_class: float(options.get(option, 0))
+                for write_class, option in WRITE_CLASS_OPTIONS.items()
+            }
+        )
+
+    @property
+    def suppressed(self) -> int:
+        """Return the number of state writes suppressed so far."""
+        return sum(self.suppressed_by_class.values())
+
+    @property
+    def filtered(self) -> int:
+        """Return the number of state writes skipped by the deadband so far."""
+        return sum(self.filtered_by_class.values())
+
+
+class WriteThrottle:
+    """Filter and rate limit the state writes of one entity.
+
+    A value whose change from the last published one is inside the deadband
+    is not written, unless nothing was written for the max-silence interval.
+    A significant value is published at once if the entity's last write is at
+    least the minimum interval old. Otherwise it is suppressed, the entity
+    keeps the value in memory, and a trailing flush publishes the latest value
+    once the interval has passed.
+    """
+
+    __slots__ = (
+        "_deadband",
+        "_flush_job",
+        "_histogram",
+        "_hass",
+        "_last_write",
+        "_latest",
+        "_max_silence",
+        "_min_interval",
+        "_published",
+        "_stats",
+        "_unsub_flush",
+        "_write",
+        "_write_class",
+    )
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        write: Callable[[], None],
+        write_class: str,
+        stats: WriteStats,
+        deadband: Deadband | None = None,
+        max_silence: float = DEFAULT_MAX_SILENCE,
+        histogram: LatencyHistogram | None = None,
+    ) -> None:
+        """Initialize the throttle."""
+        self._hass = hass
+        self._write = write
+        self._write_class = write_class
+        self._stats = stats
+        self._deadband = deadband or Deadband()
+        self._max_silence = max_silence
+        self._histogram = histogram
+        self._min_interval = stats.min_intervals.get(write_class, 0.0)
+        self._last_write = -float("inf")
+        self._published: Any = _UNSET
+        self._latest: Any = _UNSET
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self._flush_job = HassJob(self._async_flush, cancel_on_shutdown=True)
+
+    @callback
+    def async_write(self, value: Any = _UNSET) -> None:
+        """Publish the entity's new value now, later, or not at all."""
+        now = time.monotonic()
+        self._latest = value
+        if (
+            value is not _UNSET
+            and self._published is not _UNSET
+            and now - self._last_write < self._max_silence
+            and self._deadband.contains(self._published, value)
+        ):
+            # Drop a held back value too, the entity is back inside the band
+            self.async_cancel()
+            self._stats.filtered_by_class[self._write_class] += 1
+            return
+
+        if now - self._last_write >= self._min_interval:
+            self._async_publish(now)
+            return
+
+        self._stats.suppressed_by_class[self._write_class] += 1
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self._hass, self._last_write + self._min_interval - now, self._flush_job
+            )
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel a pending trailing flush."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+    @callback
+    def _async_flush(self, _now: Any) -> None:
+        """Publish the value held back since the last write."""
+        self._unsub_flush = None
+        self._async_publish(time.monotonic())
+
+    @callback
+    def _async_publish(self, now: float) -> None:
+        """Write the entity state."""
+        self.async_cancel()
+        self._last_write = now
+        self._published = self._latest
+        self._stats.written[self._write_class] += 1
+        if self._histogram is None:
+            self._write()
+            return
+        start = time.perf_counter_ns()
+        self._write()
+        self._histogram.record(time.perf_counter_ns() - start)
+
+
+@callback
+def async_create_write_throttle(
+    hass: HomeAssistant,
+    config_entry_id: str,
+    write_class: str,
+    write: Callable[[], None],
+    deadband: Deadband | None = None,
+) -> WriteThrottle:
+    """Create a write throttle using the entry's interval for the class."""
+    runtime = async_get_runtime(hass, config_entry_id)
+    return WriteThrottle(
+        hass,
+        write,
+        write_class,
+        runtime.write_stats,
+        deadband,
+        histogram=runtime.timings.stages[STAGE_STATE_WRITE],
+    )
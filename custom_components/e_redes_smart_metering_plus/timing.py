@@ -0,0 +1,209 @@
+"""Ingest stage latency histograms for E-Redes Smart Metering Plus."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import (
+    LATENCY_BUCKETS_US,
+    LOG_SUMMARY_INTERVAL,
+    STAGE_DECODE,
+    STAGE_DISPATCH,
+    STAGE_ENSURE_DEVICE,
+    STAGE_ENSURE_ENTITIES,
+    STAGE_READING,
+    STAGE_STATE_WRITE,
+    THROUGHPUT_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STAGES = (
+    STAGE_DECODE,
+    STAGE_ENSURE_DEVICE,
+    STAGE_ENSURE_ENTITIES,
+    STAGE_DISPATCH,
+    STAGE_STATE_WRITE,
+    STAGE_READING,
+)
+
+# Bucket upper bounds in nanoseconds; the last bucket is unbounded
+_BUCKET_BOUNDS_NS = tuple(bound * 1000 for bound in LATENCY_BUCKETS_US)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations.
+
+    Recording a duration is a bisect and a few additions, so it is cheap
+    enough for every reading. Percentiles resolve to their bucket's upper
+    bound.
+    """
+
+    __slots__ = ("count", "counts", "max_ns", "total_ns")
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self.counts = [0] * (len(_BUCKET_BOUNDS_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns: int) -> None:
+        """Record one duration."""
+        self.counts[bisect_left(_BUCKET_BOUNDS_NS, duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the given percentile in milliseconds, or None if empty."""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for bound_ns, bucket_count in zip(_BUCKET_BOUNDS_NS, self.counts, strict=False):
+            seen += bucket_count
+            if seen >= rank:
+                return bound_ns / 1_000_000
+        # Beyond the last bound the largest duration seen is the best bound
+        return self.max_ns / 1_000_000
+
+    def copy(self) -> LatencyHistogram:
+        """Return a copy of the histogram."""
+        histogram = LatencyHistogram()
+        histogram.counts = self.counts.copy()
+        histogram.count = self.count
+        histogram.total_ns = self.total_ns
+        histogram.max_ns = self.max_ns
+        return histogram
+
+    def since(self, earlier: LatencyHistogram) -> LatencyHistogram:
+        """Return the durations recorded after an earlier copy was taken.
+
+        The maximum is only exact if it was recorded after the copy; otherwise
+        it is an upper bound.
+        """
+        histogram = LatencyHistogram()
+        histogram.counts = [
+            count - earlier_count
+            for count, earlier_count in zip(self.counts, earlier.counts, strict=True)
+        ]
+        histogram.count = self.count - earlier.count
+        histogram.total_ns = self.total_ns - earlier.total_ns
+        histogram.max_ns = self.max_ns if histogram.count else 0
+        return histogram
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        return {
+            "count": self.count,
+            "mean_ms": (
+                round(self.total_ns / self.count / 1_000_000, 3) if self.count else None
+            ),
+            "max_ms": round(self.max_ns / 1_000_000, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets_us": dict(
+                zip(
+                    [*map(str, LATENCY_BUCKETS_US), "inf"],
+                    self.counts,
+                    strict=True,
+                )
+            ),
+        }
+
+
+class IngestTimings:
+    """Per-entry latency histograms of every ingest stage and the throughput.
+
+    Per-reading logging is kept at DEBUG; instead, one INFO line per summary
+    interval reports the readings processed, the rejects and the slowest meter.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the histograms."""
+        self.stages = {stage: LatencyHistogram() for stage in STAGES}
+        self.readings = 0
+        self.rejected = 0
+        # Slowest reading since the last summary line
+        self.slowest_ns = 0
+        self.slowest_cpe: str | None = None
+        self._summary_readings = 0
+        self._summary_rejected = 0
+        # Readings per second over the last throughput interval
+        self.throughput: float | None = None
+        self._sampled_readings = 0
+        self._sampled_at = time.monotonic()
+
+    def percentile(self, percent: float, stage: str = STAGE_READING) -> float | None:
+        """Return a percentile of a stage in milliseconds."""
+        return self.stages[stage].percentile(percent)
+
+    def record_reading(self, cpe: str, duration_ns: int) -> None:
+        """Record the total duration of one applied reading."""
+        self.stages[STAGE_READING].record(duration_ns)
+        self.readings += 1
+        if duration_ns > self.slowest_ns:
+            self.slowest_ns = duration_ns
+            self.slowest_cpe = cpe
+
+    @callback
+    def async_start(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Sample the throughput periodically until the entry unloads."""
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass,
+                self._async_sample_throughput,
+                timedelta(seconds=THROUGHPUT_INTERVAL),
+                cancel_on_shutdown=True,
+            )
+        )
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass,
+                self._async_log_summary,
+                timedelta(seconds=LOG_SUMMARY_INTERVAL),
+                cancel_on_shutdown=True,
+            )
+        )
+
+    @callback
+    def _async_log_summary(self, _now: datetime | None = None) -> None:
+        """Log the readings and rejects since the previous summary."""
+        readings = self.readings - self._summary_readings
+        rejected = self.rejected - self._summary_rejected
+        if readings or rejected:
+            _LOGGER.info(
+                "Processed %d readings and rejected %d in the last %d s; "
+                "slowest was %.1f ms for CPE %s",
+                readings,
+                rejected,
+                LOG_SUMMARY_INTERVAL,
+                self.slowest_ns / 1_000_000,
+                self.slowest_cpe,
+            )
+        self._summary_readings = self.readings
+        self._summary_rejected = self.rejected
+        self.slowest_ns = 0
+        self.slowest_cpe = None
+
+    @callback
+    def _async_sample_throughput(self, _now: datetime | None = None) -> None:
+        """Compute the throughput since the previous sample."""
+        now = time.monotonic()
+        if (elapsed := now - self._sampled_at) > 0:
+            self.throughput = round(
+                (self.readings - self._sampled_readings) / elapsed, 2
+            )
+        self._sampled_readings = self.readings
+        self._sampled_at = now
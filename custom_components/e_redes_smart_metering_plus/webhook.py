@@ -2,26 +2,87 @@
 
 from __future__ import annotations
 
+from datetime import datetime
+from functools import partial
 import json
 import logging
+import time
 from typing import Any
 
-from aiohttp.web import Request, Response
+from aiohttp.web import Request, Response, json_response
 
 from homeassistant.components import cloud, webhook
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 
-from .const import DOMAIN, MANUFACTURER, MODEL, SENSOR_MAPPING, WEBHOOK_ID
-from .sensor import async_ensure_calculated_sensors, async_ensure_sensors_for_data
+from .capture import PayloadCapture
+from .const import (
+    CAPTURE_DIRECTORY,
+    CONF_CAPTURE_PAYLOADS,
+    CONF_FAST_ACK,
+    CONF_QUEUE_SIZE,
+    DEFAULT_QUEUE_SIZE,
+    DOMAIN,
+    MAX_BATCH_SIZE,
+    NDJSON_CONTENT_TYPES,
+    NDJSON_MAX_LINE_BYTES,
+    NDJSON_MAX_LINES,
+    QUEUE_RETRY_AFTER,
+    STAGE_DECODE,
+    STAGE_DISPATCH,
+    STAGE_ENSURE_DEVICE,
+    STAGE_ENSURE_ENTITIES,
+    WEBHOOK_ID,
+)
+from .derivation import async_get_engine
+from .ingest import ReadingQueue
+from .reading import SIGNAL_READING, Reading, parse_clock, resolve_clock
+from .runtime import EredesSmartMeteringPlusConfigEntry
+from .sensor import async_ensure_sensors_for_data
 
 _LOGGER = logging.getLogger(__name__)
 
+ERROR_QUEUE_FULL = "Queue full"
 
-async def async_setup_webhook(hass: HomeAssistant, entry: ConfigEntry) -> str:
-    """Set up webhook for receiving E-Redes data."""
+
+@callback
+def async_setup_ingest(
+    hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry
+) -> None:
+    """Create the optional payload capture and fast-ack queue of an entry.
+
+    Runs before the platforms are set up, which expose their counters; the
+    queue worker is started with the webhook.
+    """
+    runtime = entry.runtime_data
+
+    # Raw bodies are captured to files in the config dir when enabled
+    if entry.options.get(CONF_CAPTURE_PAYLOADS, False):
+        capture = PayloadCapture(hass, hass.config.path(CAPTURE_DIRECTORY))
+        capture.async_start(entry)
+        runtime.capture = capture
+        _LOGGER.info("Capturing webhook payloads to %s", capture.path)
+
+    # In fast-ack mode readings are applied by a background worker
+    if entry.options.get(CONF_FAST_ACK, False):
+        queue = ReadingQueue(
+            hass,
+            entry,
+            entry.options.get(CONF_QUEUE_SIZE, DEFAULT_QUEUE_SIZE),
+            partial(async_process_reading, hass, entry),
+        )
+        runtime.queue = queue
+        _LOGGER.info("Fast-ack mode enabled with queue size %d", queue.maxsize)
+
+
+async def async_setup_webhook(
+    hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry
+) -> str:
+    """Set up webhook for receiving E-Redes data.
+
+    Called once the platforms are set up, so every reading can add entities.
+    """
     # Use fixed webhook ID
     webhook_id = WEBHOOK_ID
 
@@ -60,13 +121,14 @@ async def async_setup_webhook(hass: HomeAssistant, entry: ConfigEntry) -> str:
         entry, data={**entry.data, "webhook_id": webhook_id, "webhook_url": webhook_url}
     )
 
-    # Also store webhook URL in integration data for easy access
-    if DOMAIN not in hass.data:
-        hass.data[DOMAIN] = {}
-    if entry.entry_id not in hass.data[DOMAIN]:
-        hass.data[DOMAIN][entry.entry_id] = {}
-    hass.data[DOMAIN][entry.entry_id]["webhook_url"] = webhook_url
-    hass.data[DOMAIN][entry.entry_id]["webhook_id"] = webhook_id
+    # Also store webhook URL in the runtime state for easy access
+    runtime = entry.runtime_data
+    runtime.webhook_url = webhook_url
+    runtime.webhook_id = webhook_id
+
+    # Readings only arrive now, so the worker can add entities right away
+    if runtime.queue is not None:
+        runtime.queue.async_start()
 
     return webhook_id
 
@@ -84,48 +146,339 @@ async def async_unload_webhook(hass: HomeAssistant, webhook_id: str) -> None:
 
 
 async def handle_webhook(
-    hass: HomeAssistant, webhook_id: str, request: Request, entry: ConfigEntry
+    hass: HomeAssistant,
+    webhook_id: str,
+    request: Request,
+    entry: EredesSmartMeteringPlusConfigEntry,
 ) -> Response:
     """Handle incoming webhook data."""
     try:
-        _LOGGER.info("Webhook handler called with webhook_id: %s", webhook_id)
-
-        data = await request.json()
-        _LOGGER.info("Received webhook data: %s", data)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Webhook handler called with webhook_id: %s", webhook_id)
 
-        # Validate required fields
-        if "cpe" not in data:
-            _LOGGER.error("Missing 'cpe' field in webhook data")
-            return Response(status=400, text="Missing 'cpe' field")
+        # Newline-delimited JSON is parsed incrementally, one reading per line
+        if request.content_type in NDJSON_CONTENT_TYPES:
+            return await async_handle_ndjson(hass, entry, request)
 
-        cpe = data["cpe"]
-        _LOGGER.info("Processing data for CPE: %s", cpe)
-
-        # Ensure device exists
-        _LOGGER.debug("Creating/ensuring device for CPE: %s", cpe)
-        await async_ensure_device(hass, entry, cpe)
-        _LOGGER.debug("Device ensured for CPE: %s", cpe)
+        # Bodies are captured before decoding, so invalid ones are kept too;
+        # the request caches the body for json()
+        if (capture := entry.runtime_data.capture) is not None:
+            capture.async_capture(await request.read())
 
-        # Process sensor data
-        _LOGGER.debug("Processing sensor data for CPE: %s", cpe)
-        await async_process_sensor_data(hass, entry, cpe, data)
-        _LOGGER.debug("Sensor data processed for CPE: %s", cpe)
+        start = time.perf_counter_ns()
+        data = await request.json()
+        entry.runtime_data.timings.stages[STAGE_DECODE].record(
+            time.perf_counter_ns() - start
+        )
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Received webhook data: %s", data)
 
-        _LOGGER.info("Webhook processing completed successfully for CPE: %s", cpe)
-        return Response(status=200, text="OK")
+        return await async_handle_payload(hass, entry, data)
 
     except json.JSONDecodeError as err:
         _LOGGER.error("Invalid JSON in webhook request: %s", err)
+        entry.runtime_data.timings.rejected += 1
         return Response(status=400, text="Invalid JSON")
     except Exception as err:
         _LOGGER.exception("Error processing webhook")
+        entry.runtime_data.timings.rejected += 1
         return Response(status=500, text=f"Internal Server Error: {err}")
 
 
+async def async_handle_payload(
+    hass: HomeAssistant,
+    entry: EredesSmartMeteringPlusConfigEntry,
+    data: Any,
+    reapply: bool = False,
+) -> Response:
+    """Apply a decoded JSON payload holding one reading or a batch.
+
+    With ``reapply``, as when replaying seen readings, the readings skip the
+    reading filter and are applied directly rather than queued.
+    """
+    # Batched payloads carry many readings (possibly for many CPEs)
+    readings = _extract_batch(data)
+    if readings is not None:
+        return await async_handle_batch(hass, entry, readings, reapply)
+
+    # Validate required fields
+    if not isinstance(data, dict) or "cpe" not in data:
+        _LOGGER.error("Missing 'cpe' field in webhook data")
+        entry.runtime_data.timings.rejected += 1
+        return Response(status=400, text="Missing 'cpe' field")
+
+    cpe = data["cpe"]
+
+    # In fast-ack mode, acknowledge as soon as the reading is queued
+    queue = entry.runtime_data.queue
+    if queue is not None and not reapply:
+        if not queue.async_put(data):
+            _LOGGER.warning("Ingest queue full, rejecting reading for CPE: %s", cpe)
+            entry.runtime_data.async_get_cpe(cpe).rejected += 1
+            entry.runtime_data.timings.rejected += 1
+            return _queue_full_response(text=ERROR_QUEUE_FULL)
+        return Response(status=200, text="OK")
+
+    await async_process_reading(hass, entry, data, reapply)
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug("Webhook processing completed for CPE: %s", cpe)
+    return Response(status=200, text="OK")
+
+
+def _extract_batch(data: Any) -> list[Any] | None:
+    """Return the readings of a batched payload, or None for a single reading.
+
+    A batch is either a JSON array of readings or an object with a
+    ``readings`` array, e.g. ``{"readings": [{"cpe": ...}, ...]}``.
+    """
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and "cpe" not in data:
+        readings = data.get("readings")
+        if isinstance(readings, list):
+            return readings
+    return None
+
+
+async def async_handle_batch(
+    hass: HomeAssistant,
+    entry: EredesSmartMeteringPlusConfigEntry,
+    readings: list[Any],
+    reapply: bool = False,
+) -> Response:
+    """Process a batch of readings and return a per-item status summary."""
+    if not readings:
+        _LOGGER.error("Empty batch in webhook data")
+        return Response(status=400, text="Empty batch")
+
+    if len(readings) > MAX_BATCH_SIZE:
+        _LOGGER.error(
+            "Batch of %d readings exceeds the limit of %d",
+            len(readings),
+            MAX_BATCH_SIZE,
+        )
+        entry.runtime_data.timings.rejected += len(readings)
+        return Response(status=413, text=f"Batch exceeds {MAX_BATCH_SIZE} readings")
+
+    results: list[dict[str, Any]] = []
+    accepted = 0
+
+    for index, data in enumerate(readings):
+        error = await _async_process_reading(hass, entry, data, reapply)
+        result: dict[str, Any] = {"index": index}
+        if isinstance(data, dict) and "cpe" in data:
+            result["cpe"] = data["cpe"]
+        if error is None:
+            accepted += 1
+            result["status"] = "ok"
+        else:
+            result["status"] = "error"
+            result["error"] = error
+        results.append(result)
+
+    entry.runtime_data.timings.rejected += len(readings) - accepted
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug(
+            "Batch processing completed: %d accepted, %d rejected",
+            accepted,
+            len(readings) - accepted,
+        )
+    summary = {
+        "accepted": accepted,
+        "rejected": len(readings) - accepted,
+        "results": results,
+    }
+    if any(result.get("error") == ERROR_QUEUE_FULL for result in results):
+        return _queue_full_response(body=summary)
+    return json_response(summary)
+
+
+async def async_handle_ndjson(
+    hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry, request: Request
+) -> Response:
+    """Process a newline-delimited JSON stream one reading at a time.
+
+    Lines are read from the request body as they arrive, so memory use stays
+    flat no matter how many readings a relay flushes in one request.
+    """
+    errors: list[dict[str, Any]] = []
+    timings = entry.runtime_data.timings
+    decode_histogram = timings.stages[STAGE_DECODE]
+    capture = entry.runtime_data.capture
+    accepted = 0
+    line_number = 0
+    readings = 0
+
+    while True:
+        try:
+            line = await request.content.readline()
+        except ValueError:
+            # aiohttp refuses lines larger than its internal buffer
+            _LOGGER.error("NDJSON line %d exceeds the stream buffer", line_number + 1)
+            timings.rejected += len(errors) + 1
+            return _ndjson_summary(accepted, errors, status=413)
+
+        if not line:
+            break
+        line_number += 1
+
+        line = line.strip()
+        if not line:
+            continue
+
+        readings += 1
+        if readings > NDJSON_MAX_LINES:
+            _LOGGER.error(
+                "NDJSON stream exceeds the limit of %d readings", NDJSON_MAX_LINES
+            )
+            timings.rejected += len(errors) + 1
+            return _ndjson_summary(accepted, errors, status=413)
+
+        # Each line is captured as a body of its own, before decoding. Oversized
+        # lines are cut one byte past the limit, so replays still reject them
+        if capture is not None:
+            capture.async_capture(line[: NDJSON_MAX_LINE_BYTES + 1])
+
+        if len(line) > NDJSON_MAX_LINE_BYTES:
+            errors.append({"line": line_number, "error": "Line too long"})
+            continue
+
+        start = time.perf_counter_ns()
+        try:
+            data = json.loads(line)
+        except ValueError:
+            errors.append({"line": line_number, "error": "Invalid JSON"})
+            continue
+        decode_histogram.record(time.perf_counter_ns() - start)
+
+        error = await _async_process_reading(hass, entry, data)
+        if error is None:
+            accepted += 1
+        else:
+            errors.append({"line": line_number, "error": error})
+
+    timings.rejected += len(errors)
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug(
+            "NDJSON processing completed: %d accepted, %d rejected",
+            accepted,
+            len(errors),
+        )
+    return _ndjson_summary(accepted, errors)
+
+
+def _ndjson_summary(
+    accepted: int, errors: list[dict[str, Any]], status: int = 200
+) -> Response:
+    """Build the response summary for an NDJSON stream."""
+    summary = {"accepted": accepted, "rejected": len(errors), "errors": errors}
+    if status == 200 and any(error["error"] == ERROR_QUEUE_FULL for error in errors):
+        return _queue_full_response(body=summary)
+    return json_response(summary, status=status)
+
+
+def _queue_full_response(
+    text: str | None = None, body: dict[str, Any] | None = None
+) -> Response:
+    """Build a 429 response asking the sender to retry later."""
+    headers = {"Retry-After": str(QUEUE_RETRY_AFTER)}
+    if body is not None:
+        return json_response(body, status=429, headers=headers)
+    return Response(status=429, text=text, headers=headers)
+
+
+async def _async_process_reading(
+    hass: HomeAssistant,
+    entry: EredesSmartMeteringPlusConfigEntry,
+    data: Any,
+    reapply: bool = False,
+) -> str | None:
+    """Process one reading of a batch or stream, returning an error or None."""
+    if not isinstance(data, dict) or "cpe" not in data:
+        return "Missing 'cpe' field"
+
+    cpe = data["cpe"]
+
+    queue = entry.runtime_data.queue
+    if queue is not None and not reapply:
+        if queue.async_put(data):
+            return None
+        entry.runtime_data.async_get_cpe(cpe).rejected += 1
+        return ERROR_QUEUE_FULL
+
+    try:
+        await async_process_reading(hass, entry, data, reapply)
+    except Exception as err:
+        _LOGGER.exception("Error processing reading for CPE: %s", cpe)
+        return str(err)
+
+    return None
+
+
+async def async_process_reading(
+    hass: HomeAssistant,
+    entry: EredesSmartMeteringPlusConfigEntry,
+    data: dict[str, Any],
+    reapply: bool = False,
+) -> None:
+    """Apply a single validated reading to its device and entities.
+
+    Duplicate and out-of-order readings are dropped before any entity work;
+    a reading's clock is only recorded once it has been applied. A reading
+    reapplied from a replay skips that check, but when it is older than the
+    meter's last clock it only ensures the device and entities, so the
+    snapshot never rolls back.
+    """
+    cpe = data["cpe"]
+    runtime = entry.runtime_data
+    cpe_runtime = runtime.async_get_cpe(cpe)
+    clock = resolve_clock(parse_clock(data.get("clock")), cpe_runtime.clock)
+    if not reapply and not runtime.reading_filter.async_check(cpe_runtime, clock):
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Ignoring duplicate or out-of-order reading for CPE %s at %s",
+                cpe,
+                data.get("clock"),
+            )
+        return
+
+    outdated = (
+        clock is not None
+        and cpe_runtime.clock is not None
+        and clock < cpe_runtime.clock
+    )
+    if not outdated:
+        cpe_runtime.arrival = time.time()
+        if clock is not None:
+            cpe_runtime.skew = cpe_runtime.arrival - clock.timestamp()
+
+    timings = runtime.timings
+    start = time.perf_counter_ns()
+    try:
+        await async_ensure_device(hass, entry, cpe)
+        timings.stages[STAGE_ENSURE_DEVICE].record(time.perf_counter_ns() - start)
+
+        if outdated:
+            await async_ensure_sensors_for_data(hass, entry.entry_id, cpe, data)
+        else:
+            await async_process_sensor_data(hass, entry, cpe, data, clock)
+    except Exception:
+        cpe_runtime.failed += 1
+        raise
+    runtime.reading_filter.async_record(cpe_runtime, clock)
+    timings.record_reading(cpe, time.perf_counter_ns() - start)
+    cpe_runtime.readings += 1
+
+
 async def async_ensure_device(
-    hass: HomeAssistant, entry: ConfigEntry, cpe: str
+    hass: HomeAssistant, entry: EredesSmartMeteringPlusConfigEntry, cpe: str
 ) -> None:
     """Ensure device exists for the given CPE."""
+    # Known meters skip the device registry entirely
+    cpe_runtime = entry.runtime_data.async_get_cpe(cpe)
+    if cpe_runtime.device_id is not None:
+        return
+
     device_registry = dr.async_get(hass)
 
     # Check if device already exists
@@ -135,11 +488,7 @@ async def async_ensure_device(
         # Create new device
         device = device_registry.async_get_or_create(
             config_entry_id=entry.entry_id,  # Use the actual config entry ID
-            identifiers={(DOMAIN, cpe)},
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-            name=f"E-Redes Smart Meter {cpe}",
-            sw_version=None,
+            **cpe_runtime.device_info,
         )
         _LOGGER.info("Created new device for CPE: %s", cpe)
 
@@ -153,50 +502,38 @@ async def async_ensure_device(
 
         async_create_breaker_overload_sensor(hass, entry.entry_id, cpe)
 
+    cpe_runtime.device_id = device.id
+
 
 async def async_process_sensor_data(
-    hass: HomeAssistant, entry: ConfigEntry, cpe: str, data: dict[str, Any]
+    hass: HomeAssistant,
+    entry: EredesSmartMeteringPlusConfigEntry,
+    cpe: str,
+    data: dict[str, Any],
+    clock: datetime | None = None,
 ) -> None:
     """Process sensor data and update entities."""
-    # Ensure sensors exist for this data
-    await async_ensure_sensors_for_data(hass, entry.entry_id, cpe, data)
+    runtime = entry.runtime_data
+    start = time.perf_counter_ns()
 
-    # Send update signal for each sensor type
-    for field_name, field_value in data.items():
-        if field_name == "cpe":
-            continue
-
-        if field_name in SENSOR_MAPPING:
-            sensor_key = SENSOR_MAPPING[field_name]["key"]
-
-            # Dispatch update to sensor entity
-            async_dispatcher_send(
-                hass,
-                f"{DOMAIN}_{cpe}_{sensor_key}_update",
-                field_value,
-                data.get("clock"),  # Include timestamp if available
-            )
-
-            _LOGGER.debug(
-                "Dispatched update for sensor %s_%s with value %s",
-                cpe,
-                sensor_key,
-                field_value,
-            )
-        else:
-            _LOGGER.debug("Unknown field in webhook data: %s", field_name)
-
-    # Ensure calculated sensors exist after processing source sensors
-    await async_ensure_calculated_sensors(hass, entry.entry_id, cpe)
-
-    # Ensure diagnostic sensors exist
-    from .sensor import async_ensure_diagnostic_sensors
-
-    await async_ensure_diagnostic_sensors(hass, entry.entry_id, cpe)
+    # Ensure raw, calculated and diagnostic sensors exist before the reading
+    # is routed
+    await async_ensure_sensors_for_data(hass, entry.entry_id, cpe, data)
 
-    # Send webhook update signal for diagnostic sensors
-    async_dispatcher_send(
-        hass,
-        f"{DOMAIN}_{cpe}_webhook_update",
-        data.get("clock"),  # Include timestamp if available
-    )
+    # The derivation engine keeps the CPE's raw snapshot, so it must see
+    # every reading even before any calculated sensor exists
+    async_get_engine(hass, entry.entry_id, cpe)
+    ensured = time.perf_counter_ns()
+    runtime.timings.stages[STAGE_ENSURE_ENTITIES].record(ensured - start)
+
+    # A single dispatch per reading; the CPE's router fans it out to the
+    # entities subscribed to the fields it carries
+    reading = Reading.from_data(cpe, data, clock)
+    async_dispatcher_send(hass, SIGNAL_READING.format(cpe), reading)
+    runtime.timings.stages[STAGE_DISPATCH].record(time.perf_counter_ns() - ensured)
+
+    runtime.snapshot.async_schedule_save()
+    if _LOGGER.isEnabledFor(logging.DEBUG):
+        _LOGGER.debug(
+            "Dispatched reading for CPE %s with %d values", cpe, len(reading.values)
+        )
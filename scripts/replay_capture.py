@@ -0,0 +1,167 @@
+"""Replay captured E-Redes webhook payloads against Home Assistant.
+
+Posts the bodies recorded by the integration's payload capture option to a
+running instance, unchanged, so they take the same path as live traffic::
+
+    python scripts/replay_capture.py capture/payloads*.ndjson.gz --speed 1
+
+With ``--speed 1`` the original arrival times are kept; ``--speed 0`` (the
+default) posts as fast as possible. The run ends with the throughput and
+request latency percentiles. Given a long-lived access token with
+``--token``, the integration's diagnostics are read before and after the
+replay to report the latency of every ingest stage as well.
+
+Bodies go through the instance's live ingest path, so readings it has
+already applied are dropped as duplicates or out-of-order. Replay against a
+fresh test instance, or use the integration's replay action with
+``reapply`` to apply seen readings again.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Iterator
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Any
+
+import aiohttp
+
+try:
+    from scripts.simulate_push import WEBHOOK_PATH, async_push
+except ImportError:
+    # Run as ``python scripts/replay_capture.py``, with scripts/ on the path
+    from simulate_push import WEBHOOK_PATH, async_push
+
+_LOGGER = logging.getLogger("replay_capture")
+
+DOMAIN = "e_redes_smart_metering_plus"
+
+
+def read_capture(paths: list[str]) -> Iterator[tuple[float, bytes]]:
+    """Yield ``(offset in seconds, body)`` of capture files, in file order."""
+    first_received: float | None = None
+    for path in paths:
+        with gzip.open(path, "rb") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    received = float(record["received"])
+                    body = record["body"].encode()
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    _LOGGER.warning("Skipping malformed capture record in %s", path)
+                    continue
+                if first_received is None:
+                    first_received = received
+                yield received - first_received, body
+
+
+def stage_percentiles(
+    before: dict[str, Any], after: dict[str, Any]
+) -> dict[str, dict[str, Any]]:
+    """Return per-stage counts and percentiles between two diagnostics dumps."""
+    stages = {}
+    for stage, histogram in after["ingest"]["stages"].items():
+        earlier = before["ingest"]["stages"].get(stage, {}).get("buckets_us", {})
+        buckets = [
+            (bound, count - earlier.get(bound, 0))
+            for bound, count in histogram["buckets_us"].items()
+        ]
+        total = sum(count for _, count in buckets)
+        result: dict[str, Any] = {"count": total}
+        for percent in (50, 95, 99):
+            result[f"p{percent}_ms"] = _bucket_percentile(
+                buckets, total, percent, histogram["max_ms"]
+            )
+        stages[stage] = result
+    return stages
+
+
+def _bucket_percentile(
+    buckets: list[tuple[str, int]], total: int, percent: float, max_ms: float
+) -> float | None:
+    """Return the upper bound in milliseconds of a percentile's bucket."""
+    if not total:
+        return None
+    seen = 0
+    for bound, count in buckets:
+        seen += count
+        if seen >= total * percent / 100:
+            return max_ms if bound == "inf" else int(bound) / 1000
+    return max_ms
+
+
+async def _async_diagnostics(
+    session: aiohttp.ClientSession, url: str, token: str
+) -> dict[str, Any]:
+    """Return the config entry diagnostics of the integration."""
+    headers = {"Authorization": f"Bearer {token}"}
+    async with session.get(
+        f"{url}/api/config/config_entries/entry",
+        params={"domain": DOMAIN},
+        headers=headers,
+    ) as response:
+        response.raise_for_status()
+        entry_id = (await response.json())[0]["entry_id"]
+    async with session.get(
+        f"{url}/api/diagnostics/config_entry/{entry_id}", headers=headers
+    ) as response:
+        response.raise_for_status()
+        return (await response.json())["data"]
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    """Replay the capture files against a Home Assistant instance."""
+    url = args.url.rstrip("/")
+    paths = sorted(args.files, key=os.path.getmtime)
+    async with aiohttp.ClientSession() as session:
+
+        async def post(body: bytes) -> int:
+            async with session.post(
+                url + WEBHOOK_PATH,
+                data=body,
+                headers={"Content-Type": "application/json"},
+            ) as response:
+                await response.read()
+                return response.status
+
+        before = (
+            await _async_diagnostics(session, url, args.token) if args.token else None
+        )
+        started = time.monotonic()
+        stats = await async_push(read_capture(paths), post, args.speed)
+        duration = time.monotonic() - started
+        summary = stats.summary()
+        summary["duration_s"] = round(duration, 3)
+        summary["requests_per_s"] = (
+            round(summary["requests"] / duration, 1) if duration else None
+        )
+        _LOGGER.info("Replay completed: %s", json.dumps(summary))
+
+        if before is not None:
+            after = await _async_diagnostics(session, url, args.token)
+            for stage, result in stage_percentiles(before, after).items():
+                _LOGGER.info("Stage %s: %s", stage, json.dumps(result))
+
+
+def main() -> None:
+    """Parse the command line and run the replay."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("files", nargs="+", help="capture files, replayed oldest first")
+    parser.add_argument("--url", default="http://localhost:8123")
+    parser.add_argument(
+        "--speed", type=float, default=0.0, help="1 is the original pace, 0 unpaced"
+    )
+    parser.add_argument("--token", help="long-lived access token for stage timings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    asyncio.run(_async_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Local E-Redes push simulator for soak and replay testing.
+
+Posts realistic reading streams to the integration's webhook, the way the
+E-Redes push service does, without needing the real provider::
+
+    python scripts/simulate_push.py --meters 50 --duration 3600 --speed 0
+
+Readings carry a simulated meter clock, so hours of traffic can be pushed in
+minutes with ``--speed 0`` (as fast as possible), or in real time with
+``--speed 1``. Jitter, sender retries (duplicates), out-of-order delivery and
+energy counter resets can be mixed in. With ``--soak`` the simulator keeps
+running and logs latency percentiles, and the memory of a local Home
+Assistant process given with ``--pid``, every report interval.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable, Iterator
+import contextlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import heapq
+import logging
+from pathlib import Path
+import random
+import time
+from typing import Any
+
+import aiohttp
+
+_LOGGER = logging.getLogger("simulate_push")
+
+WEBHOOK_PATH = "/api/webhook/e_redes_smart_metering_plus"
+CLOCK_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass(slots=True)
+class SimulatedMeter:
+    """The state of one simulated smart meter."""
+
+    cpe: str
+    rng: random.Random
+    energy_import: float = 0.0
+    energy_export: float = 0.0
+    max_power_import: float = 0.0
+    max_power_export: float = 0.0
+
+    def read(self, clock: datetime, interval: float) -> dict[str, Any]:
+        """Advance the meter by one interval and return its reading."""
+        # A household load with occasional solar export
+        power_import = max(0.0, self.rng.gauss(800.0, 400.0))
+        power_export = max(0.0, self.rng.gauss(0.0, 300.0))
+        self.energy_import += power_import * interval / 3600
+        self.energy_export += power_export * interval / 3600
+        self.max_power_import = max(self.max_power_import, power_import)
+        self.max_power_export = max(self.max_power_export, power_export)
+        return {
+            "cpe": self.cpe,
+            "clock": clock.strftime(CLOCK_FORMAT),
+            "instantaneousActivePowerImport": round(power_import, 1),
+            "maxActivePowerImport": round(self.max_power_import, 1),
+            "activeEnergyImport": round(self.energy_import, 3),
+            "instantaneousActivePowerExport": round(power_export, 1),
+            "maxActivePowerExport": round(self.max_power_export, 1),
+            "activeEnergyExport": round(self.energy_export, 3),
+            "voltageL1": round(self.rng.gauss(230.0, 2.0), 1),
+        }
+
+    def reset_counters(self) -> None:
+        """Reset the energy counters, as after a meter replacement."""
+        self.energy_import = 0.0
+        self.energy_export = 0.0
+
+
+@dataclass(slots=True)
+class PushSimulator:
+    """Generate the push stream of a set of meters.
+
+    Every meter sends one reading per interval. Delivery times are jittered,
+    a share of readings is sent twice (sender retries) or swapped with the
+    meter's next reading (out-of-order delivery), and a share of readings
+    follows an energy counter reset.
+    """
+
+    meters: int = 10
+    interval: float = 15.0
+    jitter: float = 0.0
+    duplicates: float = 0.0
+    reorder: float = 0.0
+    resets: float = 0.0
+    seed: int | None = None
+    start: datetime = field(
+        default_factory=lambda: datetime.now().replace(microsecond=0)
+    )
+    # Counts of what was generated, to check the receiving side against
+    sent: int = field(default=0, init=False)
+    duplicated: int = field(default=0, init=False)
+    reordered: int = field(default=0, init=False)
+    reset: int = field(default=0, init=False)
+    rng: random.Random = field(init=False)
+    _meters: list[SimulatedMeter] = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Create the meters."""
+        self.rng = random.Random(self.seed)
+        self._meters = [
+            SimulatedMeter(f"PT0002{index:012d}SM", random.Random(self.rng.random()))
+            for index in range(self.meters)
+        ]
+        for meter in self._meters:
+            meter.energy_import = self.rng.uniform(1_000.0, 50_000.0)
+            meter.energy_export = self.rng.uniform(0.0, 5_000.0)
+
+    def stream(self, duration: float) -> Iterator[tuple[float, dict[str, Any]]]:
+        """Yield ``(delivery offset in seconds, reading)`` in delivery order.
+
+        The stream covers ``duration`` simulated seconds from ``start``, and
+        moves ``start`` past them, so the next stream continues this one.
+        """
+        deliveries: list[tuple[float, int, dict[str, Any]]] = []
+        sequence = 0
+        held: dict[str, dict[str, Any]] = {}
+
+        def deliver(offset: float, payload: dict[str, Any]) -> None:
+            nonlocal sequence
+            heapq.heappush(deliveries, (offset, sequence, payload))
+            sequence += 1
+            self.sent += 1
+
+        steps = int(duration // self.interval)
+        for step in range(steps):
+            due = step * self.interval
+            clock = self.start + timedelta(seconds=due)
+            for meter in self._meters:
+                if self.rng.random() < self.resets:
+                    meter.reset_counters()
+                    self.reset += 1
+                reading = meter.read(clock, self.interval)
+                offset = due + self.rng.uniform(0.0, self.jitter)
+
+                # Hold the reading back and deliver it after the next one
+                if meter.cpe not in held and self.rng.random() < self.reorder:
+                    held[meter.cpe] = reading
+                    continue
+
+                deliver(offset, reading)
+                if (late := held.pop(meter.cpe, None)) is not None:
+                    deliver(offset + self.rng.uniform(0.0, 1.0), late)
+                    self.reordered += 1
+                if self.rng.random() < self.duplicates:
+                    deliver(offset + self.rng.uniform(0.0, 5.0), reading)
+                    self.duplicated += 1
+
+            # Emit everything due before the next step, in delivery order
+            horizon = due + self.interval
+            while deliveries and deliveries[0][0] < horizon:
+                delivery, _, payload = heapq.heappop(deliveries)
+                yield delivery, payload
+
+        self.start += timedelta(seconds=steps * self.interval)
+
+        # Readings held back at the end are late, but still the newest
+        for late in held.values():
+            deliver(steps * self.interval, late)
+        while deliveries:
+            delivery, _, payload = heapq.heappop(deliveries)
+            yield delivery, payload
+
+
+@dataclass(slots=True)
+class PushStats:
+    """Request latency and status counts of a simulator run."""
+
+    latencies_ms: list[float] = field(default_factory=list)
+    statuses: dict[int, int] = field(default_factory=dict)
+
+    def record(self, status: int, latency_ms: float) -> None:
+        """Record one request."""
+        self.latencies_ms.append(latency_ms)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def percentile(self, percent: float) -> float | None:
+        """Return a latency percentile in milliseconds."""
+        if not self.latencies_ms:
+            return None
+        ordered = sorted(self.latencies_ms)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return round(ordered[index], 3)
+
+    def summary(self) -> dict[str, Any]:
+        """Return the request count, status counts and latency percentiles."""
+        return {
+            "requests": len(self.latencies_ms),
+            "statuses": dict(sorted(self.statuses.items())),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+        }
+
+
+async def async_push[PayloadT](
+    stream: Iterator[tuple[float, PayloadT]],
+    post: Callable[[PayloadT], Awaitable[int]],
+    speed: float = 0.0,
+    stats: PushStats | None = None,
+) -> PushStats:
+    """Deliver a stream through ``post``, returning the request statistics.
+
+    ``speed`` scales the delivery offsets to wall time: 1 is real time, 60
+    is a minute per second, and 0 posts as fast as possible. Payloads are
+    passed to ``post`` as they are, so recorded bodies can be replayed too.
+    """
+    stats = stats or PushStats()
+    started = time.monotonic()
+    for offset, payload in stream:
+        if speed > 0 and (delay := offset / speed - (time.monotonic() - started)) > 0:
+            await asyncio.sleep(delay)
+        request_start = time.perf_counter()
+        status = await post(payload)
+        stats.record(status, (time.perf_counter() - request_start) * 1000)
+    return stats
+
+
+def process_rss_kib(pid: int) -> int | None:
+    """Return the resident memory of a local process in KiB, if readable."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    return None
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    """Run the simulator against a Home Assistant instance."""
+    url = args.url.rstrip("/") + WEBHOOK_PATH
+    simulator = PushSimulator(
+        meters=args.meters,
+        interval=args.interval,
+        jitter=args.jitter,
+        duplicates=args.duplicates,
+        reorder=args.reorder,
+        resets=args.resets,
+        seed=args.seed,
+    )
+    async with aiohttp.ClientSession() as session:
+
+        async def post(payload: dict[str, Any]) -> int:
+            async with session.post(url, json=payload) as response:
+                await response.read()
+                return response.status
+
+        if not args.soak:
+            stats = await async_push(simulator.stream(args.duration), post, args.speed)
+            _LOGGER.info("Run completed: %s", stats.summary())
+            return
+
+        # Soak: push report-sized chunks of simulated time forever
+        rss_start = process_rss_kib(args.pid) if args.pid else None
+        while True:
+            stats = await async_push(
+                simulator.stream(args.report_every), post, args.speed
+            )
+            rss = process_rss_kib(args.pid) if args.pid else None
+            _LOGGER.info(
+                "%s rss_kib=%s growth_kib=%s",
+                stats.summary(),
+                rss,
+                None if rss is None or rss_start is None else rss - rss_start,
+            )
+
+
+def main() -> None:
+    """Parse the command line and run the simulator."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8123")
+    parser.add_argument("--meters", type=int, default=10)
+    parser.add_argument("--interval", type=float, default=15.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=2.0, help="seconds")
+    parser.add_argument("--duplicates", type=float, default=0.0, help="ratio")
+    parser.add_argument("--reorder", type=float, default=0.0, help="ratio")
+    parser.add_argument("--resets", type=float, default=0.0, help="ratio")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument(
+        "--duration", type=float, default=3600.0, help="simulated seconds"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=0.0, help="1 is real time, 0 is unpaced"
+    )
+    parser.add_argument("--soak", action="store_true")
+    parser.add_argument(
+        "--report-every", type=float, default=900.0, help="simulated seconds"
+    )
+    parser.add_argument("--pid", type=int, help="Home Assistant process id")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_async_main(args))
+
+
+if __name__ == "__main__":
+    main()
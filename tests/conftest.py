@@ -2,14 +2,24 @@
 
 from __future__ import annotations
 
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from datetime import datetime
+import json
+from pathlib import Path
+from typing import Any
 
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.e_redes_smart_metering_plus.const import DOMAIN, WEBHOOK_ID
+from custom_components.e_redes_smart_metering_plus.const import (
+    CAPTURE_DIRECTORY,
+    DOMAIN,
+    WEBHOOK_ID,
+    WEBHOOK_PATH,
+)
 from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import HomeAssistant
+from scripts.simulate_push import PushSimulator, PushStats, async_push
 
 
 @pytest.fixture(autouse=True)
@@ -45,6 +55,13 @@ def _auto_enable_custom_integrations(enable_custom_integrations: bool) -> None:
     return None
 
 
+@pytest.fixture
+def capture_directory(hass: HomeAssistant, tmp_path: Path) -> Path:
+    """Keep payload capture files in a temporary config directory."""
+    hass.config.config_dir = str(tmp_path)
+    return tmp_path / CAPTURE_DIRECTORY
+
+
 @pytest.fixture
 async def config_entry(hass: HomeAssistant) -> AsyncGenerator[MockConfigEntry]:
     """Create and set up a config entry for the integration."""
@@ -67,3 +84,54 @@ async def config_entry(hass: HomeAssistant) -> AsyncGenerator[MockConfigEntry]:
     # Teardown
     assert await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
+
+
+@pytest.fixture
+async def push_simulator(
+    hass: HomeAssistant, hass_client, config_entry: MockConfigEntry
+) -> Callable[..., Awaitable[tuple[PushSimulator, PushStats]]]:
+    """Return a function pushing a simulated reading stream to the webhook.
+
+    It takes the simulated duration in seconds and either the
+    ``PushSimulator`` options or a simulator to continue, and returns the
+    simulator with the request statistics once every reading has been
+    processed.
+    """
+    client = await hass_client()
+
+    url = client.make_url(WEBHOOK_PATH)
+
+    async def post(payload: dict[str, Any]) -> int:
+        # The test client keeps every response it returns; its session does not
+        async with client.session.post(url, json=payload) as response:
+            await response.read()
+            return response.status
+
+    async def push(
+        duration: float, simulator: PushSimulator | None = None, **options: Any
+    ) -> tuple[PushSimulator, PushStats]:
+        if simulator is None:
+            options.setdefault("seed", 0)
+            options.setdefault("start", datetime(2025, 8, 1, 12, 0, 0))
+            simulator = PushSimulator(**options)
+        stats = await async_push(simulator.stream(duration), post)
+        await hass.async_block_till_done()
+        return simulator, stats
+
+    return push
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter) -> None:
+    """Show the metrics recorded by the benchmark and soak tests."""
+    reports = [
+        report
+        for report in terminalreporter.getreports("passed")
+        + terminalreporter.getreports("failed")
+        if report.when == "call" and report.user_properties
+    ]
+    if not reports:
+        return
+    terminalreporter.section("performance")
+    for report in reports:
+        for name, metrics in report.user_properties:
+            terminalreporter.write_line(f"{name}: {json.dumps(metrics)}")
@@ -0,0 +1,231 @@
+"""Ingest benchmarks for the E-Redes Smart Metering Plus integration.
+
+Skipped unless ``EREDES_BENCHMARK=1`` is set. The metrics of every scenario
+are shown in the terminal summary and compared with ``benchmark_baseline.json``,
+failing on a large regression. Throughput and CPU time depend on the machine,
+so they are only reported; the baseline holds what carries over between
+machines: state writes, peak memory and the CPU time of first contact
+relative to steady state, both measured in the same run. Run with
+``EREDES_BENCHMARK=update`` to record a new baseline.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+import gc
+import json
+import os
+from pathlib import Path
+import time
+import tracemalloc
+from typing import Any
+
+import pytest
+
+from custom_components.e_redes_smart_metering_plus.const import WEBHOOK_ID
+from custom_components.e_redes_smart_metering_plus.webhook import handle_webhook
+from homeassistant.const import EVENT_STATE_CHANGED, EVENT_STATE_REPORTED
+from homeassistant.core import Event, HomeAssistant, callback
+
+BENCHMARK = os.environ.get("EREDES_BENCHMARK", "")
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.skipif(not BENCHMARK, reason="set EREDES_BENCHMARK=1 to run"),
+]
+
+# Steady-state readings per scenario, spread evenly over its meters
+STEADY_READINGS = 1000
+
+# Fresh meters timed at first contact, so small scenarios time more than a
+# single request
+FIRST_CONTACT_METERS = 100
+
+# Allowed ratio to the baseline before a metric counts as a regression; the
+# timing ratio is generous because the machine's load skews both phases
+TOLERANCES: dict[str, tuple[str, float]] = {
+    "loop_ratio_to_steady": ("max", 1.5),
+    "writes_per_reading": ("max", 1.1),
+    "peak_memory_kib": ("max", 1.5),
+}
+
+_START = datetime(2025, 8, 1, 12, 0, 0)
+
+
+class BenchmarkRequest:
+    """A minimal request object exposing only an async json() method."""
+
+    content_type = "application/json"
+
+    def __init__(self, payload: dict[str, Any]) -> None:
+        """Initialize with a JSON payload."""
+        self._payload = payload
+
+    async def json(self) -> dict[str, Any]:
+        """Return the JSON payload."""
+        return self._payload
+
+
+def _reading(cpe_index: int, step: int) -> dict[str, Any]:
+    """Return a full 15-second reading of a meter that varies every step."""
+    power = 500.0 + (step * 137 + cpe_index * 31) % 2500
+    return {
+        "cpe": f"PT00020000BENCH{cpe_index:05d}",
+        "clock": (_START + timedelta(seconds=15 * step)).isoformat(sep=" "),
+        "instantaneousActivePowerImport": power,
+        "maxActivePowerImport": 3000.0 + step,
+        "activeEnergyImport": 10_000.0 + step * 5,
+        "instantaneousActivePowerExport": 0.0,
+        "maxActivePowerExport": 0.0,
+        "activeEnergyExport": 2_000.0,
+        "voltageL1": 228.0 + step % 5,
+    }
+
+
+def _readings(cpes: int, steps: range) -> list[dict[str, Any]]:
+    """Return one reading per meter for every step, interleaving the meters."""
+    return [_reading(index, step) for step in steps for index in range(cpes)]
+
+
+async def _async_measure(
+    hass: HomeAssistant,
+    entry,
+    readings: list[dict[str, Any]],
+    trace_memory: bool = False,
+) -> dict[str, float]:
+    """Post readings through handle_webhook and return the ingest metrics."""
+    writes = 0
+
+    @callback
+    def _count_write(_event_data: Any) -> bool:
+        nonlocal writes
+        writes += 1
+        return False
+
+    @callback
+    def _ignore(_event: Event) -> None:
+        """Never called, the filter counts and drops every event."""
+
+    unsubs: list[Callable[[], None]] = [
+        hass.bus.async_listen(event_type, _ignore, event_filter=_count_write)
+        for event_type in (EVENT_STATE_CHANGED, EVENT_STATE_REPORTED)
+    ]
+    requests = [BenchmarkRequest(reading) for reading in readings]
+
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for request in requests:
+        response = await handle_webhook(hass, WEBHOOK_ID, request, entry)
+        assert response.status == 200
+    await hass.async_block_till_done()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    for unsub in unsubs:
+        unsub()
+    count = len(readings)
+    return {
+        "readings": count,
+        "requests_per_s": round(count / wall, 1),
+        "loop_ms_per_reading": round(cpu * 1000 / count, 4),
+        "writes_per_reading": round(writes / count, 3),
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+async def _async_run_phase(
+    hass: HomeAssistant,
+    entry,
+    make_readings: Callable[[int], list[dict[str, Any]]],
+) -> dict[str, float]:
+    """Measure a phase, then its peak memory on a fresh copy of it.
+
+    Memory tracing slows Python down, so timings come from an untraced run.
+    """
+    metrics = await _async_measure(hass, entry, make_readings(0))
+    traced = await _async_measure(hass, entry, make_readings(1), trace_memory=True)
+    metrics["peak_memory_kib"] = traced["peak_memory_kib"]
+    return metrics
+
+
+def _check_regressions(name: str, metrics: dict[str, float]) -> list[str]:
+    """Return the metrics of a scenario that regressed against the baseline."""
+    if not BASELINE_PATH.exists():
+        return []
+    baseline = json.loads(BASELINE_PATH.read_text()).get(name)
+    if baseline is None:
+        return []
+    regressions = []
+    for metric, (bound, ratio) in TOLERANCES.items():
+        if not baseline.get(metric):
+            continue
+        limit = baseline[metric] * ratio
+        value = metrics[metric]
+        if (bound == "min" and value < limit) or (bound == "max" and value > limit):
+            regressions.append(
+                f"{name} {metric}: {value} vs baseline {baseline[metric]}"
+            )
+    return regressions
+
+
+def _update_baseline(results: dict[str, dict[str, float]]) -> None:
+    """Merge the results into the baseline file."""
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    baseline.update(results)
+    BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.mark.parametrize("cpes", [1, 100, 1000])
+async def test_ingest_benchmark(
+    hass: HomeAssistant,
+    config_entry,
+    record_property: Callable[[str, object], None],
+    cpes: int,
+) -> None:
+    """Benchmark first contact and steady-state ingest for a number of meters."""
+    steps = max(1, STEADY_READINGS // cpes)
+    meters = max(cpes, FIRST_CONTACT_METERS)
+
+    # First contact creates the devices and entities of every meter; the
+    # traced copy uses a second set of meters
+    first_contact = await _async_run_phase(
+        hass,
+        config_entry,
+        lambda copy: [_reading(index + copy * meters, 0) for index in range(meters)],
+    )
+    # Steady state only updates entities that already exist
+    steady = await _async_run_phase(
+        hass,
+        config_entry,
+        lambda copy: _readings(cpes, range(1 + copy * steps, 1 + (copy + 1) * steps)),
+    )
+    first_contact["loop_ratio_to_steady"] = round(
+        first_contact["loop_ms_per_reading"] / steady["loop_ms_per_reading"], 2
+    )
+
+    results = {
+        f"cpes_{cpes}_first_contact": first_contact,
+        f"cpes_{cpes}_steady": steady,
+    }
+    for name, metrics in results.items():
+        record_property(name, metrics)
+
+    if BENCHMARK == "update":
+        _update_baseline(results)
+        return
+
+    regressions = [
+        regression
+        for name, metrics in results.items()
+        for regression in _check_regressions(name, metrics)
+    ]
+    assert not regressions, "\n".join(regressions)
@@ -0,0 +1,118 @@
+"""Payload capture tests for the E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+import gzip
+import json
+import os
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.e_redes_smart_metering_plus.capture import PayloadCapture
+from custom_components.e_redes_smart_metering_plus.const import (
+    CAPTURE_DIRECTORY,
+    CAPTURE_FILE_NAME,
+    CAPTURE_FLUSH_INTERVAL,
+    CONF_CAPTURE_PAYLOADS,
+    DOMAIN,
+    NDJSON_MAX_LINE_BYTES,
+    WEBHOOK_ID,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+
+def _read_capture(path: str) -> list[dict]:
+    with gzip.open(path, "rt") as file:
+        return [json.loads(line) for line in file]
+
+
+async def test_payloads_are_captured(
+    hass: HomeAssistant, hass_client, capture_directory
+) -> None:
+    """Raw bodies should be written in the background when capture is on."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"webhook_id": WEBHOOK_ID},
+        options={CONF_CAPTURE_PAYLOADS: True},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = await hass_client()
+    body = '{"cpe": "CAPTURE1", "clock": "2025-08-01 12:00:00", "voltageL1": 230.0}'
+    resp = await client.post(
+        f"/api/webhook/{WEBHOOK_ID}",
+        data=body,
+        headers={"Content-Type": "application/json"},
+    )
+    assert resp.status == 200
+    resp = await client.post(
+        f"/api/webhook/{WEBHOOK_ID}",
+        data=b'{"cpe": "CAPTURE1", "clock": "2025-08-01 12:00:15"}\n{"cpe": "CAPTURE2"}\n',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status == 200
+    # Bodies that fail to decode are captured, oversized lines truncated
+    resp = await client.post(
+        f"/api/webhook/{WEBHOOK_ID}",
+        data='{"cpe": "CAPTURE1", ',
+        headers={"Content-Type": "application/json"},
+    )
+    assert resp.status == 400
+    oversized = b'{"cpe": "' + b"X" * NDJSON_MAX_LINE_BYTES + b'"}'
+    resp = await client.post(
+        f"/api/webhook/{WEBHOOK_ID}",
+        data=b"not json\n" + oversized + b"\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    path = hass.config.path(CAPTURE_DIRECTORY, CAPTURE_FILE_NAME)
+    assert not os.path.exists(path)
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=CAPTURE_FLUSH_INTERVAL + 1)
+    )
+    await hass.async_block_till_done()
+
+    records = await hass.async_add_executor_job(_read_capture, path)
+    assert [record["body"] for record in records] == [
+        body,
+        '{"cpe": "CAPTURE1", "clock": "2025-08-01 12:00:15"}',
+        '{"cpe": "CAPTURE2"}',
+        '{"cpe": "CAPTURE1", ',
+        "not json",
+        oversized[: NDJSON_MAX_LINE_BYTES + 1].decode(),
+    ]
+    assert all(isinstance(record["received"], float) for record in records)
+
+    # Bodies captured after the last flush are written at unload
+    resp = await client.post(f"/api/webhook/{WEBHOOK_ID}", json={"cpe": "CAPTURE3"})
+    assert resp.status == 200
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    records = await hass.async_add_executor_job(_read_capture, path)
+    assert json.loads(records[-1]["body"]) == {"cpe": "CAPTURE3"}
+
+
+def test_capture_files_rotate(hass: HomeAssistant, tmp_path) -> None:
+    """Full capture files should be rotated, keeping a bounded number."""
+    capture = PayloadCapture(hass, str(tmp_path), max_bytes=1, backup_count=2)
+    for index in range(4):
+        capture.write([(float(index), f'{{"cpe": "ROTATE{index}"}}'.encode())])
+
+    assert sorted(os.listdir(tmp_path)) == [
+        "payloads.1.ndjson.gz",
+        "payloads.2.ndjson.gz",
+        "payloads.ndjson.gz",
+    ]
+    assert _read_capture(capture.path)[0]["received"] == 3.0
+    assert _read_capture(capture.rotated_path(2))[0]["received"] == 1.0
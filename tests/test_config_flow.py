@@ -4,7 +4,13 @@ from __future__ import annotations
 
 import pytest
 
-from custom_components.e_redes_smart_metering_plus.const import DOMAIN, WEBHOOK_ID
+from custom_components.e_redes_smart_metering_plus.const import (
+    CONF_CALCULATED_SENSORS,
+    CONF_FAST_ACK,
+    CONF_QUEUE_SIZE,
+    DOMAIN,
+    WEBHOOK_ID,
+)
 from homeassistant.core import HomeAssistant
 
 pytestmark = pytest.mark.asyncio
@@ -40,3 +46,47 @@ async def test_create_entry(hass: HomeAssistant) -> None:
     data = result2["data"]
     assert "webhook_id" in data
     assert data["webhook_id"] == WEBHOOK_ID
+
+
+async def test_options_flow_updates_ingest_options(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """Test that the options flow stores the ingest options and reloads."""
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+
+    assert result["type"] == "form"
+    assert result["step_id"] == "init"
+    assert "webhook_url" in (result.get("description_placeholders") or {})
+
+    result2 = await hass.config_entries.options.async_configure(
+        result["flow_id"], user_input={CONF_FAST_ACK: True, CONF_QUEUE_SIZE: 50}
+    )
+    await hass.async_block_till_done()
+
+    assert result2["type"] == "create_entry"
+    assert config_entry.options[CONF_FAST_ACK] is True
+    assert config_entry.options[CONF_QUEUE_SIZE] == 50
+
+    # The reloaded entry runs the background ingest queue
+    queue = config_entry.runtime_data.queue
+    assert queue.maxsize == 50
+
+
+async def test_options_flow_rejects_invalid_formula(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """Test that the options flow rejects calculated sensors that don't compile."""
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+
+    result2 = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_FAST_ACK: False,
+            CONF_QUEUE_SIZE: 1000,
+            CONF_CALCULATED_SENSORS: "Bad (W) = __import__('os')",
+        },
+    )
+
+    assert result2["type"] == "form"
+    assert result2["errors"] == {CONF_CALCULATED_SENSORS: "invalid_formula"}
+    assert "formula_error" in result2["description_placeholders"]
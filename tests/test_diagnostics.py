@@ -0,0 +1,73 @@
+"""Diagnostics tests for the E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+from pytest_homeassistant_custom_component.components.diagnostics import (
+    get_diagnostics_for_config_entry,
+    get_diagnostics_for_device,
+)
+
+from custom_components.e_redes_smart_metering_plus.const import DOMAIN, WEBHOOK_ID
+from custom_components.e_redes_smart_metering_plus.diagnostics import redact_cpe
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.setup import async_setup_component
+
+CPE = "PT0002000012345678AB"
+
+
+async def test_config_entry_and_device_diagnostics(
+    hass: HomeAssistant, config_entry, hass_client
+) -> None:
+    """Diagnostics should report the meter counters with the CPE masked."""
+    assert await async_setup_component(hass, "diagnostics", {})
+    client = await hass_client()
+    for clock, voltage in (
+        ("2025-08-01 12:00:15", 230.0),
+        ("2025-08-01 12:00:15", 230.0),
+        ("2025-08-01 12:00:00", 229.0),
+        ("2025-08-01 12:00:30", 231.0),
+    ):
+        resp = await client.post(
+            f"/api/webhook/{WEBHOOK_ID}",
+            json={"cpe": CPE, "clock": clock, "voltageL1": voltage},
+        )
+        assert resp.status == 200
+        await hass.async_block_till_done()
+
+    diagnostics = await get_diagnostics_for_config_entry(
+        hass, hass_client, config_entry
+    )
+    assert CPE not in str(diagnostics)
+    assert diagnostics["entry"]["data"]["webhook_id"] == "**REDACTED**"
+    assert diagnostics["ingest"]["readings"] == 2
+    assert diagnostics["ingest"]["queue"] is None
+    assert diagnostics["ingest"]["stages"]["reading"]["count"] == 2
+
+    meter = diagnostics["cpes"][redact_cpe(CPE)]
+    assert redact_cpe(CPE) == "PT00************78AB"
+    assert meter["readings"] == 2
+    assert meter["duplicates"] == 1
+    assert meter["stale"] == 1
+    assert meter["rejected"] == 0
+    assert meter["clock_skew_s"] is not None
+    assert meter["entities"]["sensors"] > 0
+    assert meter["entities"]["breaker_limit"]
+    assert meter["entities"]["registered"] >= meter["entities"]["sensors"]
+
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, CPE)})
+    device_diagnostics = await get_diagnostics_for_device(
+        hass, hass_client, config_entry, device
+    )
+    assert device_diagnostics["cpe"] == redact_cpe(CPE)
+    assert device_diagnostics["readings"] == 2
+
+    # The service device reports the entry's ingest counters, not a meter
+    service_device = dr.async_get(hass).async_get_device(
+        identifiers={(DOMAIN, config_entry.entry_id)}
+    )
+    service_diagnostics = await get_diagnostics_for_device(
+        hass, hass_client, config_entry, service_device
+    )
+    assert "cpe" not in service_diagnostics
+    assert service_diagnostics["ingest"]["readings"] == 2
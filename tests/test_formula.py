@@ -0,0 +1,163 @@
+"""Tests for the calculated sensor formulas of E-Redes Smart Metering Plus."""
+
+from __future__ import annotations
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.e_redes_smart_metering_plus.const import (
+    CONF_CALCULATED_SENSORS,
+    DOMAIN,
+    WEBHOOK_ID,
+)
+from custom_components.e_redes_smart_metering_plus.derivation import (
+    FORMULA_SENSOR_KEYS,
+)
+from custom_components.e_redes_smart_metering_plus.formula import (
+    FormulaError,
+    compile_formula,
+    parse_custom_sensors,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+
+def test_formula_evaluates_inputs() -> None:
+    """A formula should compute from its inputs and report them."""
+    formula = compile_formula("round(power / voltage, 2)")
+
+    assert formula.inputs == frozenset({"power", "voltage"})
+    assert formula({"power": 2300.0, "voltage": 231.0}) == 9.96
+    assert compile_formula("-abs(a) + max(a, b) % 7")({"a": -3, "b": 10}) == 0
+
+
+def test_formula_undefined_results_are_none() -> None:
+    """Missing inputs and divisions by zero should yield None."""
+    formula = compile_formula("power / voltage")
+
+    assert formula({"power": 2300.0}) is None
+    assert formula({"power": 2300.0, "voltage": 0.0}) is None
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "__import__('os').system('true')",
+        "power.real",
+        "power ** 2",
+        "[power]",
+        "lambda: 1",
+        "power if voltage else 0",
+        "'text'",
+        "True + power",
+        "round(power, ndigits=2)",
+        "power +",
+    ],
+)
+def test_formula_rejects_unsafe_syntax(expression: str) -> None:
+    """Only whitelisted arithmetic should compile."""
+    with pytest.raises(FormulaError):
+        compile_formula(expression)
+
+
+def test_formula_rejects_unknown_names() -> None:
+    """Formulas restricted to known names should reject anything else."""
+    with pytest.raises(FormulaError, match="voltage_l2"):
+        compile_formula("voltage_l1 + voltage_l2", {"voltage_l1"})
+
+
+def test_parse_custom_sensors() -> None:
+    """User-defined sensors should parse into calculated sensor configs."""
+    sensors = parse_custom_sensors(
+        "# comment\n"
+        "Net Power (W) = instantaneous_active_power_import"
+        " - instantaneous_active_power_export\n"
+        "\n"
+        "Headroom = breaker_limit - instantaneous_active_current_import\n",
+        FORMULA_SENSOR_KEYS,
+        {"breaker_limit"},
+    )
+
+    assert list(sensors) == ["custom_net_power", "custom_headroom"]
+    net_power = sensors["custom_net_power"]
+    assert net_power["name"] == "Net Power"
+    assert net_power["unit"] == "W"
+    assert net_power["source_sensors"] == [
+        "instantaneous_active_power_export",
+        "instantaneous_active_power_import",
+    ]
+    headroom = sensors["custom_headroom"]
+    assert headroom["unit"] is None
+    assert headroom["requires_number_entity"] == "breaker_limit"
+
+    with pytest.raises(FormulaError, match="Line 1"):
+        parse_custom_sensors("no formula here", FORMULA_SENSOR_KEYS, set())
+    # Constants never change, so they are not sensors
+    with pytest.raises(FormulaError, match="Line 1: .* uses no sensor"):
+        parse_custom_sensors("Fixed (W) = 100", FORMULA_SENSOR_KEYS, set())
+
+
+@pytest.mark.asyncio
+async def test_custom_calculated_sensor_from_options(
+    hass: HomeAssistant, hass_client
+) -> None:
+    """A user-defined formula should become a calculated sensor per CPE."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"webhook_id": WEBHOOK_ID},
+        options={
+            CONF_CALCULATED_SENSORS: (
+                "Net Power (W) = instantaneous_active_power_import"
+                " - instantaneous_active_power_export\n"
+                "Net Current (A) = round(custom_net_power / voltage_l1, 2)"
+            )
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = await hass_client()
+    resp = await client.post(
+        f"/api/webhook/{WEBHOOK_ID}",
+        json={
+            "cpe": "CUSTOM1",
+            "instantaneousActivePowerImport": 3000.0,
+            "instantaneousActivePowerExport": 700.0,
+            "voltageL1": 230.0,
+        },
+    )
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    net_power = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_CUSTOM1_custom_net_power"
+    )
+    net_current = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_CUSTOM1_custom_net_current"
+    )
+    assert float(hass.states.get(net_power).state) == 2300.0
+    assert hass.states.get(net_power).attributes["unit_of_measurement"] == "W"
+    assert float(hass.states.get(net_current).state) == 10.0
+    assert hass.states.get(net_current).attributes["formula"] == (
+        "round(custom_net_power / voltage_l1, 2)"
+    )
+    assert "calculation_type" not in hass.states.get(net_current).attributes
+
+    # Removing a sensor from the options removes its entities on reload
+    hass.config_entries.async_update_entry(
+        entry,
+        options={
+            CONF_CALCULATED_SENSORS: (
+                "Net Power (W) = instantaneous_active_power_import"
+                " - instantaneous_active_power_export"
+            )
+        },
+    )
+    await hass.async_block_till_done()
+    assert entity_registry.async_get(net_current) is None
+    assert entity_registry.async_get(net_power) is not None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
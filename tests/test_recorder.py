@@ -0,0 +1,76 @@
+"""Recorder tests for the E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+import pytest
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.e_redes_smart_metering_plus.const import DOMAIN
+from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder.db_schema import States, StatesMeta
+from homeassistant.components.recorder.util import session_scope
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def mock_recorder_before_hass(async_test_recorder) -> None:
+    """Prepare the recorder database before Home Assistant starts."""
+
+
+async def test_volatile_attributes_not_recorded(
+    recorder_mock: Recorder, hass: HomeAssistant, hass_client, config_entry
+) -> None:
+    """Repeated readings should share one recorded attribute row per sensor."""
+
+    client = await hass_client()
+    cpe = "RECORDER1"
+    updates = 5
+
+    for second in range(updates):
+        payload = {
+            "cpe": cpe,
+            "clock": f"2025-08-01 12:00:{second:02d}",
+            "instantaneousActivePowerImport": 1000.0 + 100 * second,
+            "voltageL1": 230.0 + second,
+        }
+        resp = await client.post(
+            f"/api/webhook/{config_entry.data['webhook_id']}",
+            json=payload,
+        )
+        assert resp.status == 200
+        await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    entity_ids = [
+        entity_registry.async_get_entity_id("sensor", DOMAIN, f"{DOMAIN}_{cpe}_{key}")
+        for key in ("instantaneous_active_power_import", "breaker_load")
+    ]
+
+    # The attributes still reach the state machine
+    state = hass.states.get(entity_ids[0])
+    assert "last_update" in state.attributes
+    assert "integration_webhook_url" in state.attributes
+
+    await async_wait_recording_done(hass)
+
+    def _count_attribute_rows(entity_id: str) -> tuple[int, int]:
+        with session_scope(hass=hass, read_only=True) as session:
+            rows = (
+                session.query(States.attributes_id)
+                .join(StatesMeta, States.metadata_id == StatesMeta.metadata_id)
+                .filter(StatesMeta.entity_id == entity_id)
+                .all()
+            )
+            return len(rows), len({row.attributes_id for row in rows})
+
+    for entity_id in entity_ids:
+        states, attribute_rows = await recorder_mock.async_add_executor_job(
+            _count_attribute_rows, entity_id
+        )
+        assert states >= updates
+        assert attribute_rows == 1
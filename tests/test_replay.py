@@ -0,0 +1,224 @@
+"""Replay tests for the E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.e_redes_smart_metering_plus.capture import PayloadCapture
+from custom_components.e_redes_smart_metering_plus.const import (
+    ATTR_REAPPLY,
+    ATTR_SPEED,
+    CONF_FAST_ACK,
+    DOMAIN,
+    SERVICE_REPLAY,
+    STAGE_DECODE,
+    STAGE_READING,
+    WEBHOOK_ID,
+)
+from custom_components.e_redes_smart_metering_plus.timing import LatencyHistogram
+from custom_components.e_redes_smart_metering_plus.webhook import async_handle_payload
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import device_registry as dr
+
+SEEN_BODIES = [
+    (
+        1000.0 + second,
+        f'{{"cpe": "SEEN01", "clock": "2025-08-01 12:00:{second:02d}", '
+        f'"voltageL1": {230.0 + second}}}'.encode(),
+    )
+    for second in (0, 15, 30)
+]
+
+
+async def _async_setup_entry(
+    hass: HomeAssistant, options: dict | None = None
+) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={"webhook_id": WEBHOOK_ID}, options=options or {}
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def test_replay_captured_payloads(
+    hass: HomeAssistant, capture_directory: Path
+) -> None:
+    """Captured bodies should be ingested again and their timings reported."""
+    entry = await _async_setup_entry(hass)
+    capture = PayloadCapture(hass, str(capture_directory))
+    await hass.async_add_executor_job(
+        capture.write,
+        [
+            (
+                1000.0,
+                b'{"cpe": "REPLAY01", "clock": "2025-08-01 12:00:00", '
+                b'"voltageL1": 230.0}',
+            ),
+            (
+                1015.0,
+                b'{"cpe": "REPLAY01", "clock": "2025-08-01 12:00:15", '
+                b'"voltageL1": 231.5}',
+            ),
+            (1016.0, b'[{"cpe": "REPLAY02", "voltageL1": 229.0}]'),
+            (1017.0, b"not json"),
+            (1018.0, b'{"clock": "2025-08-01 12:00:30"}'),
+        ],
+    )
+
+    result = await hass.services.async_call(
+        DOMAIN, SERVICE_REPLAY, {}, blocking=True, return_response=True
+    )
+    await hass.async_block_till_done()
+
+    assert result["files"] == 1
+    assert result["requests"] == 5
+    # The body that is not JSON and the reading without a CPE
+    assert result["rejected"] == 2
+    assert result["stages"][STAGE_DECODE]["count"] == 4
+    assert result["stages"][STAGE_READING]["count"] == 3
+    assert set(entry.runtime_data.cpes) == {"REPLAY01", "REPLAY02"}
+    assert entry.runtime_data.cpes["REPLAY01"].readings == 2
+
+
+async def test_replay_filters_seen_readings_unless_reapplied(
+    hass: HomeAssistant, capture_directory: Path
+) -> None:
+    """Readings already applied are only replayed again when asked to."""
+    entry = await _async_setup_entry(hass)
+    capture = PayloadCapture(hass, str(capture_directory))
+    await hass.async_add_executor_job(capture.write, SEEN_BODIES)
+
+    first = await hass.services.async_call(
+        DOMAIN, SERVICE_REPLAY, {}, blocking=True, return_response=True
+    )
+    assert first["stages"][STAGE_READING]["count"] == 3
+    second = await hass.services.async_call(
+        DOMAIN, SERVICE_REPLAY, {}, blocking=True, return_response=True
+    )
+    assert second["duplicates"] == 3
+    assert second["stages"][STAGE_READING]["count"] == 0
+
+    # Reapplying rebuilds a removed device and its entities
+    device_registry = dr.async_get(hass)
+    device = device_registry.async_get_device(identifiers={(DOMAIN, "SEEN01")})
+    device_registry.async_remove_device(device.id)
+    await hass.async_block_till_done()
+
+    result = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_REPLAY,
+        {ATTR_REAPPLY: True},
+        blocking=True,
+        return_response=True,
+    )
+    await hass.async_block_till_done()
+    assert result["duplicates"] == 0
+    assert result["stages"][STAGE_READING]["count"] == 3
+    assert device_registry.async_get_device(identifiers={(DOMAIN, "SEEN01")})
+    cpe_runtime = entry.runtime_data.cpes["SEEN01"]
+    assert cpe_runtime.sensors["voltage_l1"].native_value == 260.0
+
+
+async def test_reapply_keeps_filtering_live_readings(
+    hass: HomeAssistant, capture_directory: Path
+) -> None:
+    """Only replayed readings skip the filter, and never roll values back."""
+    entry = await _async_setup_entry(hass)
+    capture = PayloadCapture(hass, str(capture_directory))
+    await hass.async_add_executor_job(capture.write, SEEN_BODIES)
+    live = {"cpe": "SEEN01", "clock": "2025-08-01 12:00:45", "voltageL1": 300.0}
+    await async_handle_payload(hass, entry, dict(live))
+
+    # Paced, so a live retry arrives while the replay is running
+    replay = hass.async_create_task(
+        hass.services.async_call(
+            DOMAIN,
+            SERVICE_REPLAY,
+            {ATTR_REAPPLY: True, ATTR_SPEED: 100},
+            blocking=True,
+            return_response=True,
+        )
+    )
+    await asyncio.sleep(0.05)
+    assert not replay.done()
+    await async_handle_payload(hass, entry, dict(live))
+    result = await replay
+    await hass.async_block_till_done()
+
+    reading_filter = entry.runtime_data.reading_filter
+    assert reading_filter.duplicates == 1
+    assert result["duplicates"] == 1
+    assert result["stages"][STAGE_READING]["count"] == 3
+    cpe_runtime = entry.runtime_data.cpes["SEEN01"]
+    assert cpe_runtime.values["voltage_l1"] == 300.0
+    assert cpe_runtime.sensors["voltage_l1"].native_value == 300.0
+    assert cpe_runtime.clock.second == 45
+
+
+async def test_replay_waits_for_fast_ack_queue(
+    hass: HomeAssistant, capture_directory: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """In fast-ack mode the result should cover the queued readings."""
+    entry = await _async_setup_entry(hass, {CONF_FAST_ACK: True})
+    capture = PayloadCapture(hass, str(capture_directory))
+    await hass.async_add_executor_job(capture.write, SEEN_BODIES)
+
+    # A slow worker, so readings are still queued when the files are read
+    queue = entry.runtime_data.queue
+    process = queue._process
+
+    async def slow_process(data: dict) -> None:
+        await asyncio.sleep(0.05)
+        await process(data)
+
+    monkeypatch.setattr(queue, "_process", slow_process)
+
+    result = await hass.services.async_call(
+        DOMAIN, SERVICE_REPLAY, {}, blocking=True, return_response=True
+    )
+    assert queue.depth == 0
+    assert result["stages"][STAGE_READING]["count"] == 1
+    assert entry.runtime_data.cpes["SEEN01"].readings == 1
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_replay_rejects_bad_patterns(
+    hass: HomeAssistant, capture_directory: Path
+) -> None:
+    """Patterns outside the capture directory and unmatched ones should fail."""
+    await _async_setup_entry(hass)
+
+    with pytest.raises(ServiceValidationError) as err:
+        await hass.services.async_call(
+            DOMAIN, SERVICE_REPLAY, {"files": "../*.gz"}, blocking=True
+        )
+    assert err.value.translation_key == "invalid_replay_files"
+
+    with pytest.raises(ServiceValidationError) as err:
+        await hass.services.async_call(
+            DOMAIN, SERVICE_REPLAY, {"files": "missing*.gz"}, blocking=True
+        )
+    assert err.value.translation_key == "no_replay_files"
+
+
+def test_histogram_since() -> None:
+    """A histogram should report only what was recorded after a copy."""
+    histogram = LatencyHistogram()
+    histogram.record(50_000)
+    earlier = histogram.copy()
+    histogram.record(5_000_000)
+
+    delta = histogram.since(earlier)
+    assert delta.count == 1
+    assert delta.total_ns == 5_000_000
+    assert earlier.count == 1
+    assert delta.percentile(50) == histogram.percentile(99)
@@ -0,0 +1,105 @@
+"""Restore index tests for the E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.e_redes_smart_metering_plus.const import DOMAIN, WEBHOOK_ID
+from custom_components.e_redes_smart_metering_plus.restore import (
+    async_build_restore_index,
+)
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_restore_index_covers_only_this_entry(hass: HomeAssistant) -> None:
+    """The index should hold this entry's entities grouped by platform."""
+
+    entry = MockConfigEntry(domain=DOMAIN, data={"webhook_id": WEBHOOK_ID})
+    entry.add_to_hass(hass)
+    other_entry = MockConfigEntry(domain=DOMAIN, data={"webhook_id": WEBHOOK_ID})
+    other_entry.add_to_hass(hass)
+
+    entity_registry = er.async_get(hass)
+    for domain, unique_id, config_entry in (
+        ("sensor", f"{DOMAIN}_PT1_voltage_l1", entry),
+        ("sensor", f"{DOMAIN}_PT1_breaker_load", entry),
+        ("sensor", f"{DOMAIN}_PT1_max_active_power_import", entry),
+        ("sensor", f"{DOMAIN}_PT1_last_update", entry),
+        ("number", f"{DOMAIN}_PT1_breaker_limit", entry),
+        ("binary_sensor", f"{DOMAIN}_PT1_breaker_overload", entry),
+        ("sensor", f"{DOMAIN}_PT2_voltage_l1", other_entry),
+    ):
+        entity_registry.async_get_or_create(
+            domain, DOMAIN, unique_id, config_entry=config_entry
+        )
+
+    index = async_build_restore_index(hass, entry)
+
+    assert sorted((cpe, key) for cpe, key, _ in index[Platform.SENSOR]) == [
+        ("PT1", "breaker_load"),
+        ("PT1", "max_active_power_import"),
+        ("PT1", "voltage_l1"),
+    ]
+    assert [(cpe, key) for cpe, key, _ in index[Platform.NUMBER]] == [
+        ("PT1", "breaker_limit")
+    ]
+    assert [(cpe, key) for cpe, key, _ in index[Platform.BINARY_SENSOR]] == [
+        ("PT1", "breaker_overload")
+    ]
+
+
+async def test_entities_restored_on_reload(
+    hass: HomeAssistant, hass_client, config_entry
+) -> None:
+    """Reloading the entry should restore every platform's entities."""
+
+    client = await hass_client()
+    payload = {
+        "cpe": "RELOAD1",
+        "instantaneousActivePowerImport": 2300.0,
+        "voltageL1": 230.0,
+    }
+    resp = await client.post(f"/api/webhook/{WEBHOOK_ID}", json=payload)
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    assert await hass.config_entries.async_reload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    runtime = config_entry.runtime_data
+    cpe_runtime = runtime.cpes["RELOAD1"]
+    assert "voltage_l1" in cpe_runtime.sensors
+    assert "instantaneous_active_current_import" in cpe_runtime.sensors
+    assert cpe_runtime.breaker_limit is not None
+    assert cpe_runtime.breaker_overload is not None
+
+    # Each platform consumes its part of the index
+    assert not runtime.restore_index
+
+
+async def test_only_meters_indexed_on_reload(
+    hass: HomeAssistant, hass_client, config_entry
+) -> None:
+    """The integration's service device should not be indexed as a meter."""
+
+    client = await hass_client()
+    resp = await client.post(
+        f"/api/webhook/{WEBHOOK_ID}", json={"cpe": "RELOAD2", "voltageL1": 230.0}
+    )
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    device_registry = dr.async_get(hass)
+    assert device_registry.async_get_device(
+        identifiers={(DOMAIN, config_entry.entry_id)}
+    )
+
+    assert await hass.config_entries.async_reload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert list(config_entry.runtime_data.cpes) == ["RELOAD2"]
@@ -2,11 +2,17 @@
 
 from __future__ import annotations
 
+from collections import Counter
+from datetime import datetime
+
 import pytest
 
 from custom_components.e_redes_smart_metering_plus.const import DOMAIN, SENSOR_MAPPING
+from custom_components.e_redes_smart_metering_plus.reading import parse_clock
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.util import dt as dt_util
 
 pytestmark = pytest.mark.asyncio
 
@@ -363,3 +369,115 @@ async def test_breaker_load_sensor(
     assert state is not None
     expected_load = 25
     assert int(float(state.state)) == expected_load
+
+
+async def test_parse_clock_uses_home_assistant_time_zone(hass: HomeAssistant) -> None:
+    """Naive reading clocks should be local time in the HA time zone."""
+
+    await hass.config.async_set_time_zone("Europe/Lisbon")
+
+    parsed = parse_clock("2025-08-01 12:41:10")
+    assert parsed == datetime(
+        2025, 8, 1, 12, 41, 10, tzinfo=dt_util.get_time_zone("Europe/Lisbon")
+    )
+    assert parsed.utcoffset().total_seconds() == 3600
+
+    # Identical clock strings share the parsed datetime
+    assert parse_clock("2025-08-01 12:41:10") is parsed
+
+    # Explicit offsets are kept, invalid clocks are dropped
+    assert parse_clock("2025-08-01T12:41:10+00:00").utcoffset().total_seconds() == 0
+    assert parse_clock("0000-00-00 00:00:00") is None
+    assert parse_clock(None) is None
+
+
+async def test_sensor_last_update_is_timezone_aware(
+    hass: HomeAssistant, hass_client, config_entry
+) -> None:
+    """The last_update attribute should come from the reading clock."""
+
+    client = await hass_client()
+    payload = {
+        "cpe": "CLOCK001",
+        "clock": "2025-08-01 12:41:10",
+        "instantaneousActivePowerImport": 2300.0,
+        "voltageL1": 230.0,
+    }
+    resp = await client.post(
+        f"/api/webhook/{config_entry.data['webhook_id']}",
+        json=payload,
+    )
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    for sensor_key in ("voltage_l1", "instantaneous_active_current_import"):
+        ent_id = entity_registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{DOMAIN}_CLOCK001_{sensor_key}"
+        )
+        last_update = hass.states.get(ent_id).attributes["last_update"]
+        assert last_update.tzinfo is not None
+        assert last_update == parse_clock("2025-08-01 12:41:10")
+
+
+async def test_one_state_write_per_entity_per_reading(
+    hass: HomeAssistant, hass_client, config_entry, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A reading should write each affected entity's state exactly once."""
+
+    client = await hass_client()
+    cpe = "CPE_WRITES"
+    payload = {
+        "cpe": cpe,
+        "clock": "2025-08-01 12:00:00",
+        "instantaneousActivePowerImport": 2300.0,
+        "voltageL1": 230.0,
+    }
+    writes: Counter[str] = Counter()
+    original_write = Entity.async_write_ha_state
+
+    def counting_write(self: Entity) -> None:
+        writes[self.entity_id] += 1
+        original_write(self)
+
+    monkeypatch.setattr(Entity, "async_write_ha_state", counting_write)
+
+    resp = await client.post(
+        f"/api/webhook/{config_entry.data['webhook_id']}", json=payload
+    )
+    assert resp.status == 200
+    await hass.async_block_till_done()
+    writes.clear()
+
+    payload = {
+        **payload,
+        "clock": "2025-08-01 12:00:05",
+        "instantaneousActivePowerImport": 5750.0,
+        "voltageL1": 231.0,
+    }
+    resp = await client.post(
+        f"/api/webhook/{config_entry.data['webhook_id']}", json=payload
+    )
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    entity_ids = {
+        key: entity_registry.async_get_entity_id(
+            platform, DOMAIN, f"{DOMAIN}_{cpe}_{key}"
+        )
+        for platform, key in (
+            ("sensor", "instantaneous_active_power_import"),
+            ("sensor", "voltage_l1"),
+            ("sensor", "instantaneous_active_current_import"),
+            ("sensor", "breaker_load"),
+            ("binary_sensor", "breaker_overload"),
+        )
+    }
+    for entity_id in entity_ids.values():
+        assert writes[entity_id] == 1, entity_id
+    assert max(writes.values()) == 1
+
+    # 5750 W / 231 V = 24.89 A, 124% of the default 20 A breaker
+    assert float(hass.states.get(entity_ids["breaker_load"]).state) == 124
+    assert hass.states.get(entity_ids["breaker_overload"]).state == "on"
@@ -0,0 +1,136 @@
+"""Simulated push traffic tests for the E-Redes Smart Metering Plus integration.
+
+The soak test is skipped unless ``EREDES_SOAK_HOURS`` is set to the number of
+simulated hours to push.
+"""
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+from pathlib import Path
+import tracemalloc
+
+import pytest
+
+from custom_components.e_redes_smart_metering_plus.capture import PayloadCapture
+from custom_components.e_redes_smart_metering_plus.const import CAPTURE_FILE_NAME
+from homeassistant.core import HomeAssistant
+from scripts.replay_capture import read_capture
+from scripts.simulate_push import WEBHOOK_PATH, PushSimulator, async_push
+
+SOAK_HOURS = os.environ.get("EREDES_SOAK_HOURS", "")
+
+# Traced memory allowed to accumulate after the first simulated hour
+SOAK_MAX_GROWTH_KIB = 2048
+
+
+def test_simulated_stream_is_delivered_in_order() -> None:
+    """Streams should be ordered by delivery time and continue each other."""
+    simulator = PushSimulator(meters=3, jitter=2.0, reorder=0.2, seed=1)
+    first = list(simulator.stream(300))
+    second = list(simulator.stream(300))
+
+    offsets = [offset for offset, _ in first]
+    assert offsets == sorted(offsets)
+    assert len(first) == 3 * 20
+    assert simulator.reordered > 0
+    # A later stream picks up where the previous one ended
+    assert max(reading["clock"] for _, reading in first) < min(
+        reading["clock"] for _, reading in second
+    )
+
+
+async def test_simulated_traffic_is_applied(config_entry, push_simulator) -> None:
+    """Retries and late deliveries of a realistic stream should be dropped."""
+    simulator, stats = await push_simulator(
+        600, meters=5, jitter=2.0, duplicates=0.1, reorder=0.1
+    )
+
+    assert stats.statuses == {200: simulator.sent}
+    reading_filter = config_entry.runtime_data.reading_filter
+    assert reading_filter.duplicates == simulator.duplicated
+    assert reading_filter.stale == simulator.reordered
+    assert config_entry.runtime_data.timings.readings == (
+        simulator.sent - simulator.duplicated - simulator.reordered
+    )
+
+    cpes = config_entry.runtime_data.cpes
+    assert set(cpes) == {f"PT0002{index:012d}SM" for index in range(5)}
+    assert all(cpe_runtime.device_id is not None for cpe_runtime in cpes.values())
+
+
+async def test_capture_is_replayed_through_push(
+    hass: HomeAssistant, config_entry, hass_client, tmp_path: Path
+) -> None:
+    """Captured bodies should be posted unchanged, at their recorded offsets."""
+    capture = PayloadCapture(hass, str(tmp_path))
+    await hass.async_add_executor_job(
+        capture.write,
+        [
+            (1000.0, b'{"cpe": "REPLAY01", "clock": "2025-08-01 12:00:00"}'),
+            (1015.0, b'{"cpe": "REPLAY01", "clock": "2025-08-01 12:00:15"}'),
+            (1016.0, b'{"cpe": "REPLAY01", "clock": "2025-08-01 12:00:15"}'),
+            (1017.0, b'{"cpe": "REPLAY01", '),
+        ],
+    )
+    paths = [str(tmp_path / CAPTURE_FILE_NAME)]
+    records = await hass.async_add_executor_job(list, read_capture(paths))
+    assert [offset for offset, _ in records] == [0.0, 15.0, 16.0, 17.0]
+
+    client = await hass_client()
+
+    async def post(body: bytes) -> int:
+        async with client.session.post(
+            client.make_url(WEBHOOK_PATH),
+            data=body,
+            headers={"Content-Type": "application/json"},
+        ) as response:
+            await response.read()
+            return response.status
+
+    stats = await async_push(iter(records), post)
+    await hass.async_block_till_done()
+
+    assert stats.statuses == {200: 3, 400: 1}
+    assert config_entry.runtime_data.cpes["REPLAY01"].readings == 2
+    assert config_entry.runtime_data.reading_filter.duplicates == 1
+
+
+@pytest.mark.skipif(not SOAK_HOURS, reason="set EREDES_SOAK_HOURS to run")
+async def test_soak(config_entry, push_simulator, record_property) -> None:
+    """Memory should stop growing once every meter has been seen."""
+    simulator = None
+    samples = []
+    # pytest keeps every captured log record, including asyncio's slow
+    # callback warnings under tracing, which would dwarf the integration's
+    # own memory over hours of traffic
+    logging.disable(logging.WARNING)
+    tracemalloc.start()
+    try:
+        for _ in range(max(2, int(float(SOAK_HOURS)))):
+            simulator, stats = await push_simulator(
+                3600,
+                simulator,
+                meters=20,
+                jitter=2.0,
+                duplicates=0.02,
+                reorder=0.02,
+                resets=0.0005,
+            )
+            gc.collect()
+            samples.append(
+                {
+                    **stats.summary(),
+                    "traced_kib": round(tracemalloc.get_traced_memory()[0] / 1024),
+                }
+            )
+    finally:
+        tracemalloc.stop()
+        logging.disable(logging.NOTSET)
+
+    for hour, sample in enumerate(samples, 1):
+        record_property(f"soak_hour_{hour}", sample)
+    growth = samples[-1]["traced_kib"] - samples[0]["traced_kib"]
+    assert growth < SOAK_MAX_GROWTH_KIB
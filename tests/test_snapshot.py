@@ -0,0 +1,133 @@
+"""Warm restart snapshot tests for the E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.e_redes_smart_metering_plus.const import (
+    DOMAIN,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+    WEBHOOK_ID,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+
+def _storage_key(entry: MockConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}.snapshot"
+
+
+async def test_sensors_start_from_persisted_snapshot(
+    hass: HomeAssistant, hass_storage: dict[str, Any], hass_client
+) -> None:
+    """Sensors should have their persisted values as soon as they are restored."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"webhook_id": WEBHOOK_ID})
+    entry.add_to_hass(hass)
+
+    entity_registry = er.async_get(hass)
+    entity_ids = {
+        key: entity_registry.async_get_or_create(
+            "sensor", DOMAIN, f"{DOMAIN}_WARM1_{key}", config_entry=entry
+        ).entity_id
+        for key in (
+            "voltage_l1",
+            "active_energy_import",
+            "instantaneous_active_current_import",
+        )
+    }
+    overload_id = entity_registry.async_get_or_create(
+        "binary_sensor", DOMAIN, f"{DOMAIN}_WARM1_breaker_overload", config_entry=entry
+    ).entity_id
+    hass_storage[_storage_key(entry)] = {
+        "version": SNAPSHOT_STORAGE_VERSION,
+        "key": _storage_key(entry),
+        "data": {
+            "cpes": {
+                "WARM1": {
+                    "clock": "2025-08-01T12:00:00+01:00",
+                    "values": {
+                        "voltage_l1": 231.0,
+                        "active_energy_import": 1500.0,
+                        "instantaneous_active_power_import": 2310.0,
+                        "instantaneous_active_current_import": 10.0,
+                        "breaker_load": 125.0,
+                    },
+                }
+            }
+        },
+    }
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_ids["voltage_l1"]).state == "231.0"
+    assert hass.states.get(entity_ids["active_energy_import"]).state == "1500.0"
+    current = hass.states.get(entity_ids["instantaneous_active_current_import"])
+    assert current.state == "10.0"
+    assert current.attributes["last_update"] == dt_util.parse_datetime(
+        "2025-08-01T12:00:00+01:00"
+    )
+    assert hass.states.get(overload_id).state == "on"
+
+    # A stale counter arriving first after the restart is still rejected
+    client = await hass_client()
+    resp = await client.post(
+        f"/api/webhook/{WEBHOOK_ID}",
+        json={"cpe": "WARM1", "activeEnergyImport": 1400.0},
+    )
+    assert resp.status == 200
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_ids["active_energy_import"]).state == "1500.0"
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_snapshot_saves_are_debounced(
+    hass: HomeAssistant, hass_storage: dict[str, Any], config_entry, hass_client
+) -> None:
+    """Readings should be persisted once per save delay and on unload."""
+    client = await hass_client()
+    for second, voltage in enumerate((230.0, 231.0, 232.0)):
+        resp = await client.post(
+            f"/api/webhook/{WEBHOOK_ID}",
+            json={
+                "cpe": "SAVE1",
+                "clock": f"2025-08-01 12:00:{second:02d}",
+                "instantaneousActivePowerImport": 2300.0,
+                "voltageL1": voltage,
+            },
+        )
+        assert resp.status == 200
+        await hass.async_block_till_done()
+
+    assert _storage_key(config_entry) not in hass_storage
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=SNAPSHOT_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+
+    stored = hass_storage[_storage_key(config_entry)]["data"]["cpes"]["SAVE1"]
+    assert stored["values"]["voltage_l1"] == 232.0
+    assert stored["values"]["instantaneous_active_current_import"] == 9.91
+    # Number entities restore their own state
+    assert "breaker_limit" not in stored["values"]
+    assert dt_util.parse_datetime(stored["clock"]).tzinfo is not None
+
+    # Reloading starts the recreated sensors from the snapshot
+    assert await hass.config_entries.async_reload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_SAVE1_voltage_l1"
+    )
+    assert hass.states.get(entity_id).state == "232.0"
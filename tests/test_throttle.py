@@ -0,0 +1,170 @@
+"""State write throttling tests for the E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+import time
+
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.e_redes_smart_metering_plus import throttle
+from custom_components.e_redes_smart_metering_plus.const import (
+    CONF_WRITE_INTERVAL_CALCULATED,
+    CONF_WRITE_INTERVAL_COUNTER,
+    CONF_WRITE_INTERVAL_MEASUREMENT,
+    DEFAULT_MAX_SILENCE,
+    DOMAIN,
+    WEBHOOK_ID,
+)
+from custom_components.e_redes_smart_metering_plus.throttle import Deadband
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+
+async def test_throttled_writes_flush_latest_value(
+    hass: HomeAssistant, hass_client
+) -> None:
+    """Writes inside the interval are held back and the latest one is flushed."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"webhook_id": WEBHOOK_ID},
+        options={
+            CONF_WRITE_INTERVAL_MEASUREMENT: 60,
+            CONF_WRITE_INTERVAL_COUNTER: 0,
+            CONF_WRITE_INTERVAL_CALCULATED: 60,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = await hass_client()
+    for power, voltage, energy in (
+        (2300.0, 230.0, 1000),
+        (2400.0, 231.0, 1001),
+        (2500.0, 232.0, 1002),
+    ):
+        resp = await client.post(
+            f"/api/webhook/{WEBHOOK_ID}",
+            json={
+                "cpe": "THROTTLE1",
+                "instantaneousActivePowerImport": power,
+                "activeEnergyImport": energy,
+                "voltageL1": voltage,
+            },
+        )
+        assert resp.status == 200
+        await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+
+    def state_of(key: str) -> float:
+        entity_id = entity_registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{DOMAIN}_THROTTLE1_{key}"
+        )
+        return float(hass.states.get(entity_id).state)
+
+    # Measurements and calculated values keep their first published value
+    assert state_of("voltage_l1") == 230.0
+    assert state_of("instantaneous_active_current_import") == 10.0
+    # Counters are not throttled
+    assert state_of("active_energy_import") == 1002
+
+    stats = entry.runtime_data.write_stats
+    assert stats.suppressed_by_class == {
+        "measurement": 4,
+        "counter": 0,
+        "calculated": 4,
+    }
+    assert stats.suppressed == 8
+
+    # The trailing flush publishes the latest values
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+    await hass.async_block_till_done()
+
+    assert state_of("voltage_l1") == 232.0
+    assert state_of("instantaneous_active_current_import") == round(2500 / 232, 2)
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+def test_deadband_for_sensor() -> None:
+    """Sensors use their own deadband or the default of their device class."""
+    power = Deadband.for_sensor({"device_class": "power"})
+    assert power.contains(1000.0, 1004.0)
+    assert power.contains(2000.0, 2009.0)
+    assert not power.contains(2000.0, 2011.0)
+
+    custom = Deadband.for_sensor({"device_class": "power", "deadband": {}})
+    assert custom.contains(1000.0, 1000.0)
+    assert not custom.contains(1000.0, 1000.5)
+
+    assert Deadband.for_sensor({}).contains(50, 50)
+    assert not Deadband.for_sensor({}).contains("on", "off")
+
+
+async def test_deadband_skips_insignificant_writes(
+    hass: HomeAssistant, hass_client, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Changes inside the deadband are not written until the max silence."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"webhook_id": WEBHOOK_ID})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    now = time.monotonic()
+    monkeypatch.setattr(throttle.time, "monotonic", lambda: now)
+
+    client = await hass_client()
+
+    async def post(power: float, voltage: float) -> None:
+        resp = await client.post(
+            f"/api/webhook/{WEBHOOK_ID}",
+            json={
+                "cpe": "DEADBAND1",
+                "instantaneousActivePowerImport": power,
+                "voltageL1": voltage,
+            },
+        )
+        assert resp.status == 200
+        await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+
+    def state_of(key: str) -> float:
+        entity_id = entity_registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{DOMAIN}_DEADBAND1_{key}"
+        )
+        return float(hass.states.get(entity_id).state)
+
+    await post(2300.0, 230.0)
+    stats = entry.runtime_data.write_stats
+    written = dict(stats.written)
+
+    # Jitter inside the bands; the breaker load rounds to the same integer
+    await post(2303.0, 230.2)
+    assert state_of("instantaneous_active_power_import") == 2300.0
+    assert state_of("voltage_l1") == 230.0
+    assert state_of("breaker_load") == 50
+    assert stats.written == written
+    assert stats.filtered_by_class == {"measurement": 2, "counter": 0, "calculated": 2}
+    assert stats.filtered == 4
+
+    # A significant change is written at once
+    await post(2400.0, 230.2)
+    assert state_of("instantaneous_active_power_import") == 2400.0
+    assert state_of("voltage_l1") == 230.0
+
+    # After the max silence even an unchanged value is written again
+    now += DEFAULT_MAX_SILENCE
+    await post(2400.0, 230.2)
+    assert state_of("voltage_l1") == 230.2
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,140 @@
+"""Ingest timing tests for the E-Redes Smart Metering Plus integration."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.e_redes_smart_metering_plus.const import (
+    LOG_SUMMARY_INTERVAL,
+    STAGE_DECODE,
+    STAGE_DISPATCH,
+    STAGE_ENSURE_DEVICE,
+    STAGE_ENSURE_ENTITIES,
+    STAGE_READING,
+    STAGE_STATE_WRITE,
+    THROUGHPUT_INTERVAL,
+    WEBHOOK_ID,
+)
+from custom_components.e_redes_smart_metering_plus.timing import LatencyHistogram
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+
+def test_latency_histogram_percentiles() -> None:
+    """Percentiles should resolve to the upper bound of their bucket."""
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+
+    for _ in range(90):
+        histogram.record(40_000)
+    for _ in range(9):
+        histogram.record(800_000)
+    histogram.record(5_000_000_000)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 0.05
+    assert histogram.percentile(95) == 1.0
+    # Durations past the last bucket resolve to the largest one seen
+    assert histogram.percentile(100) == 5000.0
+
+    stats = histogram.as_dict()
+    assert stats["count"] == 100
+    assert stats["max_ms"] == 5000.0
+    assert stats["buckets_us"]["50"] == 90
+    assert stats["buckets_us"]["inf"] == 1
+
+
+async def test_webhook_stages_are_timed(
+    hass: HomeAssistant, config_entry, hass_client
+) -> None:
+    """Every applied reading should be timed per stage and counted."""
+    timings = config_entry.runtime_data.timings
+    client = await hass_client()
+    for second in range(3):
+        resp = await client.post(
+            f"/api/webhook/{WEBHOOK_ID}",
+            json={
+                "cpe": "TIME1",
+                "clock": f"2025-08-01 12:00:{second:02d}",
+                "instantaneousActivePowerImport": 1000.0 + 100 * second,
+            },
+        )
+        assert resp.status == 200
+        await hass.async_block_till_done()
+
+    # A duplicate is decoded but never applied
+    resp = await client.post(
+        f"/api/webhook/{WEBHOOK_ID}",
+        json={"cpe": "TIME1", "clock": "2025-08-01 12:00:02"},
+    )
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    assert timings.stages[STAGE_DECODE].count == 4
+    for stage in (
+        STAGE_ENSURE_DEVICE,
+        STAGE_ENSURE_ENTITIES,
+        STAGE_DISPATCH,
+        STAGE_READING,
+    ):
+        assert timings.stages[stage].count == 3
+    assert timings.stages[STAGE_STATE_WRITE].count > 0
+    assert timings.readings == 3
+    assert timings.percentile(50) is not None
+
+    assert timings.throughput is None
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=THROUGHPUT_INTERVAL + 1)
+    )
+    await hass.async_block_till_done()
+    assert timings.throughput is not None
+    assert timings.throughput > 0
+
+
+async def test_ingest_summary_is_logged(
+    hass: HomeAssistant, config_entry, hass_client, caplog: pytest.LogCaptureFixture
+) -> None:
+    """One INFO line per interval should summarize the readings and rejects."""
+    timings = config_entry.runtime_data.timings
+    client = await hass_client()
+    caplog.set_level(
+        logging.INFO, logger="custom_components.e_redes_smart_metering_plus"
+    )
+    for cpe in ("SUMMARY1", "SUMMARY2"):
+        resp = await client.post(
+            f"/api/webhook/{WEBHOOK_ID}",
+            json={"cpe": cpe, "clock": "2025-08-01 12:00:00", "voltageL1": 230.0},
+        )
+        assert resp.status == 200
+    resp = await client.post(f"/api/webhook/{WEBHOOK_ID}", json={"voltageL1": 230.0})
+    assert resp.status == 400
+    await hass.async_block_till_done()
+
+    # Requests themselves are only logged at DEBUG
+    assert "Webhook processing completed" not in caplog.text
+    assert timings.rejected == 1
+    assert timings.slowest_cpe in ("SUMMARY1", "SUMMARY2")
+
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=LOG_SUMMARY_INTERVAL + 1)
+    )
+    await hass.async_block_till_done()
+    summaries = [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("Processed ")
+    ]
+    assert len(summaries) == 1
+    assert summaries[0].startswith("Processed 2 readings and rejected 1 ")
+    assert timings.slowest_cpe is None
+
+    # Quiet intervals are not logged
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=2 * LOG_SUMMARY_INTERVAL + 2)
+    )
+    await hass.async_block_till_done()
+    assert sum("Processed " in record.getMessage() for record in caplog.records) == 1
@@ -5,15 +5,22 @@ from __future__ import annotations
 import json
 
 import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from custom_components.e_redes_smart_metering_plus import webhook as webhook_module
 from custom_components.e_redes_smart_metering_plus.const import (
+    CONF_FAST_ACK,
+    CONF_QUEUE_SIZE,
     DOMAIN,
     SENSOR_MAPPING,
     WEBHOOK_ID,
 )
+from custom_components.e_redes_smart_metering_plus.ingest import merge_readings
 from custom_components.e_redes_smart_metering_plus.webhook import handle_webhook
+from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.util import dt as dt_util
 
 pytestmark = pytest.mark.asyncio
 
@@ -21,6 +28,8 @@ pytestmark = pytest.mark.asyncio
 class DummyRequest:
     """A minimal request object exposing only an async json() method."""
 
+    content_type = "application/json"
+
     def __init__(self, payload):
         """Initialize with a JSON payload."""
         self._payload = payload
@@ -30,6 +39,28 @@ class DummyRequest:
         return self._payload
 
 
+class DummyStream:
+    """A minimal stream exposing an async readline() over canned lines."""
+
+    def __init__(self, lines):
+        """Initialize with the raw lines of the body."""
+        self._lines = iter(lines)
+
+    async def readline(self):
+        """Return the next line, or b"" at the end of the stream."""
+        return next(self._lines, b"")
+
+
+class DummyNdjsonRequest:
+    """A minimal request object streaming a newline-delimited JSON body."""
+
+    content_type = "application/x-ndjson"
+
+    def __init__(self, lines):
+        """Initialize with the raw lines of the body."""
+        self.content = DummyStream(lines)
+
+
 @pytest.mark.parametrize(
     "payload",
     [
@@ -110,6 +141,8 @@ async def test_webhook_invalid_json_returns_400(
     class BadRequest:
         """A request object that raises JSON decode error."""
 
+        content_type = "application/json"
+
         async def json(self):
             """Raise JSON decode error."""
             raise json.JSONDecodeError("bad", "{}", 0)
@@ -135,3 +168,642 @@ async def test_webhook_ignores_unknown_fields(
         unique_id = f"{DOMAIN}_{payload['cpe']}_{key}"
         ent_id = entity_registry.async_get_entity_id("sensor", DOMAIN, unique_id)
         assert ent_id is None
+
+
+@pytest.mark.parametrize("wrap", [False, True])
+async def test_webhook_batch_creates_sensors_for_many_cpes(
+    hass: HomeAssistant, config_entry, wrap: bool
+) -> None:
+    """A batch (array or {"readings": [...]}) should update every CPE in it."""
+
+    readings = [
+        {"cpe": f"BATCH{i}", "instantaneousActivePowerImport": 100 * (i + 1)}
+        for i in range(3)
+    ]
+    payload = {"readings": readings} if wrap else readings
+
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+
+    summary = json.loads(resp.text)
+    assert summary["accepted"] == 3
+    assert summary["rejected"] == 0
+    assert [item["status"] for item in summary["results"]] == ["ok"] * 3
+
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    for i, reading in enumerate(readings):
+        unique_id = f"{DOMAIN}_{reading['cpe']}_instantaneous_active_power_import"
+        ent_id = entity_registry.async_get_entity_id("sensor", DOMAIN, unique_id)
+        assert ent_id is not None
+        state = hass.states.get(ent_id)
+        assert state is not None
+        assert float(state.state) == 100 * (i + 1)
+
+
+async def test_webhook_batch_reports_per_item_errors(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """Invalid items should be rejected without failing the rest of the batch."""
+
+    payload = [
+        {"cpe": "BATCH_OK", "voltageL1": 230.0},
+        {"voltageL1": 231.0},
+        "not-a-reading",
+    ]
+
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+
+    summary = json.loads(resp.text)
+    assert summary["accepted"] == 1
+    assert summary["rejected"] == 2
+    assert summary["results"][0] == {"index": 0, "cpe": "BATCH_OK", "status": "ok"}
+    assert summary["results"][1]["status"] == "error"
+    assert summary["results"][2]["error"] == "Missing 'cpe' field"
+
+
+async def test_webhook_empty_batch_returns_400(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """An empty batch should be rejected."""
+
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest([]), config_entry)
+    assert resp.status == 400
+    assert resp.text == "Empty batch"
+
+
+async def test_webhook_ndjson_stream_processes_each_line(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """NDJSON bodies should be processed line by line with per-line errors."""
+
+    lines = [
+        b'{"cpe": "STREAM1", "voltageL1": 230.0}\n',
+        b"\n",
+        b"not json\n",
+        b'{"voltageL1": 231.0}\n',
+        b'{"cpe": "STREAM2", "voltageL1": 232.0}',
+    ]
+
+    resp = await handle_webhook(
+        hass, WEBHOOK_ID, DummyNdjsonRequest(lines), config_entry
+    )
+    assert resp.status == 200
+
+    summary = json.loads(resp.text)
+    assert summary["accepted"] == 2
+    assert summary["rejected"] == 2
+    assert summary["errors"] == [
+        {"line": 3, "error": "Invalid JSON"},
+        {"line": 4, "error": "Missing 'cpe' field"},
+    ]
+
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    for cpe, voltage in (("STREAM1", 230.0), ("STREAM2", 232.0)):
+        unique_id = f"{DOMAIN}_{cpe}_voltage_l1"
+        ent_id = entity_registry.async_get_entity_id("sensor", DOMAIN, unique_id)
+        assert ent_id is not None
+        assert float(hass.states.get(ent_id).state) == voltage
+
+
+async def test_webhook_ndjson_rejects_oversized_lines(
+    hass: HomeAssistant, config_entry, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Lines over the size limit are rejected without stopping the stream."""
+
+    monkeypatch.setattr(webhook_module, "NDJSON_MAX_LINE_BYTES", 64)
+
+    lines = [
+        b'{"cpe": "STREAM3", "voltageL1": 230.0, "padding": "' + b"x" * 64 + b'"}\n',
+        b'{"cpe": "STREAM3", "voltageL1": 231.0}\n',
+    ]
+
+    resp = await handle_webhook(
+        hass, WEBHOOK_ID, DummyNdjsonRequest(lines), config_entry
+    )
+    assert resp.status == 200
+
+    summary = json.loads(resp.text)
+    assert summary["accepted"] == 1
+    assert summary["errors"] == [{"line": 1, "error": "Line too long"}]
+
+
+async def test_webhook_ndjson_enforces_line_count(
+    hass: HomeAssistant, config_entry, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Streams with more readings than allowed stop with 413."""
+
+    monkeypatch.setattr(webhook_module, "NDJSON_MAX_LINES", 2)
+
+    lines = [b'{"cpe": "STREAM4", "voltageL1": 230.0}\n'] * 3
+
+    resp = await handle_webhook(
+        hass, WEBHOOK_ID, DummyNdjsonRequest(lines), config_entry
+    )
+    assert resp.status == 413
+
+    summary = json.loads(resp.text)
+    assert summary["accepted"] == 2
+
+
+async def test_webhook_ndjson_over_http(
+    hass: HomeAssistant, hass_client, config_entry
+) -> None:
+    """NDJSON posted over HTTP should be streamed through the webhook."""
+
+    client = await hass_client()
+    body = "\n".join(
+        json.dumps({"cpe": "STREAM_HTTP", "activeEnergyImport": 1000 + i})
+        for i in range(5)
+    )
+    resp = await client.post(
+        f"/api/webhook/{WEBHOOK_ID}",
+        data=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status == 200
+    assert (await resp.json())["accepted"] == 5
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    ent_id = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_STREAM_HTTP_active_energy_import"
+    )
+    assert ent_id is not None
+    assert float(hass.states.get(ent_id).state) == 1004
+
+
+@pytest.fixture
+async def fast_ack_entry(hass: HomeAssistant):
+    """Create a config entry with fast-ack mode and a tiny queue."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title="E-Redes Smart Metering Plus",
+        data={"webhook_id": WEBHOOK_ID},
+        options={CONF_FAST_ACK: True, CONF_QUEUE_SIZE: 2},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    yield entry
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_webhook_fast_ack_queues_reading(
+    hass: HomeAssistant, fast_ack_entry
+) -> None:
+    """In fast-ack mode the reading is acknowledged first and applied later."""
+
+    payload = {"cpe": "FAST1", "voltageL1": 230.0}
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), fast_ack_entry)
+    assert resp.status == 200
+
+    entity_registry = er.async_get(hass)
+    unique_id = f"{DOMAIN}_FAST1_voltage_l1"
+    assert entity_registry.async_get_entity_id("sensor", DOMAIN, unique_id) is None
+
+    queue = fast_ack_entry.runtime_data.queue
+    await queue.async_join()
+    await hass.async_block_till_done()
+
+    ent_id = entity_registry.async_get_entity_id("sensor", DOMAIN, unique_id)
+    assert ent_id is not None
+    assert float(hass.states.get(ent_id).state) == 230.0
+    assert queue.processed == 1
+
+
+async def test_webhook_fast_ack_returns_429_when_queue_full(
+    hass: HomeAssistant, fast_ack_entry
+) -> None:
+    """A full queue should reject readings with 429 and Retry-After."""
+
+    queue = fast_ack_entry.runtime_data.queue
+
+    # The worker cannot run between these calls, so the third CPE overflows
+    statuses = [
+        (
+            await handle_webhook(
+                hass,
+                WEBHOOK_ID,
+                DummyRequest({"cpe": f"FAST2_{i}", "voltageL1": 230.0 + i}),
+                fast_ack_entry,
+            )
+        )
+        for i in range(3)
+    ]
+    assert [resp.status for resp in statuses] == [200, 200, 429]
+    assert statuses[2].headers["Retry-After"] == "5"
+    assert queue.dropped == 1
+
+    # A batch that cannot be fully queued is answered with 429 as well
+    resp = await handle_webhook(
+        hass,
+        WEBHOOK_ID,
+        DummyRequest([{"cpe": "FAST3", "voltageL1": 230.0}]),
+        fast_ack_entry,
+    )
+    assert resp.status == 429
+    assert json.loads(resp.text)["results"][0]["error"] == "Queue full"
+
+    await queue.async_join()
+    assert queue.processed == 2
+    assert queue.depth == 0
+
+
+async def test_webhook_fast_ack_creates_queue_diagnostics(
+    hass: HomeAssistant, fast_ack_entry
+) -> None:
+    """Fast-ack mode exposes disabled-by-default queue diagnostic sensors."""
+
+    entity_registry = er.async_get(hass)
+    for sensor_key in ("queue_depth", "queue_dropped"):
+        unique_id = f"{DOMAIN}_{fast_ack_entry.entry_id}_{sensor_key}"
+        ent_id = entity_registry.async_get_entity_id("sensor", DOMAIN, unique_id)
+        assert ent_id is not None
+        entity_entry = entity_registry.async_get(ent_id)
+        assert entity_entry.disabled_by == er.RegistryEntryDisabler.INTEGRATION
+
+
+async def test_webhook_fast_ack_coalesces_readings_per_cpe(
+    hass: HomeAssistant, fast_ack_entry
+) -> None:
+    """Queued readings for one CPE collapse into the newest one."""
+
+    queue = fast_ack_entry.runtime_data.queue
+    readings = [
+        {
+            "cpe": "FAST4",
+            "clock": "2025-08-01 12:00:10",
+            "instantaneousActivePowerImport": 900,
+            "activeEnergyImport": 5000,
+        },
+        # Arrives late but carries an older clock
+        {
+            "cpe": "FAST4",
+            "clock": "2025-08-01 12:00:05",
+            "instantaneousActivePowerImport": 100,
+            "activeEnergyImport": 5100,
+            "voltageL1": 231.0,
+        },
+        {"cpe": "FAST4", "clock": "2025-08-01 12:00:00", "voltageL1": 229.0},
+    ]
+    for reading in readings:
+        resp = await handle_webhook(
+            hass, WEBHOOK_ID, DummyRequest(reading), fast_ack_entry
+        )
+        assert resp.status == 200
+
+    # All three readings share one slot, so the small queue never fills
+    assert queue.depth == 1
+    assert queue.coalesced == 2
+
+    await queue.async_join()
+    await hass.async_block_till_done()
+    assert queue.processed == 1
+
+    entity_registry = er.async_get(hass)
+
+    def state_of(sensor_key: str) -> float:
+        ent_id = entity_registry.async_get_entity_id(
+            "sensor", DOMAIN, f"{DOMAIN}_FAST4_{sensor_key}"
+        )
+        return float(hass.states.get(ent_id).state)
+
+    # Newest clock wins for measurements, counters keep their maximum
+    assert state_of("instantaneous_active_power_import") == 900
+    assert state_of("voltage_l1") == 231.0
+    assert state_of("active_energy_import") == 5100
+
+
+async def test_webhook_dispatches_one_signal_per_reading(
+    hass: HomeAssistant, config_entry, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Each reading should be dispatched once, whatever fields it carries."""
+
+    payload = {
+        "cpe": "SIGNAL1",
+        "instantaneousActivePowerImport": 2300.0,
+        "activeEnergyImport": 1000,
+        "voltageL1": 230.0,
+    }
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    signals: list[str] = []
+    original_send = webhook_module.async_dispatcher_send
+
+    def counting_send(hass, signal, *args):
+        signals.append(signal)
+        original_send(hass, signal, *args)
+
+    monkeypatch.setattr(webhook_module, "async_dispatcher_send", counting_send)
+
+    payload = {**payload, "instantaneousActivePowerImport": 4600.0}
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    assert signals == [f"{DOMAIN}_SIGNAL1_reading"]
+
+    # The routed reading still reaches raw and calculated sensors
+    entity_registry = er.async_get(hass)
+    ent_id = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_SIGNAL1_instantaneous_active_current_import"
+    )
+    assert float(hass.states.get(ent_id).state) == pytest.approx(20.0)
+
+
+async def test_webhook_skips_device_registry_for_known_cpe(
+    hass: HomeAssistant, config_entry, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Only the first reading of a CPE should look up its device."""
+
+    payload = {"cpe": "KNOWN1", "voltageL1": 230.0}
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "KNOWN1")})
+    assert config_entry.runtime_data.cpes["KNOWN1"].device_id == device.id
+
+    def fail_lookup(hass):
+        raise AssertionError("device registry consulted for a known CPE")
+
+    monkeypatch.setattr(webhook_module.dr, "async_get", fail_lookup)
+
+    resp = await handle_webhook(
+        hass, WEBHOOK_ID, DummyRequest({**payload, "voltageL1": 231.0}), config_entry
+    )
+    assert resp.status == 200
+
+
+async def test_webhook_recreates_removed_device(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """Removing a device should make the next reading recreate it."""
+
+    payload = {"cpe": "REMOVED1", "voltageL1": 230.0}
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    device_registry = dr.async_get(hass)
+    device = device_registry.async_get_device(identifiers={(DOMAIN, "REMOVED1")})
+    device_registry.async_remove_device(device.id)
+    await hass.async_block_till_done()
+
+    cpe_runtime = config_entry.runtime_data.cpes["REMOVED1"]
+    assert cpe_runtime.device_id is None
+    assert not cpe_runtime.sensors
+
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    device = device_registry.async_get_device(identifiers={(DOMAIN, "REMOVED1")})
+    assert device is not None
+    assert cpe_runtime.device_id == device.id
+
+    entity_registry = er.async_get(hass)
+    assert entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_REMOVED1_voltage_l1"
+    )
+    assert entity_registry.async_get_entity_id(
+        "number", DOMAIN, f"{DOMAIN}_REMOVED1_breaker_limit"
+    )
+
+
+async def test_webhook_adds_new_cpe_sensors_in_one_batch(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """A new CPE's sensors should be added with a single add_entities call."""
+
+    add_entities = config_entry.runtime_data.add_entities
+    original_add = add_entities[Platform.SENSOR]
+    batches: list[list] = []
+
+    def recording_add(new_entities, *args, **kwargs):
+        new_entities = list(new_entities)
+        batches.append(new_entities)
+        original_add(new_entities, *args, **kwargs)
+
+    add_entities[Platform.SENSOR] = recording_add
+
+    payload = {
+        "cpe": "BATCHADD1",
+        "clock": "2025-08-11 12:00:00",
+        "instantaneousActivePowerImport": 2300.0,
+        "activeEnergyImport": 1000,
+        "voltageL1": 230.0,
+    }
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    assert len(batches) == 1
+    unique_ids = {entity.unique_id for entity in batches[0]}
+    assert f"{DOMAIN}_BATCHADD1_voltage_l1" in unique_ids
+    assert f"{DOMAIN}_BATCHADD1_breaker_load" in unique_ids
+    assert f"{DOMAIN}_BATCHADD1_last_update" in unique_ids
+
+    # Calculated sensors in the batch already see the first reading
+    entity_registry = er.async_get(hass)
+    ent_id = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_BATCHADD1_instantaneous_active_current_import"
+    )
+    assert float(hass.states.get(ent_id).state) == pytest.approx(10.0)
+
+    # A repeat reading adds nothing
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+    assert len(batches) == 1
+
+
+async def test_cpe_entities_share_device_info(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """Every entity of a CPE should reuse the meter's single DeviceInfo."""
+
+    payload = {"cpe": "SHARED1", "instantaneousActivePowerImport": 2300.0}
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    cpe_runtime = config_entry.runtime_data.cpes["SHARED1"]
+    entities = [
+        *cpe_runtime.sensors.values(),
+        cpe_runtime.breaker_limit,
+        cpe_runtime.breaker_overload,
+    ]
+    assert all(entity.device_info is cpe_runtime.device_info for entity in entities)
+
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, "SHARED1")})
+    assert device.name == "E-Redes Smart Meter (SHARED1)"
+    assert device.serial_number == "SHARED1"
+
+
+async def test_webhook_drops_duplicate_and_stale_readings(
+    hass: HomeAssistant, config_entry, hass_client
+) -> None:
+    """Retries and late readings should be acknowledged but not applied."""
+
+    client = await hass_client()
+
+    async def post(clock: str, voltage: float) -> None:
+        resp = await client.post(
+            f"/api/webhook/{WEBHOOK_ID}",
+            json={"cpe": "ORDER1", "clock": clock, "voltageL1": voltage},
+        )
+        assert resp.status == 200
+        await hass.async_block_till_done()
+
+    await post("2025-08-11 12:00:15", 230.0)
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_ORDER1_voltage_l1"
+    )
+    await post("2025-08-11 12:00:15", 230.0)  # Sender retry
+    await post("2025-08-11 12:00:00", 228.0)  # Late reading
+    assert hass.states.get(entity_id).state == "230.0"
+
+    await post("2025-08-11 12:00:30", 232.0)
+    assert hass.states.get(entity_id).state == "232.0"
+
+    # A retry of an older reading counts as a duplicate, not a stale one
+    await post("2025-08-11 12:00:15", 230.0)
+
+    reading_filter = config_entry.runtime_data.reading_filter
+    assert reading_filter.duplicates == 2
+    assert reading_filter.stale == 1
+    assert hass.states.get(entity_id).state == "232.0"
+
+
+async def test_merge_readings_compares_parsed_clocks() -> None:
+    """Coalescing should order clocks by time, not by their text."""
+    newer = {"cpe": "MERGE1", "clock": "2025-08-01T12:00:00+00:00", "voltageL1": 230.0}
+    # Later as text, but an hour earlier in UTC
+    older = {"cpe": "MERGE1", "clock": "2025-08-01 12:30:00+01:00", "voltageL1": 229.0}
+    assert merge_readings(newer, older)["voltageL1"] == 230.0
+    assert merge_readings(older, newer)["voltageL1"] == 230.0
+
+    # An invalid clock does not outrank a valid one; the later arrival wins
+    garbage = {"cpe": "MERGE1", "clock": "not a clock", "voltageL1": 1.0}
+    assert merge_readings(garbage, newer)["voltageL1"] == 230.0
+    assert merge_readings(newer, garbage)["voltageL1"] == 1.0
+
+
+async def test_webhook_registered_after_platforms(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Readings should only be accepted once every platform can add entities."""
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={"webhook_id": WEBHOOK_ID},
+        options={CONF_FAST_ACK: True},
+    )
+    entry.add_to_hass(hass)
+    registered_at_forward: list[bool] = []
+    forward = hass.config_entries.async_forward_entry_setups
+
+    async def record_forward(config_entry, platforms) -> None:
+        registered_at_forward.append(WEBHOOK_ID in hass.data.get("webhook", {}))
+        await forward(config_entry, platforms)
+
+    monkeypatch.setattr(
+        hass.config_entries, "async_forward_entry_setups", record_forward
+    )
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert registered_at_forward == [False]
+    assert WEBHOOK_ID in hass.data["webhook"]
+
+    payload = {"cpe": "ORDER1", "voltageL1": 230.0}
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), entry)
+    assert resp.status == 200
+    await entry.runtime_data.queue.async_join()
+    await hass.async_block_till_done()
+    assert "voltage_l1" in entry.runtime_data.cpes["ORDER1"].sensors
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_webhook_applies_retry_of_failed_reading(
+    hass: HomeAssistant, config_entry, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A reading that failed to apply should not block the sender's retry."""
+
+    ensure_sensors = webhook_module.async_ensure_sensors_for_data
+    failures = [RuntimeError("entity setup failed")]
+
+    async def fail_once(*args) -> None:
+        if failures:
+            raise failures.pop()
+        await ensure_sensors(*args)
+
+    monkeypatch.setattr(webhook_module, "async_ensure_sensors_for_data", fail_once)
+
+    payload = {"cpe": "RETRY1", "clock": "2025-08-11 12:00:15", "voltageL1": 230.0}
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 500
+    cpe_runtime = config_entry.runtime_data.cpes["RETRY1"]
+    assert cpe_runtime.clock is None
+
+    resp = await handle_webhook(hass, WEBHOOK_ID, DummyRequest(payload), config_entry)
+    assert resp.status == 200
+    await hass.async_block_till_done()
+
+    assert config_entry.runtime_data.reading_filter.duplicates == 0
+    assert cpe_runtime.readings == 1
+    assert cpe_runtime.clock is not None
+    assert cpe_runtime.sensors["voltage_l1"].native_value == 230.0
+
+
+async def test_webhook_applies_repeated_hour_at_dst_end(
+    hass: HomeAssistant, config_entry
+) -> None:
+    """Readings from the hour repeated at the end of DST should not be stale."""
+
+    await hass.config.async_set_time_zone("Europe/Lisbon")
+    reading_filter = config_entry.runtime_data.reading_filter
+
+    async def post(clock: str, voltage: float) -> None:
+        payload = {"cpe": "DST1", "clock": clock, "voltageL1": voltage}
+        resp = await handle_webhook(
+            hass, WEBHOOK_ID, DummyRequest(payload), config_entry
+        )
+        assert resp.status == 200
+
+    # Clocks fall back from 02:00 WEST to 01:00 WET on 2025-10-26
+    for index, clock in enumerate(
+        (
+            "2025-10-26 00:45:00",
+            "2025-10-26 01:15:00",
+            "2025-10-26 01:45:00",
+            "2025-10-26 01:00:00",
+            "2025-10-26 01:15:00",
+            "2025-10-26 01:30:00",
+        )
+    ):
+        await post(clock, 220.0 + index)
+    assert reading_filter.stale == 0
+
+    # A retry from the repeated hour is still a duplicate
+    await post("2025-10-26 01:30:00", 225.0)
+    assert reading_filter.duplicates == 1
+
+    await post("2025-10-26 02:00:00", 226.0)
+    await hass.async_block_till_done()
+
+    cpe_runtime = config_entry.runtime_data.cpes["DST1"]
+    assert reading_filter.stale == 0
+    assert cpe_runtime.readings == 7
+    assert cpe_runtime.sensors["voltage_l1"].native_value == 226.0
+    assert cpe_runtime.clock == dt_util.parse_datetime("2025-10-26T02:00:00+00:00")